@@ -28,4 +28,7 @@ class EvaluatorAgent:
         }
         return {"dataset": dataset_path, "tasks": tasks, "metrics": metrics, "cm": cm}
 
-
+    def keyframe_tradeoff(self, events: list[dict], gt_by_frame: dict) -> dict:
+        # Accuracy of detected vs tracker-propagated frames from a run's events
+        from app.utils.metrics import map50_by_box_source
+        return map50_by_box_source(events, gt_by_frame)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.providers.base import ainfer
+from app.providers.detection.batch import DetectionBatch
+from app.utils.frame import ImageInput, as_b64
+
+
+STAGES = ("det", "seg", "ocr")
+_CONFIG_SECTIONS = {"det": "detection", "seg": "segmentation", "ocr": "ocr"}
+
+
+def stage_timeouts(providers_cfg: Dict[str, Any], default_s: float = 10.0) -> Dict[str, float]:
+    """Per-stage timeouts from the ``timeout_s`` key of each providers.yaml section."""
+    out: Dict[str, float] = {}
+    for stage, section in _CONFIG_SECTIONS.items():
+        cfg = providers_cfg.get(section) or {}
+        out[stage] = float(cfg.get("timeout_s", default_s))
+    return out
+
+
+@dataclass
+class FrameResults:
+    boxes: List[Any] = field(default_factory=list)
+    masks: List[Any] = field(default_factory=list)
+    ocr: List[Any] = field(default_factory=list)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+
+
+class FrameExecutor:
+    """Send detection, segmentation and OCR for one frame concurrently.
+
+    Frame latency becomes the slowest stage rather than the sum of all three. A
+    stage that errors or exceeds its timeout yields an empty result and an entry
+    in ``errors``; the other stages are unaffected.
+    """
+
+    def __init__(
+        self,
+        detector: Optional[Any] = None,
+        segmenter: Optional[Any] = None,
+        ocr: Optional[Any] = None,
+        timeouts_s: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.adapters = {"det": detector, "seg": segmenter, "ocr": ocr}
+        self.timeouts_s = timeouts_s or {}
+
+    async def _stage(self, name: str, image_b64: str, results: FrameResults) -> List[Any]:
+        adapter = self.adapters.get(name)
+        if adapter is None:
+            return []
+        timeout = self.timeouts_s.get(name, 10.0)
+        t0 = time.perf_counter()
+        try:
+            out = await asyncio.wait_for(ainfer(adapter, image_b64), timeout=timeout)
+            # Detection batches stay array-backed; other stages return lists
+            return out if isinstance(out, DetectionBatch) else list(out)
+        except asyncio.TimeoutError:
+            results.errors.append(f"{name}: timeout after {timeout:.1f}s")
+            return []
+        except Exception as e:
+            results.errors.append(f"{name}: {type(e).__name__}: {e}")
+            return []
+        finally:
+            results.timings_ms[name] = (time.perf_counter() - t0) * 1000.0
+
+    async def run(self, image: ImageInput) -> FrameResults:
+        # Encode once up front; every stage shares the same wire payload
+        image_b64 = as_b64(image)
+        results = FrameResults()
+        t0 = time.perf_counter()
+        boxes, masks, ocr = await asyncio.gather(*(self._stage(s, image_b64, results) for s in STAGES))
+        results.timings_ms["model"] = (time.perf_counter() - t0) * 1000.0
+        results.boxes, results.masks, results.ocr = boxes, masks, ocr
+        return results
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional
+
+
+class KeyframeScheduler:
+    """Decides which frames go to the remote detector.
+
+    A frame is a keyframe every ``interval`` frames, or as soon as the tracker's
+    propagated confidence (reported through ``observe``) falls below
+    ``min_confidence``. Frames in between are filled by propagating tracks.
+    ``interval: 1`` detects every frame.
+    """
+
+    def __init__(self, interval: int = 1, min_confidence: float = 0.0, decay: float = 0.9) -> None:
+        self.interval = max(1, int(interval))
+        self.min_confidence = float(min_confidence)
+        self.decay = float(decay)
+        self._since = None  # frames since the last keyframe; None before the first
+        self._force = False
+
+    @classmethod
+    def from_profile(cls, profile_cfg: Dict[str, Any]) -> "KeyframeScheduler":
+        cfg = profile_cfg.get("keyframe") or {}
+        return cls(
+            interval=int(cfg.get("interval", 1)),
+            min_confidence=float(cfg.get("min_confidence", 0.0)),
+            decay=float(cfg.get("decay", 0.9)),
+        )
+
+    def should_detect(self) -> bool:
+        """Call once per frame, in frame order."""
+        if self._since is None or self._force or self._since + 1 >= self.interval:
+            self._since = 0
+            self._force = False
+            return True
+        self._since += 1
+        return False
+
+    def observe(self, confidence: Optional[float]) -> None:
+        """Report the mean confidence of propagated tracks for the latest frame."""
+        if confidence is not None and confidence < self.min_confidence:
+            self._force = True
+
+
+def mean_confidence(tracks: Iterable[Dict[str, Any]]) -> Optional[float]:
+    scores = [float(t.get("score", 0.0)) for t in tracks]
+    return sum(scores) / len(scores) if scores else None
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from app.services.metrics import get_metrics_registry
+
+
+POLICIES = ("drop_oldest", "keep_latest", "stride")
+
+
+@dataclass
+class PacedFrame:
+    frame_id: int
+    ts_s: float
+    frame: Any
+    # Frames skipped since the previous emitted frame: {"frame_id", "reason"}
+    dropped: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class FramePacer:
+    """Caps a frame source at ``max_fps`` and decides which frames to drop.
+
+    ``read`` returns ``(ok, frame)`` like ``cv2.VideoCapture.read`` and runs on a
+    reader thread, decoupled from the consumer iterating over the pacer. Frames
+    are kept on a ``1 / max_fps`` deadline schedule in source time (a frame is
+    kept once its timestamp reaches the next deadline, which then advances by
+    one period), so the output averages ``max_fps`` even when it does not
+    divide the source rate; the rest are dropped with reason ``rate``. When the
+    consumer falls behind:
+
+    - ``drop_oldest`` keeps the newest ``buffer`` frames (reason ``queue_full``);
+    - ``keep_latest`` holds one pending frame and replaces it (reason ``superseded``);
+    - ``stride`` picks frames by a fractional accumulator (frame i is kept when
+      ``floor(i * max_fps / source_fps)`` advances) and blocks the reader
+      instead of dropping, for deterministic offline sampling.
+
+    With ``live`` the reader is paced to the source frame rate, emulating a
+    camera, so a slow consumer sheds frames instead of drifting behind. Otherwise
+    the reader blocks when the buffer is full and only rate/stride drops apply.
+    """
+
+    def __init__(
+        self,
+        read: Callable[[], Tuple[bool, Any]],
+        source_fps: float,
+        max_fps: Optional[float] = None,
+        policy: str = "keep_latest",
+        buffer: int = 4,
+        live: bool = False,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"unknown drop policy {policy!r}; expected one of {POLICIES}")
+        self.read = read
+        self.source_fps = float(source_fps) if source_fps and source_fps > 0 else 30.0
+        self.max_fps = float(max_fps) if max_fps and max_fps > 0 else None
+        self.policy = policy
+        self.capacity = 1 if policy == "keep_latest" else max(1, int(buffer))
+        self.live = live
+        self.should_stop = should_stop or (lambda: False)
+        # Source frames advanced per output frame; 1.25 for 30 fps capped at 24
+        self.stride = max(1.0, self.source_fps / self.max_fps) if self.max_fps else 1.0
+        self._next_ts: Optional[float] = None
+        self._buf: Deque[PacedFrame] = deque()
+        self._dropped: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        self._eof = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._drops = get_metrics_registry().frames_dropped
+
+    def _drop(self, frame_id: int, reason: str) -> None:
+        self._dropped.append({"frame_id": frame_id, "reason": reason})
+        self._drops.labels(reason=reason).inc()
+
+    @property
+    def output_fps(self) -> float:
+        """Frame rate the pacer emits before any consumer-lag drops: ``min(source_fps, max_fps)``."""
+        return self.source_fps / self.stride
+
+    def _admit(self, frame_id: int) -> Optional[str]:
+        """Reason to skip ``frame_id`` before buffering, or None to keep it."""
+        if self.max_fps is None:
+            return None
+        if self.policy == "stride":
+            # Small tolerance so exact ratios never drop on rounding
+            if frame_id == 0 or math.floor(frame_id / self.stride + 1e-9) > math.floor((frame_id - 1) / self.stride + 1e-9):
+                return None
+            return "stride"
+        ts = frame_id / self.source_fps
+        period = 1.0 / self.max_fps
+        if self._next_ts is not None and ts < self._next_ts - 1e-6:
+            return "rate"
+        # Advance by one period, never to before this frame: a gap in the
+        # source must not be followed by a burst catching up on it
+        self._next_ts = ts + period if self._next_ts is None else max(self._next_ts + period, ts)
+        return None
+
+    def _reader(self) -> None:
+        frame_id = 0
+        t0 = time.perf_counter()
+        try:
+            while not self._closed and not self.should_stop():
+                ok, frame = self.read()
+                if not ok:
+                    break
+                ts = frame_id / self.source_fps
+                if self.live:
+                    delay = t0 + ts - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                reason = self._admit(frame_id)
+                with self._cond:
+                    if reason is not None:
+                        self._drop(frame_id, reason)
+                    else:
+                        self._push(PacedFrame(frame_id, ts, frame))
+                frame_id += 1
+        finally:
+            with self._cond:
+                self._eof = True
+                self._cond.notify_all()
+
+    def _push(self, item: PacedFrame) -> None:
+        # Called with the condition held
+        while len(self._buf) >= self.capacity and not self._closed:
+            if self.live and self.policy != "stride":
+                old = self._buf.popleft()
+                self._drop(old.frame_id, "superseded" if self.policy == "keep_latest" else "queue_full")
+                break
+            self._cond.wait()
+        self._buf.append(item)
+        self._cond.notify_all()
+
+    def start(self) -> "FramePacer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._reader, name="frame-pacer", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __iter__(self) -> Iterator[PacedFrame]:
+        self.start()
+        return self
+
+    def __next__(self) -> PacedFrame:
+        with self._cond:
+            while not self._buf:
+                if self._eof or self._closed:
+                    raise StopIteration
+                self._cond.wait()
+            item = self._buf.popleft()
+            # Attach every drop recorded since the previous emitted frame
+            drops_before = [d for d in self._dropped if d["frame_id"] < item.frame_id]
+            self._dropped = [d for d in self._dropped if d["frame_id"] >= item.frame_id]
+            item.dropped = sorted(drops_before, key=lambda d: d["frame_id"])
+            self._cond.notify_all()
+            return item
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from app.pipelines.shm_ring import FrameRing, SlotRef
+
+
+# Forward gaps up to this many frames are skipped with grab(); longer ones seek
+SEEK_GAP = 48
+DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024
+
+
+def probe(path: str) -> Tuple[int, int, int]:
+    """``(frame_count, width, height)`` from the container; count may be 0 if unknown."""
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"cannot open video: {path}")
+        return (
+            int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0),
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0),
+            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0),
+        )
+    finally:
+        cap.release()
+
+
+def read_indices(cap: cv2.VideoCapture, indices: Sequence[int], pos: int = 0) -> Iterator[Tuple[int, np.ndarray]]:
+    """Decode ascending ``indices`` from ``cap`` currently at frame ``pos``.
+
+    Short gaps are skipped with ``grab()`` (no colour conversion); long ones seek.
+    """
+    for idx in indices:
+        if idx < pos or idx - pos > SEEK_GAP:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            pos = idx
+        while pos < idx:
+            if not cap.grab():
+                return
+            pos += 1
+        ok, frame = cap.read()
+        if not ok:
+            return
+        pos += 1
+        yield idx, frame
+
+
+# The parent's frame ring, attached once per worker by the pool initializer
+_ring: Optional[FrameRing] = None
+
+
+def _attach(ring: FrameRing) -> None:
+    global _ring
+    _ring = ring
+
+
+def _decode_segment(path: str, indices: List[int], refs: List[SlotRef]) -> int:
+    """Process-pool worker: decode ``indices`` into the ring slots the parent reserved."""
+    assert _ring is not None
+    cap = cv2.VideoCapture(path)
+    n = 0
+    try:
+        for ref, (_, frame) in zip(refs, read_indices(cap, indices, pos=0)):
+            if frame.shape != _ring.shape:
+                break
+            _ring.view(ref)[...] = frame
+            n += 1
+    finally:
+        cap.release()
+    return n
+
+
+def decode_parallel(
+    path: str,
+    indices: Optional[Sequence[int]] = None,
+    stride: int = 1,
+    workers: Optional[int] = None,
+    segment_frames: Optional[int] = None,
+    budget_bytes: int = DEFAULT_BUDGET_BYTES,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Decode a video in a process pool, yielding ``(index, pixels)`` in index order.
+
+    The wanted frames (``indices``, or every ``stride``-th frame) are split into
+    contiguous segments; each worker seeks to its segment's first frame and
+    decodes straight into slots of a ``FrameRing``, so pixels are never pickled.
+    Slots are reserved per segment before it is submitted, which bounds the
+    frames in flight to the ring (sized under ``budget_bytes``) without workers
+    ever waiting on it. Each frame is copied out and its slot freed before it
+    is yielded, so consumers may keep frames.
+    """
+    total, w, h = probe(path)
+    if indices is None:
+        if total <= 0:
+            raise ValueError("frame count unknown; decode sequentially instead")
+        wanted = list(range(0, total, max(1, int(stride))))
+    else:
+        wanted = sorted(set(int(i) for i in indices if int(i) >= 0))
+    if not wanted:
+        return
+    shape = (h, w, 3)
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    inflight = 2 * workers
+    frame_bytes = max(1, h * w * 3)
+    if segment_frames is None:
+        # Enough segments to keep every worker busy, within the memory budget
+        segment_frames = min(max(1, len(wanted) // (workers * 4)), max(1, budget_bytes // (frame_bytes * inflight)))
+    segment_frames = max(1, int(segment_frames))
+    chunks = [wanted[i:i + segment_frames] for i in range(0, len(wanted), segment_frames)]
+
+    # spawn: forking a process that holds OpenCV/uvicorn threads is not safe
+    ctx = mp.get_context("spawn")
+    ring = FrameRing(inflight * segment_frames, shape, ctx=ctx)
+    pending: Deque[Tuple[List[int], List[SlotRef], Future]] = deque()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_attach, initargs=(ring,)) as pool:
+            it = iter(chunks)
+            try:
+                while True:
+                    while len(pending) < inflight:
+                        chunk = next(it, None)
+                        if chunk is None:
+                            break
+                        refs = [ring.acquire() for _ in chunk]
+                        pending.append((chunk, refs, pool.submit(_decode_segment, path, chunk, refs)))
+                    if not pending:
+                        return
+                    chunk, refs, future = pending.popleft()
+                    done = 0
+                    try:
+                        n = future.result()
+                        for k in range(n):
+                            pixels = ring.view(refs[k]).copy()
+                            ring.release(refs[k])
+                            done = k + 1
+                            yield chunk[k], pixels
+                    finally:
+                        for ref in refs[done:]:
+                            ring.release(ref)
+                    if n < len(chunk):
+                        # Hit the real end of the stream; later segments are past it
+                        return
+            finally:
+                for chunk, refs, future in pending:
+                    future.cancel()
+                    try:
+                        future.result()
+                    except Exception:
+                        pass
+                    for ref in refs:
+                        ring.release(ref)
+    finally:
+        ring.close()
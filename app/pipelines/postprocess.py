@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.providers.detection.batch import DetectionBatch
+
+
+def score_mask(scores: np.ndarray, thresh: float) -> np.ndarray:
+    return np.asarray(scores) >= thresh
+
+
+def class_mask(classes: np.ndarray, names: Sequence[str], include: Optional[Sequence[str]]) -> np.ndarray:
+    """Boolean mask of boxes whose class name (``names[classes[i]]``) is in ``include``."""
+    classes = np.asarray(classes, dtype=np.intp)
+    if not include:
+        return np.ones(len(classes), dtype=bool)
+    wanted = set(include)
+    allowed = np.fromiter((n in wanted for n in names), dtype=bool, count=len(names))
+    return allowed[classes] if len(names) else np.zeros(len(classes), dtype=bool)
+
+
+def _offset_by_class(xyxy: np.ndarray, classes: Optional[np.ndarray]) -> np.ndarray:
+    # Shift each class into its own disjoint coordinate range, so one
+    # class-agnostic pass never lets boxes of different classes overlap
+    boxes = np.asarray(xyxy, dtype=np.float32)
+    if classes is None or not len(boxes):
+        return boxes
+    span = float(boxes.max() - min(float(boxes.min()), 0.0)) + 1.0
+    return boxes + (np.asarray(classes, dtype=np.float32) * span)[:, None]
+
+
+# Rows of the IoU matrix computed per NMS block; small enough that a block
+# rarely outlives the boxes it suppresses, large enough to amortise numpy calls
+NMS_BLOCK = 32
+
+
+def nms(xyxy: np.ndarray, scores: np.ndarray, iou_thresh: float, classes: Optional[np.ndarray] = None) -> np.ndarray:
+    """Greedy non-maximum suppression; returns kept indices by descending score.
+
+    With ``classes``, boxes only suppress boxes of the same class; all classes
+    are handled in one batched pass. Boxes are processed ``NMS_BLOCK`` at a time:
+    one block-vs-survivors IoU matrix settles the whole block, leaving a single
+    boolean OR per kept box. Results match plain greedy NMS.
+    """
+    if len(xyxy) == 0:
+        return np.empty(0, dtype=np.intp)
+    boxes = _offset_by_class(xyxy, classes)
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    boxes = boxes[order]
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    alive = np.arange(len(boxes))
+    keep: List[int] = []
+    while alive.size:
+        k = min(NMS_BLOCK, alive.size)
+        ax1, ay1, ax2, ay2, aa = x1[alive], y1[alive], x2[alive], y2[alive], areas[alive]
+        iw = np.minimum(ax2[:k, None], ax2[None, :])
+        iw -= np.maximum(ax1[:k, None], ax1[None, :])
+        np.maximum(iw, 0, out=iw)
+        ih = np.minimum(ay2[:k, None], ay2[None, :])
+        ih -= np.maximum(ay1[:k, None], ay1[None, :])
+        np.maximum(ih, 0, out=ih)
+        iw *= ih
+        union = aa[:k, None] + aa[None, :]
+        union -= iw
+        over = iw > iou_thresh * np.maximum(union, 1e-9)
+        suppressed = np.zeros(alive.size, dtype=bool)
+        for j in range(k):
+            if not suppressed[j]:
+                keep.append(alive[j])
+                suppressed |= over[j]
+        suppressed[:k] = True
+        alive = alive[~suppressed]
+    return order[np.asarray(keep, dtype=np.intp)]
+
+
+def _decay(iou: np.ndarray, iou_thresh: float, sigma: float, method: str) -> np.ndarray:
+    if method == "linear":
+        return np.where(iou > iou_thresh, 1.0 - iou, 1.0)
+    return np.exp(-(iou * iou) / sigma)
+
+
+def _run_starts(lab: np.ndarray) -> np.ndarray:
+    # True where a run of equal labels begins
+    first = np.empty(len(lab), dtype=bool)
+    first[:1] = True
+    np.not_equal(lab[1:], lab[:-1], out=first[1:])
+    return first
+
+
+def _clusters(boxes: np.ndarray) -> np.ndarray:
+    """Labels such that boxes with different labels cannot intersect.
+
+    Sweeps alternate between x and y: sorted by start, a new group begins
+    wherever a box starts at or past the furthest end seen so far. Each pass
+    offsets the previous groups into disjoint ranges (as ``_offset_by_class``
+    does for classes), so it only splits groups. A group that one axis leaves
+    whole is already a single run along the other, so sweeping stops at the
+    first pass after the opening x pass that splits nothing.
+    """
+    n = len(boxes)
+    cols = boxes.T.astype(np.float64)
+    lab = np.zeros(n, dtype=np.intp)
+    brk = np.empty(n, dtype=bool)
+    brk[0] = False
+    groups = 1
+    for sweep, axis in enumerate((0, 1) * 3):
+        lo, hi = cols[axis], cols[axis + 2]
+        base = float(lo.min())
+        off = lab * (float(hi.max()) - base + 1.0)
+        off -= base
+        key = lo + off
+        # Tied starts may split either way only between boxes that share no
+        # area, which decay nothing, so an unstable sort is fine
+        order = key.argsort()
+        reach = np.maximum.accumulate((hi + off).take(order))
+        np.greater_equal(key.take(order[1:]), reach[:-1], out=brk[1:])
+        lab = np.empty(n, dtype=np.intp)
+        lab[order] = brk.cumsum()
+        found = int(lab[order[-1]]) + 1
+        if sweep and found == groups:
+            break
+        groups = found
+    return lab
+
+
+def soft_nms(
+    xyxy: np.ndarray,
+    scores: np.ndarray,
+    iou_thresh: float,
+    classes: Optional[np.ndarray] = None,
+    sigma: float = 0.5,
+    score_thresh: float = 0.001,
+    method: str = "gaussian",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Soft-NMS: overlapping boxes have their scores decayed instead of being dropped.
+
+    ``gaussian`` multiplies by ``exp(-iou^2 / sigma)``; ``linear`` by ``1 - iou``
+    above ``iou_thresh``. Returns ``(kept_indices, decayed_scores)`` by descending
+    decayed score; boxes that fall below ``score_thresh`` are dropped.
+
+    A box only decays boxes it intersects, so separate clusters evolve
+    independently: each step keeps the best live box of every cluster at once
+    and decays the rest of each cluster in one vectorized pass. Steps scale
+    with the most boxes kept from one cluster rather than the total kept, and
+    the result matches keeping one box per step.
+    """
+    if len(xyxy) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+    s = np.asarray(scores, dtype=np.float32)
+    # Boxes under ``score_thresh`` can neither be kept nor decay anything
+    cand = np.flatnonzero(s >= score_thresh)
+    if not cand.size:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+    boxes = _offset_by_class(xyxy, classes).take(cand, axis=0)
+    idx, out = _soft_nms_clusters(boxes, s[cand], iou_thresh, sigma, score_thresh, method)
+    return cand[idx], out
+
+
+def _soft_nms_clusters(
+    boxes: np.ndarray,
+    s: np.ndarray,
+    iou_thresh: float,
+    sigma: float,
+    score_thresh: float,
+    method: str,
+) -> Tuple[np.ndarray, np.ndarray]:
+    lab = _clusters(boxes)
+    # Live boxes grouped by cluster, by index within one; filtering keeps the layout.
+    # Their coordinates, areas and scores travel as the rows of one array, so each
+    # step gathers the picks and drops dead boxes with a single call
+    alive = np.argsort(lab, kind="stable")
+    lab = lab.take(alive)
+    x1, y1, x2, y2 = boxes.take(alive, axis=0).T
+    live_rows = np.stack([x1, y1, x2, y2, np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0), s.take(alive)])
+    keep: List[np.ndarray] = []
+    kept_scores: List[np.ndarray] = []
+    while alive.size:
+        first = _run_starts(lab)
+        grp = first.cumsum()
+        grp -= 1
+        sa = live_rows[5]
+        best = np.maximum.reduceat(sa, np.flatnonzero(first))
+        # Each cluster's best live box; ties go to the lowest index, as in the loop
+        hit = np.flatnonzero(sa == best.take(grp))
+        picks = hit[_run_starts(lab.take(hit))]
+        keep.append(alive.take(picks))
+        kept_scores.append(sa.take(picks))
+        # Every live box is decayed by its own cluster's pick
+        px1, py1, px2, py2, parea = live_rows[:5].take(picks.take(grp), axis=1)
+        iw = np.minimum(px2, live_rows[2])
+        iw -= np.maximum(px1, live_rows[0])
+        ih = np.minimum(py2, live_rows[3])
+        ih -= np.maximum(py1, live_rows[1])
+        inter = np.maximum(iw, 0)
+        inter *= np.maximum(ih, 0)
+        parea += live_rows[4]
+        parea -= inter
+        iou = inter / np.maximum(parea, 1e-9)
+        sa *= _decay(iou, iou_thresh, sigma, method)
+        live = sa >= score_thresh
+        live[picks] = False
+        alive, lab, live_rows = alive[live], lab[live], live_rows[:, live]
+    idx = np.concatenate(keep)
+    out = np.concatenate(kept_scores)
+    # Scores only decay, so the loop keeps boxes by descending score, lowest index first
+    order = np.lexsort((idx, -out))
+    return idx[order].astype(np.intp), out[order].astype(np.float32)
+
+
+def select(
+    xyxy: np.ndarray,
+    scores: np.ndarray,
+    classes: np.ndarray,
+    names: Sequence[str] = (),
+    conf_thresh: float = 0.0,
+    nms_iou: Optional[float] = None,
+    class_include: Optional[Sequence[str]] = None,
+    soft: bool = False,
+    soft_sigma: float = 0.5,
+    max_det: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Threshold, class-filter and NMS in one go: ``(indices, scores)`` of the survivors.
+
+    Masks are applied before NMS so it only ever sees candidates that could
+    survive; ``scores`` differ from the input only under soft-NMS.
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    mask = score_mask(scores, conf_thresh)
+    if class_include:
+        mask &= class_mask(classes, names, class_include)
+    idx = np.flatnonzero(mask)
+    xyxy = np.asarray(xyxy, dtype=np.float32)
+    classes = np.asarray(classes, dtype=np.intp)
+    if nms_iou is not None and nms_iou < 1.0 and idx.size > 1:
+        if soft:
+            k, out_scores = soft_nms(
+                xyxy[idx], scores[idx], nms_iou, classes[idx], sigma=soft_sigma, score_thresh=max(conf_thresh, 1e-3)
+            )
+            idx = idx[k]
+        else:
+            idx = idx[nms(xyxy[idx], scores[idx], nms_iou, classes[idx])]
+            out_scores = scores[idx]
+    else:
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        out_scores = scores[idx]
+    if max_det is not None:
+        idx, out_scores = idx[:max_det], out_scores[:max_det]
+    return idx, out_scores
+
+
+class BoxFilter:
+    """The profile's confidence threshold, NMS and class filter, applied to a frame's detections.
+
+    Runs after boxes are mapped back to source coordinates and before tracking
+    and rendering, so neither sees suppressed boxes. ``overlay_opts`` may
+    override ``conf_thresh``/``confidence_thresh``, ``nms_iou``, ``class_include``
+    and ``soft_nms`` per request.
+    """
+
+    def __init__(
+        self,
+        conf_thresh: float = 0.0,
+        nms_iou: Optional[float] = None,
+        class_include: Optional[Sequence[str]] = None,
+        soft: bool = False,
+        soft_sigma: float = 0.5,
+        max_det: Optional[int] = None,
+    ) -> None:
+        self.conf_thresh = float(conf_thresh)
+        self.nms_iou = None if nms_iou is None else float(nms_iou)
+        self.class_include = list(class_include) if class_include else None
+        self.soft = bool(soft)
+        self.soft_sigma = float(soft_sigma)
+        self.max_det = None if max_det is None else int(max_det)
+
+    @classmethod
+    def from_profile(cls, profile_cfg: Dict[str, Any], overlay_opts: Optional[Dict[str, Any]] = None) -> "BoxFilter":
+        opts = overlay_opts if isinstance(overlay_opts, dict) else {}
+        conf = opts.get("conf_thresh", opts.get("confidence_thresh", profile_cfg.get("confidence_thresh", 0.0)))
+        return cls(
+            conf_thresh=float(conf or 0.0),
+            nms_iou=opts.get("nms_iou", profile_cfg.get("nms_iou")),
+            class_include=opts.get("class_include"),
+            soft=bool(opts.get("soft_nms", profile_cfg.get("soft_nms", False))),
+            soft_sigma=float(profile_cfg.get("soft_nms_sigma", 0.5)),
+            max_det=profile_cfg.get("max_det"),
+        )
+
+    def _select(self, batch: DetectionBatch) -> Tuple[np.ndarray, np.ndarray]:
+        return select(
+            batch.xyxy, batch.scores, batch.classes, batch.names,
+            conf_thresh=self.conf_thresh, nms_iou=self.nms_iou, class_include=self.class_include,
+            soft=self.soft, soft_sigma=self.soft_sigma, max_det=self.max_det,
+        )
+
+    def apply(self, dets: Any) -> Any:
+        """Surviving detections, highest score first.
+
+        A ``DetectionBatch`` is filtered on its arrays and comes back as a batch;
+        lists of ``Detection`` objects or box dicts come back as lists.
+        """
+        if isinstance(dets, DetectionBatch):
+            idx, out_scores = self._select(dets)
+            kept = dets[idx]
+            return kept.with_scores(out_scores) if self.soft else kept
+        if not dets:
+            return []
+        idx, out_scores = self._select(DetectionBatch.coerce(dets))
+        if not self.soft:
+            return [dets[i] for i in idx]
+        out: List[Any] = []
+        for i, s in zip(idx, out_scores):
+            d = dets[i]
+            out.append({**d, "score": float(s)} if isinstance(d, dict) else replace(d, score=float(s)))
+        return out
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.pipelines.frame_executor import FrameResults
+from app.providers.detection.batch import DetectionBatch
+from app.utils import masks
+from app.utils.frame import Frame, FrameLike, as_frame
+
+
+PAD_VALUE = 114
+DEFAULT_JPEG_QUALITY = 90
+
+
+@dataclass(frozen=True)
+class Letterbox:
+    """Geometry of a letterboxed frame: ``canvas = resize(src, scale) + padding``."""
+
+    src_w: int
+    src_h: int
+    dst_w: int
+    dst_h: int
+    scale: float = 1.0
+    pad_x: int = 0
+    pad_y: int = 0
+
+    @property
+    def identity(self) -> bool:
+        return self.scale == 1.0 and self.pad_x == 0 and self.pad_y == 0
+
+    def point_to_source(self, x: float, y: float) -> Tuple[float, float]:
+        sx = (float(x) - self.pad_x) / self.scale
+        sy = (float(y) - self.pad_y) / self.scale
+        return min(max(sx, 0.0), float(self.src_w)), min(max(sy, 0.0), float(self.src_h))
+
+    def box_to_source(self, x1: float, y1: float, x2: float, y2: float) -> Tuple[float, float, float, float]:
+        ax, ay = self.point_to_source(x1, y1)
+        bx, by = self.point_to_source(x2, y2)
+        return ax, ay, bx, by
+
+    def boxes_to_source(self, xyxy: np.ndarray) -> np.ndarray:
+        """Vectorized ``box_to_source`` over an ``(n, 4)`` array."""
+        out = (np.asarray(xyxy, dtype=np.float32) - np.array([self.pad_x, self.pad_y] * 2, dtype=np.float32)) / self.scale
+        return np.clip(out, 0.0, np.array([self.src_w, self.src_h] * 2, dtype=np.float32))
+
+    def mask_to_source(self, mask: np.ndarray) -> np.ndarray:
+        """Crop the padding off a canvas-sized mask and resize it to the source frame."""
+        h = int(round(self.src_h * self.scale))
+        w = int(round(self.src_w * self.scale))
+        crop = mask[self.pad_y:self.pad_y + h, self.pad_x:self.pad_x + w]
+        return cv2.resize(crop, (self.src_w, self.src_h), interpolation=cv2.INTER_NEAREST)
+
+
+def letterbox(img: np.ndarray, size: Optional[int]) -> Tuple[np.ndarray, Letterbox]:
+    """Downscale ``img`` to fit a ``size`` square, padding the remainder.
+
+    Frames already within ``size`` are passed through untouched; upscaling would
+    only add upload bytes.
+    """
+    h, w = img.shape[:2]
+    if not size or max(h, w) <= int(size):
+        return img, Letterbox(w, h, w, h)
+    size = int(size)
+    scale = size / float(max(h, w))
+    nw, nh = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_AREA)
+    pad_x, pad_y = (size - nw) // 2, (size - nh) // 2
+    canvas = np.full((size, size) + img.shape[2:], PAD_VALUE, dtype=img.dtype)
+    canvas[pad_y:pad_y + nh, pad_x:pad_x + nw] = resized
+    return canvas, Letterbox(w, h, size, size, scale, pad_x, pad_y)
+
+
+@dataclass
+class PreparedFrame:
+    frame: Frame  # what the providers receive; its encoded form is the upload
+    geometry: Letterbox
+
+    @property
+    def image_b64(self) -> str:
+        return self.frame.b64()
+
+    @property
+    def upload_bytes(self) -> int:
+        return len(self.frame.encoded())
+
+
+def prepare_frame(img: FrameLike, profile_cfg: Dict[str, Any]) -> PreparedFrame:
+    """Letterbox to the profile's ``input_size`` and JPEG-encode at its ``jpeg_quality``.
+
+    A frame that needs no letterboxing and arrived encoded is sent as received.
+    """
+    frame = as_frame(img)
+    pixels = frame.pixels
+    if pixels is None:
+        raise ValueError("frame does not decode to an image")
+    canvas, geometry = letterbox(pixels, profile_cfg.get("input_size"))
+    if geometry.identity and frame.source_bytes:
+        return PreparedFrame(frame, geometry)
+    quality = int(profile_cfg.get("jpeg_quality", DEFAULT_JPEG_QUALITY))
+    ok, buf = cv2.imencode(".jpg", canvas, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    if not ok:
+        raise ValueError("JPEG encode failed")
+    return PreparedFrame(Frame(pixels=canvas, encoded=buf.tobytes()), geometry)
+
+
+def _restore_mask(m: Any, geometry: Letterbox) -> Any:
+    """Normalize a provider mask and map it from the canvas to the source frame."""
+    m = masks.normalize(m, (geometry.dst_h, geometry.dst_w))
+    if geometry.identity or not isinstance(m, dict) or "size" not in m:
+        return m
+    src = [geometry.src_h, geometry.src_w]
+    if m.get("format") == "polygon":
+        # Vertices map like box corners; no pixels needed
+        offset = np.array([geometry.pad_x, geometry.pad_y], dtype=np.float64)
+        polys = [
+            ((np.asarray(p, dtype=np.float64).reshape(-1, 2) - offset) / geometry.scale).reshape(-1).tolist()
+            for p in m["polygons"]
+        ]
+        return {**m, "size": src, "polygons": polys}
+    dense = masks.decode(m)
+    if dense is None or dense.shape != (geometry.dst_h, geometry.dst_w):
+        return m
+    return {**m, **masks.encode_rle(geometry.mask_to_source(dense))}
+
+
+def restore_results(results: FrameResults, geometry: Letterbox) -> FrameResults:
+    """Map boxes, masks and OCR boxes from canvas back to source coordinates.
+
+    Masks are normalized to compact RLE/polygon dicts with an explicit ``size``
+    (see ``app.utils.masks``), also when the geometry is the identity.
+
+    Provider results may be shared with the inference cache, so new objects are
+    returned rather than mutating them in place.
+    """
+    if geometry.identity:
+        if not results.masks:
+            return results
+        return replace(results, masks=[_restore_mask(m, geometry) for m in results.masks])
+    boxes = DetectionBatch.coerce(results.boxes)
+    boxes = boxes.with_boxes(geometry.boxes_to_source(boxes.xyxy))
+    ocr: List[Any] = []
+    for it in results.ocr:
+        if isinstance(it, dict) and it.get("box") and len(it["box"]) == 4:
+            ocr.append({**it, "box": list(geometry.box_to_source(*it["box"]))})
+        else:
+            ocr.append(it)
+    masks = [_restore_mask(m, geometry) for m in results.masks]
+    return replace(results, boxes=boxes, masks=masks, ocr=ocr)
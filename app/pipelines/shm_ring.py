@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+
+class StaleSlot(RuntimeError):
+    """A slot handle outlived its frame: it was released and the slot reused."""
+
+
+@dataclass(frozen=True)
+class SlotRef:
+    """What travels between processes instead of pixels: a slot and its generation."""
+
+    slot: int
+    gen: int
+
+
+class FrameRing:
+    """Fixed-size ring of frame slots in one ``multiprocessing.shared_memory`` block.
+
+    The producer ``put``s a frame with the number of consumers that will read it
+    and passes the returned ``SlotRef`` through an ordinary queue; each consumer
+    reads ``view(ref)`` and calls ``release(ref)`` when done. A slot only returns
+    to the free pool when its reference count reaches zero, so a slow consumer
+    makes ``put`` wait (or time out, letting the caller drop the frame) instead
+    of having its pixels overwritten. Each reuse bumps the slot's generation, so
+    a handle used after release raises ``StaleSlot`` rather than reading another
+    frame.
+
+    Refcounts and generations live in the shared block next to the pixels and
+    are updated under a process-shared lock. The ring travels to worker processes
+    as a ``Process``/pool-initializer argument; pickling attaches to the same
+    block. The creating process owns it: ``close()`` there also unlinks.
+    """
+
+    def __init__(self, slots: int, shape: Tuple[int, ...], dtype: Any = np.uint8, ctx: Any = None) -> None:
+        ctx = ctx or mp.get_context("spawn")
+        self.slots = int(slots)
+        self.shape = tuple(int(d) for d in shape)
+        self.dtype = np.dtype(dtype)
+        self._lock = ctx.Lock()
+        self._free = ctx.Semaphore(self.slots)
+        size = self._header_bytes() + self.slots * self._frame_bytes()
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._owner = True
+        self._cursor = 0
+        self._map()
+        self._refs[:] = 0
+        self._gens[:] = 0
+
+    def _frame_bytes(self) -> int:
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def _header_bytes(self) -> int:
+        # refcount + generation per slot, padded to a cache line
+        return -(-16 * self.slots // 64) * 64
+
+    def _map(self) -> None:
+        buf = self._shm.buf
+        self._refs = np.ndarray((self.slots,), dtype=np.int64, buffer=buf, offset=0)
+        self._gens = np.ndarray((self.slots,), dtype=np.int64, buffer=buf, offset=8 * self.slots)
+        self._data = np.ndarray((self.slots,) + self.shape, dtype=self.dtype, buffer=buf, offset=self._header_bytes())
+
+    def __getstate__(self) -> dict:
+        return {
+            "name": self._shm.name, "slots": self.slots, "shape": self.shape, "dtype": self.dtype.str,
+            "lock": self._lock, "free": self._free,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.slots, self.shape, self.dtype = state["slots"], tuple(state["shape"]), np.dtype(state["dtype"])
+        self._lock, self._free = state["lock"], state["free"]
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._cursor = 0
+        self._map()
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def acquire(self, refs: int = 1, timeout: Optional[float] = None) -> SlotRef:
+        """Claim a free slot for writing, held by ``refs`` readers.
+
+        Blocks while every slot is still referenced; raises ``TimeoutError`` after
+        ``timeout`` seconds.
+        """
+        if refs < 1:
+            raise ValueError("a slot needs at least one reference")
+        if not self._free.acquire(timeout=timeout):
+            raise TimeoutError(f"no free frame slot after {timeout}s")
+        with self._lock:
+            # The semaphore guarantees a zero-ref slot; scan from the cursor so
+            # slots are reused round-robin rather than always slot 0
+            for k in range(self.slots):
+                slot = (self._cursor + k) % self.slots
+                if self._refs[slot] == 0:
+                    break
+            self._cursor = slot + 1
+            self._refs[slot] = refs
+            self._gens[slot] += 1
+            return SlotRef(slot, int(self._gens[slot]))
+
+    def put(self, frame: np.ndarray, refs: int = 1, timeout: Optional[float] = None) -> SlotRef:
+        """Copy ``frame`` into a free slot; the one copy a frame makes."""
+        ref = self.acquire(refs=refs, timeout=timeout)
+        try:
+            self._data[ref.slot] = frame
+        except Exception:
+            self._drop(ref, refs)
+            raise
+        return ref
+
+    def _check(self, ref: SlotRef) -> None:
+        if self._gens[ref.slot] != ref.gen or self._refs[ref.slot] <= 0:
+            raise StaleSlot(f"slot {ref.slot} generation {ref.gen} was released")
+
+    def view(self, ref: SlotRef) -> np.ndarray:
+        """Zero-copy view of a slot; valid until this holder calls ``release``."""
+        self._check(ref)
+        return self._data[ref.slot]
+
+    def retain(self, ref: SlotRef, n: int = 1) -> None:
+        """Add ``n`` readers, e.g. before fanning a frame out to more workers."""
+        with self._lock:
+            self._check(ref)
+            self._refs[ref.slot] += n
+
+    def release(self, ref: SlotRef) -> None:
+        self._drop(ref, 1)
+
+    def _drop(self, ref: SlotRef, n: int) -> None:
+        with self._lock:
+            self._check(ref)
+            self._refs[ref.slot] -= n
+            freed = self._refs[ref.slot] <= 0
+            if freed:
+                self._refs[ref.slot] = 0
+        if freed:
+            self._free.release()
+
+    def in_use(self) -> int:
+        with self._lock:
+            return int(np.count_nonzero(self._refs))
+
+    def close(self) -> None:
+        # Views into the block must be dropped before it can be closed
+        self._refs = self._gens = self._data = None  # type: ignore[assignment]
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> "FrameRing":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from app.services.metrics import get_metrics_registry
+
+
+@dataclass
+class Envelope:
+    """One frame travelling through the pipeline."""
+
+    seq: int
+    value: Any = None
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    dropped: bool = False
+
+
+@dataclass
+class _End:
+    total: int
+
+
+@dataclass
+class Stage:
+    """A pipeline step.
+
+    ``fn`` maps the previous stage's value to this stage's value and may be sync
+    (run on the stage's own thread pool) or ``async`` (run as event-loop tasks).
+    ``workers`` bounds its parallelism; ``ordered`` stages see frames strictly in
+    source order, reassembled from upstream parallel stages.
+    """
+
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    ordered: bool = False
+    queue_size: int = 4
+
+
+class _Reorder:
+    """Releases envelopes to ``put`` in ``seq`` order."""
+
+    def __init__(self, put: Callable[[Any], Awaitable[None]]) -> None:
+        self._put = put
+        self._heap: List[tuple] = []
+        self._next = 0
+        self._total: Optional[int] = None
+
+    async def push(self, item: Any) -> None:
+        if isinstance(item, _End):
+            self._total = item.total
+        else:
+            heapq.heappush(self._heap, (item.seq, id(item), item))
+        while self._heap and self._heap[0][0] == self._next:
+            await self._put(heapq.heappop(self._heap)[2])
+            self._next += 1
+        if self._total is not None and self._next >= self._total:
+            await self._put(_End(self._total))
+            self._total = None
+
+
+class _StageRunner:
+    def __init__(self, stage: Stage) -> None:
+        self.stage = stage
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, stage.queue_size))
+        self.is_async = inspect.iscoroutinefunction(stage.fn)
+        self.pool = None if self.is_async else ThreadPoolExecutor(
+            max_workers=max(1, stage.workers), thread_name_prefix=f"stage-{stage.name}"
+        )
+        self.busy_s = 0.0
+        self.started = time.perf_counter()
+        m = get_metrics_registry()
+        self._depth = m.stage_queue_depth.labels(stage=stage.name)
+        self._util = m.stage_utilization.labels(stage=stage.name)
+
+    def observe(self) -> None:
+        self._depth.set(self.queue.qsize())
+        wall = (time.perf_counter() - self.started) * max(1, self.stage.workers)
+        self._util.set(min(1.0, self.busy_s / wall) if wall > 0 else 0.0)
+
+    async def call(self, value: Any) -> Any:
+        if self.is_async:
+            return await self.stage.fn(value)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, self.stage.fn, value)
+
+
+class StagedPipeline:
+    """Run ``source`` frames through ``stages`` concurrently, connected by bounded queues.
+
+    The source is pulled on its own thread and every stage runs in parallel with
+    the others, so decoding, encoding, provider calls and delivery overlap. A
+    full queue blocks the stage feeding it, which propagates backpressure up to
+    the source. A stage that raises marks the frame dropped; later stages skip it
+    but ordering is preserved. Per-stage queue depth and utilization are
+    exported as ``pipeline_queue_depth`` and ``pipeline_stage_utilization``.
+    """
+
+    def __init__(self, source: Iterator[Any], stages: List[Stage], source_name: str = "decode") -> None:
+        self.source = source
+        self.stages = stages
+        self.source_name = source_name
+        self.frames_in = 0
+        self.frames_out = 0
+        self._stopped = False
+
+    def stop(self) -> None:
+        """Stop pulling new frames; frames already in flight still drain."""
+        self._stopped = True
+
+    async def _pump_source(self, feed: Callable[[Any], Awaitable[None]]) -> None:
+        loop = asyncio.get_running_loop()
+        _done = object()
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"stage-{self.source_name}")
+        m = get_metrics_registry()
+        util = m.stage_utilization.labels(stage=self.source_name)
+        started, busy = time.perf_counter(), 0.0
+        try:
+            seq = 0
+            while not self._stopped:
+                t0 = time.perf_counter()
+                value = await loop.run_in_executor(pool, next, self.source, _done)
+                dt = time.perf_counter() - t0
+                if value is _done:
+                    break
+                busy += dt
+                env = Envelope(seq, value, timings_ms={self.source_name: dt * 1000.0})
+                await feed(env)
+                seq += 1
+                self.frames_in = seq
+                util.set(min(1.0, busy / max(time.perf_counter() - started, 1e-9)))
+            await feed(_End(seq))
+        finally:
+            pool.shutdown(wait=False)
+
+    async def _work(self, runner: _StageRunner, feed: Callable[[Any], Awaitable[None]], live: List[int]) -> None:
+        name = runner.stage.name
+        while True:
+            item = await runner.queue.get()
+            runner.observe()
+            if isinstance(item, _End):
+                live[0] -= 1
+                if live[0] == 0:
+                    await feed(item)
+                else:
+                    # Let sibling workers see the end marker too
+                    runner.queue.put_nowait(item)
+                return
+            if not item.dropped:
+                t0 = time.perf_counter()
+                try:
+                    item.value = await runner.call(item.value)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    item.dropped = True
+                    item.errors.append(f"{name}: {type(e).__name__}: {e}")
+                finally:
+                    dt = time.perf_counter() - t0
+                    runner.busy_s += dt
+                    item.timings_ms[name] = dt * 1000.0
+            await feed(item)
+            runner.observe()
+
+    async def run(self, sink: Callable[[Envelope], Awaitable[None]]) -> None:
+        """Drive the pipeline to completion, calling ``sink`` with finished frames in order."""
+        runners = [_StageRunner(s) for s in self.stages]
+        delivered = _Reorder(self._deliver(sink))
+        feeds: List[Callable[[Any], Awaitable[None]]] = []
+        for runner in runners:
+            feeds.append(_Reorder(runner.queue.put).push if runner.stage.ordered else runner.queue.put)
+        feeds.append(delivered.push)
+        tasks = [asyncio.ensure_future(self._pump_source(feeds[0]))]
+        for i, runner in enumerate(runners):
+            live = [max(1, runner.stage.workers)]
+            tasks.extend(asyncio.ensure_future(self._work(runner, feeds[i + 1], live)) for _ in range(live[0]))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self._stopped = True
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for runner in runners:
+                if runner.pool is not None:
+                    runner.pool.shutdown(wait=False)
+
+    def _deliver(self, sink: Callable[[Envelope], Awaitable[None]]) -> Callable[[Any], Awaitable[None]]:
+        async def put(item: Any) -> None:
+            if isinstance(item, _End) or item.dropped:
+                return
+            await sink(item)
+            self.frames_out += 1
+
+        return put
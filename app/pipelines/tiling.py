@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.pipelines.frame_executor import FrameResults
+from app.pipelines.postprocess import nms
+from app.pipelines.preprocess import DEFAULT_JPEG_QUALITY, PreparedFrame, prepare_frame, restore_results
+from app.providers.base import ainfer
+from app.providers.detection.batch import DetectionBatch
+from app.services.metrics import get_metrics_registry
+from app.utils.frame import FrameLike, as_frame
+
+
+@dataclass(frozen=True)
+class Tile:
+    x: int
+    y: int
+    w: int
+    h: int
+
+
+def _starts(length: int, size: int, step: int) -> List[int]:
+    if length <= size:
+        return [0]
+    starts = list(range(0, length - size, step))
+    # Last tile flush with the edge rather than hanging off it
+    starts.append(length - size)
+    return starts
+
+
+def tile_grid(width: int, height: int, size: int, overlap: float) -> List[Tile]:
+    """Overlapping ``size`` squares covering a ``width`` x ``height`` frame, row-major."""
+    size = max(1, int(size))
+    step = max(1, int(round(size * (1.0 - float(overlap)))))
+    return [
+        Tile(x, y, min(size, width), min(size, height))
+        for y in _starts(height, size, step)
+        for x in _starts(width, size, step)
+    ]
+
+
+@dataclass
+class TileJob:
+    tile: Optional[Tile]  # None: the whole frame at the profile's input size
+    prepared: PreparedFrame
+
+
+def tiling_config(profile_cfg: Dict[str, Any]) -> Dict[str, Any]:
+    cfg = profile_cfg.get("tiling") or {}
+    return {
+        "enabled": bool(cfg.get("enabled", False)),
+        "tile_size": int(cfg.get("tile_size", 640)),
+        "overlap": float(cfg.get("overlap", 0.2)),
+        "full_frame": bool(cfg.get("full_frame", True)),
+    }
+
+
+def prepare_tiles(frame: FrameLike, profile_cfg: Dict[str, Any]) -> Optional[List[TileJob]]:
+    """Crop and encode the profile's tiles, or None when tiling is off or pointless.
+
+    Tiles are cut at source resolution, so small distant objects keep their
+    pixels; with ``full_frame`` the letterboxed whole frame is added so objects
+    larger than a tile are still seen in one piece.
+    """
+    cfg = tiling_config(profile_cfg)
+    if not cfg["enabled"]:
+        return None
+    frame = as_frame(frame)
+    pixels = frame.pixels
+    if pixels is None:
+        return None
+    h, w = pixels.shape[:2]
+    tiles = tile_grid(w, h, cfg["tile_size"], cfg["overlap"])
+    if len(tiles) < 2:
+        return None
+    tile_cfg = {"input_size": cfg["tile_size"], "jpeg_quality": profile_cfg.get("jpeg_quality", DEFAULT_JPEG_QUALITY)}
+    jobs = [
+        TileJob(t, prepare_frame(np.ascontiguousarray(pixels[t.y:t.y + t.h, t.x:t.x + t.w]), tile_cfg))
+        for t in tiles
+    ]
+    if cfg["full_frame"]:
+        jobs.append(TileJob(None, prepare_frame(frame, profile_cfg)))
+    return jobs
+
+
+def merge_detections(per_job: List[Tuple[TileJob, Any]], iou_thresh: float) -> DetectionBatch:
+    """Map each job's detections to frame coordinates and merge with class-aware NMS."""
+    parts: List[DetectionBatch] = []
+    for job, found in per_job:
+        batch = restore_results(FrameResults(boxes=DetectionBatch.coerce(found)), job.prepared.geometry).boxes
+        parts.append(batch.translate(job.tile.x, job.tile.y) if job.tile is not None else batch)
+    merged = DetectionBatch.concat(parts)
+    if len(merged) < 2:
+        return merged
+    return merged[nms(merged.xyxy, merged.scores, iou_thresh, merged.classes)]
+
+
+async def detect_tiles(detector: Any, jobs: List[TileJob], iou_thresh: float) -> Tuple[DetectionBatch, List[str], float]:
+    """Send every tile concurrently and merge; returns ``(detections, errors, tiles_ms)``.
+
+    The provider's resilience policy holds each call to its adaptive concurrency
+    limit, so a large grid queues there instead of flooding the provider.
+    Detections come back in source-frame coordinates.
+    """
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(ainfer(detector, j.prepared.frame) for j in jobs), return_exceptions=True)
+    errors: List[str] = []
+    ok: List[Tuple[TileJob, Any]] = []
+    for job, res in zip(jobs, results):
+        if isinstance(res, BaseException):
+            where = "full" if job.tile is None else f"{job.tile.x},{job.tile.y}"
+            errors.append(f"tile {where}: {type(res).__name__}: {res}")
+        else:
+            ok.append((job, res))
+    merged = merge_detections(ok, iou_thresh)
+    tiles_ms = (time.perf_counter() - t0) * 1000.0
+    get_metrics_registry().latency_tiles_ms.observe(tiles_ms)
+    return merged, errors, tiles_ms
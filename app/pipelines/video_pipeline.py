@@ -1,26 +1,98 @@
 from __future__ import annotations
 
-from typing import Generator, Optional
+from itertools import count
+from typing import Any, Dict, Generator, Iterable, Iterator, Optional, Sequence, Tuple
 
 import cv2
+import numpy as np
 
+from app.pipelines.parallel_decode import decode_parallel, read_indices
+from app.services.metrics import get_metrics_registry
+from app.utils.frame import Frame, FrameLike, pixels_of
 
-def frames_from_video(path: str, max_frames: Optional[int] = None) -> Generator[bytes, None, None]:
+
+def decode_frames(
+    path: str,
+    indices: Optional[Sequence[int]] = None,
+    stride: int = 1,
+    workers: int = 0,
+) -> Iterator[Tuple[int, Frame]]:
+    """``(index, Frame)`` pairs in order: every ``stride``-th frame, or just ``indices``.
+
+    ``workers > 0`` decodes seek-aligned segments in a process pool, handing
+    pixels back through a shared-memory ``FrameRing`` (see ``parallel_decode``),
+    for offline evaluation of long clips.
+    """
+    if workers > 0:
+        for idx, pixels in decode_parallel(path, indices=indices, stride=stride, workers=workers):
+            yield idx, Frame(pixels=pixels)
+        return
+    wanted: Iterable[int] = sorted(set(indices)) if indices is not None else count(0, max(1, int(stride)))
     cap = cv2.VideoCapture(path)
-    count = 0
     try:
-        while cap.isOpened():
-            ok, frame = cap.read()
-            if not ok:
-                break
-            ok, buf = cv2.imencode('.jpg', frame)
-            if not ok:
-                break
-            yield buf.tobytes()
-            count += 1
-            if max_frames is not None and count >= max_frames:
-                break
+        if cap.isOpened():
+            for idx, pixels in read_indices(cap, wanted):
+                yield idx, Frame(pixels=pixels)
     finally:
         cap.release()
 
 
+def frames_from_video(
+    path: str, max_frames: Optional[int] = None, stride: int = 1, workers: int = 0
+) -> Generator[Frame, None, None]:
+    """Decoded frames; JPEG/base64 forms are produced only if a consumer asks."""
+    for n, (_, frame) in enumerate(decode_frames(path, stride=stride, workers=workers), start=1):
+        yield frame
+        if max_frames is not None and n >= max_frames:
+            break
+
+
+class MotionGate:
+    """Skips provider calls for frames that barely differ from the last one sent.
+
+    Frames are shrunk to a ``size`` x ``size`` grayscale thumbnail and compared
+    with the thumbnail of the last frame that passed the gate by mean absolute
+    difference (0-255). Comparing against the last *sent* frame rather than the
+    previous one means slow drift still accumulates and eventually triggers a
+    call. ``threshold: 0`` disables gating.
+
+    Only frames about to be sent should be offered (keyframes, in a video
+    run): every frame that passes becomes the reference, so the reference is
+    always one the provider saw.
+    """
+
+    def __init__(self, threshold: float = 0.0, size: int = 32) -> None:
+        self.threshold = float(threshold)
+        self.size = max(4, int(size))
+        self.sent = 0
+        self.skipped = 0
+        self._ref: Optional[np.ndarray] = None
+        m = get_metrics_registry()
+        self._frames = m.gate_frames
+        self._ratio = m.gate_skip_ratio
+
+    @classmethod
+    def from_profile(cls, profile_cfg: Dict[str, Any]) -> "MotionGate":
+        cfg = profile_cfg.get("motion_gate") or {}
+        return cls(threshold=float(cfg.get("threshold", 0.0)), size=int(cfg.get("size", 32)))
+
+    def thumbnail(self, frame: FrameLike) -> np.ndarray:
+        small = cv2.resize(pixels_of(frame), (self.size, self.size), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def changed(self, frame: FrameLike) -> bool:
+        """True if ``frame`` should go to the provider; call once per candidate frame, in order."""
+        if self.threshold <= 0:
+            return True
+        thumb = self.thumbnail(frame)
+        changed = self._ref is None or float(np.abs(thumb - self._ref).mean()) >= self.threshold
+        if changed:
+            self._ref = thumb
+            self.sent += 1
+        else:
+            self.skipped += 1
+        self._frames.labels(result="sent" if changed else "skipped").inc()
+        self._ratio.set(self.skipped / (self.sent + self.skipped))
+        return changed
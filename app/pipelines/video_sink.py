@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from app.providers.detection.batch import DetectionBatch
+from app.services.metrics import get_metrics_registry
+from app.utils.viz import RenderSpec, render
+
+
+@dataclass
+class SinkItem:
+    pixels: np.ndarray
+    boxes: Any = field(default_factory=DetectionBatch)
+    tracks: List[Dict[str, Any]] = field(default_factory=list)
+    # Boxes from the other profile, for the A/B composite
+    ab_boxes: Optional[Any] = None
+
+
+def render_overlay(
+    pixels: np.ndarray,
+    boxes: Any,
+    tracks: List[Dict[str, Any]],
+    spec: Optional[RenderSpec] = None,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """``boxes`` is a ``DetectionBatch`` or a list of box dicts; drawn per ``spec``'s flags."""
+    spec = replace(spec or RenderSpec(), boxes=DetectionBatch.coerce(boxes), tracks=tracks)
+    return render(pixels, spec, out=out)
+
+
+def compose_ab(left: np.ndarray, right: np.ndarray, labels: tuple = ("A", "B"), out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Left half of ``left`` next to the right half of ``right``, like the UI's A/B slider.
+
+    ``out`` may be ``left`` or ``right`` itself, composing in place.
+    """
+    mid = left.shape[1] // 2
+    if out is None:
+        out = np.empty_like(left)
+    if out is not left:
+        out[:, :mid] = left[:, :mid]
+    if out is not right:
+        out[:, mid:] = right[:, mid:]
+    cv2.line(out, (mid, 0), (mid, out.shape[0] - 1), (255, 255, 255), 2)
+    for text, x in ((labels[0], 8), (labels[1], mid + 8)):
+        cv2.putText(out, text, (x, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2, cv2.LINE_AA)
+    return out
+
+
+class VideoSink:
+    """Renders overlays and encodes ``out.mp4`` on a background thread.
+
+    ``submit`` never blocks: when the bounded queue is full the frame is dropped
+    and counted, so a slow encoder costs output frames rather than inference
+    throughput. With ``ab_path`` the same pass also writes the A/B composite,
+    the primary profile's overlay on the left and ``ab_boxes`` on the right.
+    Writers open lazily on the first frame, sized to it.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        fps: float,
+        queue_size: int = 8,
+        ab_path: str | Path | None = None,
+        ab_labels: tuple = ("A", "B"),
+        fourcc: str = "mp4v",
+        render_spec: Optional[RenderSpec] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.ab_path = Path(ab_path) if ab_path else None
+        self.fps = float(fps) if fps and fps > 0 else 25.0
+        self.ab_labels = ab_labels
+        self.render_spec = render_spec or RenderSpec()
+        # Overlays are drawn into these reused buffers; the writer copies on write
+        self._buf: Optional[np.ndarray] = None
+        self._ab_buf: Optional[np.ndarray] = None
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.written = 0
+        self.dropped = 0
+        self.encode_s = 0.0
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._writers: Dict[Path, cv2.VideoWriter] = {}
+        self._size: Optional[tuple] = None
+        m = get_metrics_registry()
+        self._frames = m.sink_frames
+        self._fps_gauge = m.sink_encode_fps
+        self._thread = threading.Thread(target=self._run, name="video-sink", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: SinkItem) -> bool:
+        try:
+            self._q.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            self._frames.labels(result="dropped").inc()
+            return False
+
+    def _writer(self, path: Path) -> cv2.VideoWriter:
+        w = self._writers.get(path)
+        if w is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            w = self._writers[path] = cv2.VideoWriter(str(path), self.fourcc, self.fps, self._size)
+        return w
+
+    def _write(self, item: SinkItem) -> None:
+        h, w = item.pixels.shape[:2]
+        if self._size is None:
+            self._size = (w, h)
+        pixels = item.pixels if (w, h) == self._size else cv2.resize(item.pixels, self._size)
+        if self._buf is None:
+            self._buf = np.empty_like(pixels)
+        main = render_overlay(pixels, item.boxes, item.tracks, self.render_spec, out=self._buf)
+        self._writer(self.path).write(main)
+        if self.ab_path is not None and item.ab_boxes is not None:
+            if self._ab_buf is None:
+                self._ab_buf = np.empty_like(pixels)
+            other = render_overlay(pixels, item.ab_boxes, [], self.render_spec, out=self._ab_buf)
+            self._writer(self.ab_path).write(compose_ab(main, other, self.ab_labels, out=other))
+
+    def _run(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                self._write(item)
+            except Exception:
+                self.dropped += 1
+                self._frames.labels(result="dropped").inc()
+                continue
+            finally:
+                self.encode_s += time.perf_counter() - t0
+            self.written += 1
+            self._frames.labels(result="written").inc()
+            self._fps_gauge.set(self.encode_fps)
+
+    @property
+    def encode_fps(self) -> float:
+        return self.written / self.encode_s if self.encode_s > 0 else 0.0
+
+    def close(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Flush queued frames, finalise the files and return the sink's stats."""
+        self._q.put(None)
+        self._thread.join(timeout)
+        for w in self._writers.values():
+            w.release()
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "ab_path": str(self.ab_path) if self.ab_path and self.ab_path in self._writers else None,
+            "frames_written": self.written,
+            "frames_dropped": self.dropped,
+            "encode_fps": round(self.encode_fps, 2),
+        }
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from app.utils.frame import ImageInput, as_b64
+
+
+async def ainfer(adapter: Any, image: ImageInput) -> Any:
+    """Await an adapter's native ``ainfer`` or run its blocking ``infer`` on the thread pool.
+
+    ``image`` may be a ``Frame``; adapters receive its cached base64 wire form.
+    """
+    image_b64 = as_b64(image)
+    native = getattr(adapter, "ainfer", None)
+    if native is not None:
+        return await native(image_b64)
+    return await asyncio.to_thread(adapter.infer, image_b64)
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.providers.base import ainfer
+from app.providers.detection.batch import DetectionBatch
+from app.services.metrics import get_metrics_registry
+from app.utils.config import load_providers_config
+
+
+# Bumped when what a key may map to changes; v2 stopped storing results of
+# adapters without credentials, so v1 entries may hold those empty answers
+_KEY_VERSION = "v2"
+
+
+def cache_key(image_b64: str, provider: str, model: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Content address for one provider call.
+
+    The digest covers the encoded image payload (base64 is a bijection of the image
+    bytes, so hashing it avoids a decode) plus provider, model/version and the
+    profile thresholds that shape the result.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(_KEY_VERSION.encode("ascii"))
+    h.update(b"\0")
+    h.update(image_b64.encode("ascii", errors="ignore"))
+    h.update(b"\0")
+    h.update(json.dumps([provider, model, params or {}], sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+_MISS = object()
+
+
+def _dumps(value: Any) -> bytes:
+    # Disk entries are JSON: a ``DetectionBatch`` as its arrays, anything else as
+    # itself. Values JSON cannot hold raise and stay in the memory tier only
+    if isinstance(value, DetectionBatch):
+        doc = {
+            "kind": "batch",
+            "xyxy": value.xyxy.tolist(),
+            "scores": value.scores.tolist(),
+            "classes": value.classes.tolist(),
+            "names": list(value.names),
+        }
+    else:
+        doc = {"kind": "json", "value": value}
+    return json.dumps(doc, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    # Entries are untrusted input: anything but the two shapes ``_dumps`` writes raises
+    doc = json.loads(data)
+    kind = doc.get("kind") if isinstance(doc, dict) else None
+    if kind == "json":
+        return doc["value"]
+    if kind == "batch":
+        names = doc["names"]
+        if not all(isinstance(n, str) for n in names):
+            raise ValueError("class names must be strings")
+        batch = DetectionBatch(doc["xyxy"], doc["scores"], doc["classes"], names)
+        if len(batch.xyxy) and not 0 <= int(batch.classes.min()) <= int(batch.classes.max()) < len(batch.names):
+            raise ValueError("class index out of range")
+        return batch
+    raise ValueError(f"unknown cache entry kind: {kind!r}")
+
+
+class InferenceCache:
+    """Two-tier result cache: bounded in-memory LRU in front of a size-capped disk store.
+
+    Disk entries are JSON (``DetectionBatch`` results as their arrays) and are
+    validated on read, so a tampered or corrupt file is a miss and is deleted,
+    never executed. ``aget``/``aput`` keep memory hits on the event loop and
+    move disk reads and writes to a worker thread.
+    """
+
+    def __init__(
+        self,
+        memory_items: int = 256,
+        disk_dir: str | os.PathLike | None = None,
+        disk_max_bytes: int = 512 * 1024 * 1024,
+    ) -> None:
+        self.memory_items = int(memory_items)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = int(disk_max_bytes)
+        self._mem: "OrderedDict[str, Any]" = OrderedDict()
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = get_metrics_registry()
+        if self.disk_dir is not None:
+            self._load_disk_index()
+
+    def _path(self, key: str) -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _load_disk_index(self) -> None:
+        assert self.disk_dir is not None
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        # Entries from the pickle format are deleted unread
+        for p in self.disk_dir.glob("*/*.pkl"):
+            try:
+                p.unlink()
+            except OSError:
+                pass
+        entries = []
+        for p in self.disk_dir.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, p.stem, st.st_size))
+        # Oldest access first so eviction pops from the front
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._metrics.cache_disk_bytes.set(self._disk_bytes)
+
+    def get(self, key: str) -> Any:
+        """Return the cached value or the module-level ``_MISS`` sentinel."""
+        value, on_disk = self._get_memory(key)
+        if on_disk:
+            value = self._get_disk(key)
+        if value is _MISS:
+            self._metrics.cache_misses.inc()
+        return value
+
+    async def aget(self, key: str) -> Any:
+        """``get`` from a coroutine: the disk tier is read in a worker thread."""
+        value, on_disk = self._get_memory(key)
+        if on_disk:
+            value = await asyncio.to_thread(self._get_disk, key)
+        if value is _MISS:
+            self._metrics.cache_misses.inc()
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._put_memory(key, value)
+        if self.disk_dir is not None:
+            self._write_disk(key, value)
+
+    async def aput(self, key: str, value: Any) -> None:
+        """``put`` from a coroutine: the disk tier is written in a worker thread."""
+        with self._lock:
+            self._put_memory(key, value)
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._write_disk, key, value)
+
+    def _get_memory(self, key: str) -> Tuple[Any, bool]:
+        # The memory hit (or ``_MISS``) and whether the disk tier should be tried
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                self._metrics.cache_hits.labels(tier="memory").inc()
+                return self._mem[key], False
+            return _MISS, key in self._disk
+
+    def _get_disk(self, key: str) -> Any:
+        value = self._read_disk(key)
+        if value is not _MISS:
+            self._metrics.cache_hits.labels(tier="disk").inc()
+            with self._lock:
+                self._put_memory(key, value)
+        return value
+
+    def _put_memory(self, key: str, value: Any) -> None:
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.memory_items:
+            self._mem.popitem(last=False)
+            self._metrics.cache_evictions.labels(tier="memory").inc()
+
+    def _read_disk(self, key: str) -> Any:
+        path = self._path(key)
+        try:
+            value = _loads(path.read_bytes())
+            os.utime(path)
+        except Exception:
+            self._drop_disk(key)
+            return _MISS
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+        return value
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        try:
+            data = _dumps(value)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except Exception:
+            return
+        evict: list[str] = []
+        with self._lock:
+            self._disk_bytes += len(data) - self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            while self._disk_bytes > self.disk_max_bytes and len(self._disk) > 1:
+                old, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evict.append(old)
+            self._metrics.cache_disk_bytes.set(self._disk_bytes)
+        for old in evict:
+            try:
+                self._path(old).unlink()
+            except OSError:
+                pass
+            self._metrics.cache_evictions.labels(tier="disk").inc()
+
+    def _drop_disk(self, key: str) -> None:
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            keys = list(self._disk)
+            self._disk.clear()
+            self._disk_bytes = 0
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+
+class CachedProvider:
+    """Wraps an adapter so identical (image, provider, model, thresholds) calls hit the cache.
+
+    Failed calls raise and are never stored, and an adapter that is not ``ready``
+    (missing token or endpoint) bypasses the cache: its empty "not configured"
+    result must not outlive the credentials arriving. A hedged call answered by
+    the fallback provider is returned but not stored, since the key names the
+    primary's provider and model. Anything stored is a real answer.
+    """
+
+    def __init__(
+        self,
+        adapter: Any,
+        cache: InferenceCache,
+        provider: str,
+        model: str,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.adapter = adapter
+        self.cache = cache
+        self.provider = provider
+        self.model = model
+        self.params = params or {}
+
+    def _key(self, image_b64: str) -> str:
+        return cache_key(image_b64, self.provider, self.model, self.params)
+
+    def _bypass(self) -> bool:
+        return not getattr(self.adapter, "ready", True)
+
+    def _fetch(self, image_b64: str) -> Tuple[Any, bool]:
+        # The adapter's answer and whether it came from the provider/model the key names
+        with_origin = getattr(self.adapter, "infer_with_origin", None)
+        if with_origin is None:
+            return self.adapter.infer(image_b64), True
+        value, origin = with_origin(image_b64)
+        return value, origin == "primary"
+
+    async def _afetch(self, image_b64: str) -> Tuple[Any, bool]:
+        with_origin = getattr(self.adapter, "ainfer_with_origin", None)
+        if with_origin is None:
+            return await ainfer(self.adapter, image_b64), True
+        value, origin = await with_origin(image_b64)
+        return value, origin == "primary"
+
+    def infer(self, image_b64: str) -> Any:
+        if self._bypass():
+            return self.adapter.infer(image_b64)
+        key = self._key(image_b64)
+        value = self.cache.get(key)
+        if value is not _MISS:
+            return value
+        value, own = self._fetch(image_b64)
+        if own:
+            self.cache.put(key, value)
+        return value
+
+    async def ainfer(self, image_b64: str) -> Any:
+        if self._bypass():
+            return await ainfer(self.adapter, image_b64)
+        key = self._key(image_b64)
+        value = await self.cache.aget(key)
+        if value is not _MISS:
+            return value
+        value, own = await self._afetch(image_b64)
+        if own:
+            await self.cache.aput(key, value)
+        return value
+
+
+_singleton: InferenceCache | None = None
+_singleton_lock = threading.Lock()
+
+
+def get_inference_cache() -> InferenceCache | None:
+    """Process-wide cache from the ``cache`` section of providers.yaml (None when disabled)."""
+    global _singleton
+    if _singleton is not None:
+        return _singleton
+    try:
+        cfg = load_providers_config().get("cache", {}) or {}
+    except Exception:
+        cfg = {}
+    if not cfg.get("enabled", True):
+        return None
+    with _singleton_lock:
+        if _singleton is None:
+            _singleton = InferenceCache(
+                memory_items=cfg.get("memory_items", 256),
+                disk_dir=cfg.get("disk_dir") or None,
+                disk_max_bytes=int(float(cfg.get("disk_max_mb", 512)) * 1024 * 1024),
+            )
+    return _singleton
+
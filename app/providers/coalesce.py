@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.providers.base import ainfer
+from app.providers.cache import cache_key
+from app.services.metrics import get_metrics_registry
+
+
+class SingleFlight:
+    """Collapse concurrent identical calls onto one in-flight execution.
+
+    The first caller for a key (the leader) runs the call; callers arriving while it
+    is in flight wait on the same ``concurrent.futures.Future``. Sync and async
+    callers share one table, so a thread and a coroutine asking for the same key
+    also merge.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                return fut, False
+            fut = Future()
+            self._inflight[key] = fut
+            return fut, True
+
+    def _settle(self, key: str, fut: Future, value: Any = None, exc: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(value)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run ``fn`` once per in-flight key; returns (value, shared)."""
+        fut, leader = self._join(key)
+        if not leader:
+            return fut.result(), True
+        try:
+            value = fn()
+        except BaseException as e:
+            self._settle(key, fut, exc=e)
+            raise
+        self._settle(key, fut, value)
+        return value, False
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async ``do``: the shared call runs as its own task so a cancelled caller
+        (e.g. a per-stage timeout) does not cancel it for the other waiters."""
+        fut, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(fn())
+            self._tasks.add(task)
+
+            def _done(t: asyncio.Task) -> None:
+                self._tasks.discard(t)
+                if t.cancelled():
+                    self._settle(key, fut, exc=asyncio.CancelledError())
+                elif t.exception() is not None:
+                    self._settle(key, fut, exc=t.exception())
+                else:
+                    self._settle(key, fut, t.result())
+
+            task.add_done_callback(_done)
+        value = await asyncio.shield(asyncio.wrap_future(fut))
+        return value, not leader
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+
+class CoalescingProvider:
+    """Wraps an adapter so identical concurrent requests share one remote call."""
+
+    def __init__(
+        self,
+        adapter: Any,
+        provider: str,
+        model: str,
+        params: Optional[Dict[str, Any]] = None,
+        flight: Optional[SingleFlight] = None,
+    ) -> None:
+        self.adapter = adapter
+        self.provider = provider
+        self.model = model
+        self.params = params or {}
+        self.flight = flight or SingleFlight()
+        self._merged = get_metrics_registry().calls_coalesced.labels(provider=provider)
+
+    def _key(self, image_b64: str) -> str:
+        return cache_key(image_b64, self.provider, self.model, self.params)
+
+    def infer(self, image_b64: str) -> Any:
+        value, shared = self.flight.do(self._key(image_b64), lambda: self.adapter.infer(image_b64))
+        if shared:
+            self._merged.inc()
+        return value
+
+    async def ainfer(self, image_b64: str) -> Any:
+        value, shared = await self.flight.ado(self._key(image_b64), lambda: ainfer(self.adapter, image_b64))
+        if shared:
+            self._merged.inc()
+        return value
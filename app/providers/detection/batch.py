@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+@dataclass
+class Detection:
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    score: float
+    cls: str
+
+
+class DetectionBatch:
+    """One frame's detections as arrays rather than per-box objects.
+
+    ``xyxy`` is ``(n, 4)`` float32, ``scores`` ``(n,)`` float32 and ``classes``
+    ``(n,)`` int32 indices into the ``names`` table. Providers return batches;
+    filtering, tracking, drawing and evaluation read the arrays directly and
+    ``to_dicts`` builds the JSON event shape at the API edge. Batches may be
+    shared through the inference cache and request coalescing, so every
+    operation returns a new batch instead of modifying arrays in place.
+    Iterating yields ``Detection`` objects for code that still wants them.
+    """
+
+    __slots__ = ("xyxy", "scores", "classes", "names")
+
+    def __init__(
+        self,
+        xyxy: Optional[np.ndarray] = None,
+        scores: Optional[np.ndarray] = None,
+        classes: Optional[np.ndarray] = None,
+        names: Sequence[str] = (),
+    ) -> None:
+        self.xyxy = np.zeros((0, 4), dtype=np.float32) if xyxy is None else np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        n = len(self.xyxy)
+        self.scores = np.ones(n, dtype=np.float32) if scores is None else np.asarray(scores, dtype=np.float32).reshape(n)
+        self.classes = np.zeros(n, dtype=np.int32) if classes is None else np.asarray(classes, dtype=np.int32).reshape(n)
+        self.names = tuple(names) if names else (("object",) if n else ())
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[float, float, float, float, float, str]]) -> "DetectionBatch":
+        """Build from ``(x1, y1, x2, y2, score, class_name)`` rows, as provider parsers produce."""
+        coords: List[Tuple[float, ...]] = []
+        labels: List[str] = []
+        for x1, y1, x2, y2, score, name in rows:
+            coords.append((x1, y1, x2, y2, score))
+            labels.append(name)
+        if not coords:
+            return cls()
+        arr = np.array(coords, dtype=np.float32)
+        names, classes = np.unique(labels, return_inverse=True)
+        return cls(arr[:, :4], arr[:, 4], classes, [str(n) for n in names])
+
+    @classmethod
+    def coerce(cls, dets: Any) -> "DetectionBatch":
+        """A batch from a batch, ``None``, or a list of ``Detection`` objects or box dicts."""
+        if isinstance(dets, DetectionBatch):
+            return dets
+        if not dets:
+            return cls()
+        return cls.from_rows(
+            (d["x1"], d["y1"], d["x2"], d["y2"], d.get("score", 1.0), str(d.get("cls", "object")))
+            if isinstance(d, dict)
+            else (d.x1, d.y1, d.x2, d.y2, d.score, str(d.cls))
+            for d in dets
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["DetectionBatch"]) -> "DetectionBatch":
+        """One batch from several, merging their class tables."""
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls()
+        if len(batches) == 1:
+            return batches[0]
+        index: Dict[str, int] = {}
+        classes = []
+        for b in batches:
+            remap = np.array([index.setdefault(n, len(index)) for n in b.names], dtype=np.int32)
+            classes.append(remap[b.classes])
+        return cls(
+            np.concatenate([b.xyxy for b in batches]),
+            np.concatenate([b.scores for b in batches]),
+            np.concatenate(classes),
+            list(index),
+        )
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[Detection]:
+        names = self.names
+        for (x1, y1, x2, y2), score, c in zip(self.xyxy.tolist(), self.scores.tolist(), self.classes.tolist()):
+            yield Detection(x1=x1, y1=y1, x2=x2, y2=y2, score=score, cls=names[c])
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray, Sequence[int]]) -> Any:
+        """``batch[i]`` is a ``Detection``; slices, index arrays and masks give a batch."""
+        if isinstance(index, (int, np.integer)):
+            (x1, y1, x2, y2), score, c = self.xyxy[index].tolist(), float(self.scores[index]), int(self.classes[index])
+            return Detection(x1=x1, y1=y1, x2=x2, y2=y2, score=score, cls=self.names[c])
+        return DetectionBatch(self.xyxy[index], self.scores[index], self.classes[index], self.names)
+
+    def __repr__(self) -> str:
+        return f"DetectionBatch(n={len(self)}, names={list(self.names)})"
+
+    @property
+    def labels(self) -> List[str]:
+        """Class name of every box."""
+        names = self.names
+        return [names[c] for c in self.classes.tolist()]
+
+    def with_boxes(self, xyxy: np.ndarray) -> "DetectionBatch":
+        return DetectionBatch(xyxy, self.scores, self.classes, self.names)
+
+    def with_scores(self, scores: np.ndarray) -> "DetectionBatch":
+        return DetectionBatch(self.xyxy, scores, self.classes, self.names)
+
+    def translate(self, dx: float, dy: float) -> "DetectionBatch":
+        return self.with_boxes(self.xyxy + np.array([dx, dy, dx, dy], dtype=np.float32))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """The JSON event shape: ``[{x1, y1, x2, y2, score, cls}, ...]``."""
+        names = self.names
+        return [
+            {"x1": x1, "y1": y1, "x2": x2, "y2": y2, "score": score, "cls": names[c]}
+            for (x1, y1, x2, y2), score, c in zip(self.xyxy.tolist(), self.scores.tolist(), self.classes.tolist())
+        ]
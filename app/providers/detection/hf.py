@@ -1,14 +1,60 @@
 from __future__ import annotations
 
-from typing import List
+import os
+from typing import Any, Dict, Tuple
+
+from app.providers.detection.batch import DetectionBatch
+from app.providers.resilience import get_policy
+from app.providers.transport import get_transport
 
 
 class HfDetector:
+    """Hugging Face Inference API object-detection client."""
+
+    url_base = "https://api-inference.huggingface.co/models/"
+    section = "detection"
+    policy = "detection.hf"
+
     def __init__(self, model_id: str) -> None:
         self.model_id = model_id
 
-    def infer(self, image_b64: str) -> List[dict]:
-        # Placeholder; integrate with HF Inference Endpoints
-        return []
+    @property
+    def token(self) -> str:
+        return os.getenv("HF_API_TOKEN", "")
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.token)
+
+    def _request(self, image_b64: str) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        headers = {"Authorization": f"Bearer {self.token}"}
+        return self.url_base + self.model_id, headers, {"inputs": image_b64}
+
+    @staticmethod
+    def _parse(data: Any) -> DetectionBatch:
+        rows = []
+        for o in data if isinstance(data, list) else []:
+            try:
+                box = o.get("box") or {}
+                rows.append((
+                    float(box.get("xmin", 0)), float(box.get("ymin", 0)),
+                    float(box.get("xmax", 0)), float(box.get("ymax", 0)),
+                    float(o.get("score", 0)), str(o.get("label", "object")),
+                ))
+            except Exception:
+                continue
+        return DetectionBatch.from_rows(rows)
 
+    def infer(self, image_b64: str) -> DetectionBatch:
+        if not self.token:
+            return DetectionBatch()
+        url, headers, payload = self._request(image_b64)
+        resp = get_policy(self.section, self.policy).call(lambda: get_transport().post(url, headers=headers, json=payload))
+        return self._parse(resp.json())
 
+    async def ainfer(self, image_b64: str) -> DetectionBatch:
+        if not self.token:
+            return DetectionBatch()
+        url, headers, payload = self._request(image_b64)
+        resp = await get_policy(self.section, self.policy).acall(lambda: get_transport().apost(url, headers=headers, json=payload))
+        return self._parse(resp.json())
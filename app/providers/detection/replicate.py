@@ -1,64 +1,61 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Dict, Tuple
 
-import requests
-
-
-@dataclass
-class Detection:
-    x1: float
-    y1: float
-    x2: float
-    y2: float
-    score: float
-    cls: str
+from app.providers.detection.batch import Detection, DetectionBatch  # noqa: F401  (Detection re-exported)
+from app.providers.resilience import get_policy
+from app.providers.transport import get_transport
 
 
 class ReplicateDetector:
     """Minimal client wrapper. Replace with official SDK if desired."""
 
+    url = "https://api.replicate.com/v1/predictions"
+    section = "detection"
+
     def __init__(self, model: str) -> None:
         self.model = model
-        self.token = os.getenv("REPLICATE_API_TOKEN", "")
 
-    def infer(self, image_b64: str) -> List[Detection]:
-        if not self.token:
-            return []
+    @property
+    def token(self) -> str:
+        # Read per call: adapters are memoised, so a token set later must be seen
+        return os.getenv("REPLICATE_API_TOKEN", "")
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.token)
+
+    def _request(self, image_b64: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
         headers = {"Authorization": f"Token {self.token}", "Content-Type": "application/json"}
-        url = "https://api.replicate.com/v1/predictions"
         version = self.model
         payload: Dict[str, Any] = {"version": version, "input": {"image": image_b64}}
-        # Simple retry with backoff
-        backoffs = [0.5, 1.0, 2.0]
-        last_exc: Exception | None = None
-        for delay in backoffs:
-            try:
-                resp = requests.post(url, headers=headers, json=payload, timeout=30)
-                if resp.status_code in (429, 500, 502, 503, 504):
-                    import time as _t
-                    _t.sleep(delay)
-                    continue
-                if not resp.ok:
-                    return []
-                data = resp.json()
-                outputs = data.get("output") or []
-                dets: List[Detection] = []
-                for o in outputs:
-                    try:
-                        x1 = float(o.get("x1", 0)); y1 = float(o.get("y1", 0))
-                        x2 = float(o.get("x2", 0)); y2 = float(o.get("y2", 0))
-                        score = float(o.get("score", 0)); cls = str(o.get("class", "object"))
-                        dets.append(Detection(x1=x1, y1=y1, x2=x2, y2=y2, score=score, cls=cls))
-                    except Exception:
-                        continue
-                return dets
-            except Exception as e:
-                last_exc = e
-                import time as _t
-                _t.sleep(delay)
-        return []
+        return headers, payload
 
+    @staticmethod
+    def _parse(data: Dict[str, Any]) -> DetectionBatch:
+        outputs = data.get("output") or []
+        rows = []
+        for o in outputs:
+            try:
+                x1 = float(o.get("x1", 0)); y1 = float(o.get("y1", 0))
+                x2 = float(o.get("x2", 0)); y2 = float(o.get("y2", 0))
+                score = float(o.get("score", 0)); cls = str(o.get("class", "object"))
+                rows.append((x1, y1, x2, y2, score, cls))
+            except Exception:
+                continue
+        return DetectionBatch.from_rows(rows)
+
+    def infer(self, image_b64: str) -> DetectionBatch:
+        if not self.token:
+            return DetectionBatch()
+        headers, payload = self._request(image_b64)
+        resp = get_policy(self.section).call(lambda: get_transport().post(self.url, headers=headers, json=payload))
+        return self._parse(resp.json())
 
+    async def ainfer(self, image_b64: str) -> DetectionBatch:
+        if not self.token:
+            return DetectionBatch()
+        headers, payload = self._request(image_b64)
+        resp = await get_policy(self.section).acall(lambda: get_transport().apost(self.url, headers=headers, json=payload))
+        return self._parse(resp.json())
@@ -1,15 +1,67 @@
 from __future__ import annotations
 
-from typing import List
+import os
+from typing import Any, Dict, Tuple
+
+from app.providers.detection.batch import DetectionBatch
+from app.providers.resilience import get_policy
+from app.providers.transport import get_transport
 
 
 class RoboflowDetector:
+    """Roboflow hosted inference client (``model`` is ``<project>/<version>``)."""
+
+    url_base = "https://detect.roboflow.com/"
+    section = "detection"
+    policy = "detection.roboflow"
+
     def __init__(self, model: str, api_key: str | None = None) -> None:
         self.model = model
-        self.api_key = api_key
+        self._api_key = api_key
+
+    @property
+    def api_key(self) -> str | None:
+        return self._api_key or os.getenv("ROBOFLOW_API_KEY")
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.api_key)
+
+    def _request(self, image_b64: str) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        return self.url_base + self.model, headers, {"api_key": self.api_key}
 
-    def infer(self, image_b64: str) -> List[dict]:
-        # Placeholder; integrate with Roboflow Inference API
-        return []
+    @staticmethod
+    def _parse(data: Any) -> DetectionBatch:
+        preds = data.get("predictions", []) if isinstance(data, dict) else []
+        rows = []
+        for o in preds:
+            try:
+                # Roboflow boxes are centre/size
+                cx, cy = float(o["x"]), float(o["y"])
+                w, h = float(o["width"]), float(o["height"])
+                rows.append((
+                    cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2,
+                    float(o.get("confidence", 0)), str(o.get("class", "object")),
+                ))
+            except Exception:
+                continue
+        return DetectionBatch.from_rows(rows)
 
+    def infer(self, image_b64: str) -> DetectionBatch:
+        if not self.api_key:
+            return DetectionBatch()
+        url, headers, params = self._request(image_b64)
+        resp = get_policy(self.section, self.policy).call(
+            lambda: get_transport().post(url, headers=headers, params=params, data=image_b64)
+        )
+        return self._parse(resp.json())
 
+    async def ainfer(self, image_b64: str) -> DetectionBatch:
+        if not self.api_key:
+            return DetectionBatch()
+        url, headers, params = self._request(image_b64)
+        resp = await get_policy(self.section, self.policy).acall(
+            lambda: get_transport().apost(url, headers=headers, params=params, content=image_b64)
+        )
+        return self._parse(resp.json())
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.providers.cache import CachedProvider, get_inference_cache
+from app.providers.coalesce import CoalescingProvider
+from app.providers.detection.hf import HfDetector
+from app.providers.detection.replicate import ReplicateDetector
+from app.providers.detection.roboflow import RoboflowDetector
+from app.providers.hedge import HedgedProvider
+from app.providers.ocr.replicate_paddleocr import ReplicatePaddleOcr
+from app.providers.segmentation.hf import HfSegmentation
+from app.utils.config import load_profile_config, load_providers_config
+
+
+# (adapter, provider name, model/version) for one providers.yaml section
+Built = Optional[Tuple[Any, str, str]]
+
+
+def _detector(cfg: Dict[str, Any]) -> Built:
+    provider = str(cfg.get("provider", "replicate"))
+    model = str(cfg.get("model", "ultralytics/yolov8"))
+    if provider == "replicate":
+        return ReplicateDetector(model), provider, model
+    if provider == "hf":
+        return HfDetector(model), provider, model
+    if provider == "roboflow":
+        return RoboflowDetector(model, api_key=os.getenv("ROBOFLOW_API_KEY")), provider, model
+    return None
+
+
+def _segmenter(cfg: Dict[str, Any]) -> Built:
+    provider = str(cfg.get("provider", "hf"))
+    model = str(cfg.get("model", "seg"))
+    if provider == "hf":
+        return HfSegmentation(model_id=model), provider, model
+    return None
+
+
+def _ocr(cfg: Dict[str, Any]) -> Built:
+    provider = str(cfg.get("provider", "gcv"))
+    version = str(cfg.get("version", ""))
+    if provider.startswith("replicate") and version:
+        return ReplicatePaddleOcr(version=version), provider, version
+    return None
+
+
+_BUILDERS: Dict[str, Callable[[Dict[str, Any]], Built]] = {
+    "detection": _detector,
+    "segmentation": _segmenter,
+    "ocr": _ocr,
+}
+
+
+def profile_params(profile: str) -> Dict[str, Any]:
+    """Profile thresholds that shape provider output and therefore the cache key."""
+    cfg = load_profile_config(profile)
+    return {k: cfg.get(k) for k in ("input_size", "confidence_thresh", "nms_iou")}
+
+
+def _hedged(kind: str, adapter: Any, provider: str, model: str, hedge_cfg: Dict[str, Any]) -> Any:
+    """Wrap ``adapter`` in a HedgedProvider; a fallback without credentials is skipped."""
+    fallback = None
+    fallback_cfg = hedge_cfg.get("fallback")
+    if fallback_cfg:
+        built = _BUILDERS[kind](fallback_cfg)
+        if built is not None and getattr(built[0], "ready", True):
+            fallback = built[0]
+    return HedgedProvider(
+        adapter,
+        provider,
+        model,
+        fallback=fallback,
+        budget_ratio=hedge_cfg.get("budget_ratio", 0.1),
+        quantile=hedge_cfg.get("quantile", 0.95),
+    )
+
+
+_instances: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def build_adapter(kind: str, cfg: Dict[str, Any], profile: str = "realtime") -> Any:
+    """Return the process-wide adapter stack for a providers.yaml section, or None.
+
+    Instances are memoised per (kind, section config, profile) so per-adapter state
+    such as the inference cache survives across requests and video frames.
+    """
+    key = json.dumps([kind, cfg, profile], sort_keys=True, default=str)
+    adapter = _instances.get(key)
+    if adapter is not None:
+        return adapter
+    with _lock:
+        adapter = _instances.get(key)
+        if adapter is not None:
+            return adapter
+        built = _BUILDERS[kind](cfg or {})
+        if built is None:
+            return None
+        adapter, provider, model = built
+        params = profile_params(profile)
+        # Hedging is innermost so its backup request is not folded into the primary by coalescing
+        hedge_cfg = (cfg or {}).get("hedge") or {}
+        if hedge_cfg.get("enabled"):
+            adapter = _hedged(kind, adapter, provider, model, hedge_cfg)
+        cache = get_inference_cache()
+        if cache is not None:
+            adapter = CachedProvider(adapter, cache, provider, model, params)
+        # Coalescing sits outside the cache so waiters on an in-flight call skip the lookup
+        if (load_providers_config().get("coalesce") or {}).get("enabled", True):
+            adapter = CoalescingProvider(adapter, provider, model, params)
+        _instances[key] = adapter
+    return adapter
+
+
+def get_detector(cfg: Dict[str, Any], profile: str = "realtime") -> Any:
+    return build_adapter("detection", cfg, profile)
+
+
+def get_segmenter(cfg: Dict[str, Any], profile: str = "realtime") -> Any:
+    return build_adapter("segmentation", cfg, profile)
+
+
+def get_ocr(cfg: Dict[str, Any], profile: str = "realtime") -> Any:
+    return build_adapter("ocr", cfg, profile)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Optional, Tuple
+
+from app.providers.base import ainfer
+from app.services.metrics import get_metrics_registry
+
+
+class LatencyWindow:
+    """Rolling window of successful call latencies for one provider/model."""
+
+    def __init__(self, size: int = 256, min_samples: int = 20) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+        self.min_samples = int(min_samples)
+        self._lock = threading.Lock()
+
+    def observe(self, ms: float) -> None:
+        with self._lock:
+            self._samples.append(ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[idx]
+
+
+class HedgeBudget:
+    """Allows at most ``ratio`` hedges per primary call (ratio <= 1 caps cost at 2x)."""
+
+    def __init__(self, ratio: float = 0.1) -> None:
+        self.ratio = min(1.0, max(0.0, float(ratio)))
+        self._calls = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+
+    def record_call(self) -> None:
+        with self._lock:
+            self._calls += 1
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._hedges + 1 > self.ratio * self._calls:
+                return False
+            self._hedges += 1
+            return True
+
+
+class HedgedProvider:
+    """Sends a backup request when the primary is slower than its observed p-quantile.
+
+    The backup goes to ``fallback`` if configured, else duplicates the primary; the
+    first successful answer wins and the loser is cancelled (async) or ignored
+    (sync). Hedging starts once the latency window has ``min_samples`` entries.
+    """
+
+    def __init__(
+        self,
+        primary: Any,
+        provider: str,
+        model: str,
+        fallback: Optional[Any] = None,
+        budget_ratio: float = 0.1,
+        quantile: float = 0.95,
+        window: Optional[LatencyWindow] = None,
+        max_workers: int = 8,
+    ) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self.provider = provider
+        self.model = model
+        self.quantile = float(quantile)
+        self.window = window or LatencyWindow()
+        self.budget = HedgeBudget(budget_ratio)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._max_workers = max_workers
+        m = get_metrics_registry()
+        self._fired = m.hedges_fired.labels(provider=provider)
+        self._won = m.hedges_won.labels(provider=provider)
+
+    @property
+    def ready(self) -> bool:
+        return bool(getattr(self.primary, "ready", True))
+
+    def _delay_s(self) -> Optional[float]:
+        p = self.window.quantile(self.quantile)
+        return None if p is None else p / 1000.0
+
+    async def _timed_primary(self, image_b64: str) -> Any:
+        t0 = time.perf_counter()
+        value = await ainfer(self.primary, image_b64)
+        self.window.observe((time.perf_counter() - t0) * 1000.0)
+        return value
+
+    @property
+    def _hedge_origin(self) -> str:
+        # A duplicate of the primary answers as the primary
+        return "fallback" if self.fallback is not None else "primary"
+
+    async def ainfer(self, image_b64: str) -> Any:
+        value, _ = await self.ainfer_with_origin(image_b64)
+        return value
+
+    async def ainfer_with_origin(self, image_b64: str) -> Tuple[Any, str]:
+        """The answer and which adapter gave it, ``"primary"`` or ``"fallback"``."""
+        self.budget.record_call()
+        delay = self._delay_s()
+        t0 = time.perf_counter()
+        primary = asyncio.ensure_future(self._timed_primary(image_b64))
+        tasks = {primary}
+        try:
+            if delay is None:
+                return await primary, "primary"
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.budget.try_spend():
+                return await primary, "primary"
+            self._fired.inc()
+            hedge = asyncio.ensure_future(ainfer(self.fallback or self.primary, image_b64))
+            tasks.add(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not hedge:
+                            return task.result(), "primary"
+                        self._won.inc()
+                        if not primary.done():
+                            # The primary is cancelled below and never reports; record the
+                            # time it had run (past the hedge delay) as a censored sample, or
+                            # the window only learns from calls that beat the hedge
+                            self.window.observe((time.perf_counter() - t0) * 1000.0)
+                        return task.result(), self._hedge_origin
+            # Both failed: surface the primary's error
+            return primary.result(), "primary"
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _submit(self, fn: Any, *args: Any) -> Future:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix=f"hedge-{self.provider}")
+        return self._pool.submit(fn, *args)
+
+    def _timed_primary_sync(self, image_b64: str) -> Any:
+        t0 = time.perf_counter()
+        value = self.primary.infer(image_b64)
+        self.window.observe((time.perf_counter() - t0) * 1000.0)
+        return value
+
+    def infer(self, image_b64: str) -> Any:
+        value, _ = self.infer_with_origin(image_b64)
+        return value
+
+    def infer_with_origin(self, image_b64: str) -> Tuple[Any, str]:
+        """Blocking ``ainfer_with_origin``; a losing primary keeps running and reports its own latency."""
+        self.budget.record_call()
+        delay = self._delay_s()
+        if delay is None:
+            return self._timed_primary_sync(image_b64), "primary"
+        primary = self._submit(self._timed_primary_sync, image_b64)
+        done, _ = wait({primary}, timeout=delay)
+        if done or not self.budget.try_spend():
+            return primary.result(), "primary"
+        self._fired.inc()
+        hedge = self._submit((self.fallback or self.primary).infer, image_b64)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    if fut is not hedge:
+                        return fut.result(), "primary"
+                    self._won.inc()
+                    return fut.result(), self._hedge_origin
+        return primary.result(), "primary"
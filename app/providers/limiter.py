@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+from app.services.metrics import get_metrics_registry
+from app.utils.config import load_providers_config
+
+
+class LimiterRejected(RuntimeError):
+    """Raised when a request cannot get a provider slot within the bounded queue/wait."""
+
+
+class _Waiter:
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.granted = False
+        self.loop = loop
+        self.event: Optional[threading.Event] = None if loop else threading.Event()
+        self.future: Optional[asyncio.Future] = loop.create_future() if loop else None
+
+    def wake(self) -> bool:
+        if self.event is not None:
+            self.granted = True
+            self.event.set()
+            return True
+        assert self.loop is not None and self.future is not None
+        fut = self.future
+        try:
+            self.loop.call_soon_threadsafe(lambda: fut.done() or fut.set_result(None))
+        except RuntimeError:
+            # Waiter's event loop is gone; skip it rather than leak the slot
+            return False
+        self.granted = True
+        return True
+
+
+class Slot:
+    """One admitted request; callers set ``status`` (HTTP code) before the slot closes."""
+
+    __slots__ = ("started", "status")
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.status: Optional[int] = None
+
+
+def _is_overload(status: Optional[int]) -> bool:
+    return status is None or status == 429 or status >= 500
+
+
+class AdaptiveLimiter:
+    """Per-provider concurrency limit adapted with AIMD.
+
+    The limit grows by ``1/limit`` per successful request while the limiter is
+    saturated (about +1 per window of requests) and is multiplied by ``backoff``
+    on 429/5xx/transport errors or when short-term latency exceeds
+    ``latency_tolerance`` times the long-term baseline (never below
+    ``latency_floor_ms``, so jitter on fast calls is ignored). Only requests started after
+    the previous cut can trigger another, so a burst of failures from one window
+    shrinks the limit once. Excess requests queue FIFO; the queue length and the
+    wait are both bounded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: float = 2,
+        min_limit: float = 1,
+        max_limit: float = 16,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        latency_floor_ms: float = 20.0,
+        max_queue: int = 64,
+        max_wait_s: float = 10.0,
+    ) -> None:
+        self.name = name
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max(max_limit, initial))
+        self.backoff = float(backoff)
+        self.latency_tolerance = float(latency_tolerance)
+        self.latency_floor_ms = float(latency_floor_ms)
+        self.max_queue = int(max_queue)
+        self.max_wait_s = float(max_wait_s)
+        self._limit = float(max(min_limit, initial))
+        self._inflight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        self._last_cut = 0.0
+        self._lat_fast: Optional[float] = None
+        self._lat_slow: Optional[float] = None
+        m = get_metrics_registry()
+        self._g_inflight = m.provider_inflight.labels(provider=name)
+        self._g_queue = m.provider_queue_depth.labels(provider=name)
+        self._g_limit = m.provider_concurrency_limit.labels(provider=name)
+        self._publish()
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(math.floor(self._limit)))
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _publish(self) -> None:
+        self._g_inflight.set(self._inflight)
+        self._g_queue.set(len(self._waiters))
+        self._g_limit.set(self._limit)
+
+    def _try_admit(self, loop: Optional[asyncio.AbstractEventLoop]) -> Optional[_Waiter]:
+        """Admit immediately (returns None) or enqueue a waiter. Caller holds the lock."""
+        if not self._waiters and self._inflight < self.limit:
+            self._inflight += 1
+            self._publish()
+            return None
+        if len(self._waiters) >= self.max_queue:
+            raise LimiterRejected(f"{self.name}: queue full ({self.max_queue})")
+        waiter = _Waiter(loop)
+        self._waiters.append(waiter)
+        self._publish()
+        return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Drop a waiter that gave up; True if it had already been granted a slot."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            self._publish()
+            return False
+
+    def _grant(self) -> None:
+        # Caller holds the lock
+        while self._waiters and self._inflight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.wake():
+                self._inflight += 1
+        self._publish()
+
+    def acquire(self, timeout: Optional[float] = None) -> Slot:
+        with self._lock:
+            waiter = self._try_admit(None)
+        if waiter is not None:
+            assert waiter.event is not None
+            if not waiter.event.wait(self.max_wait_s if timeout is None else timeout):
+                if not self._abandon(waiter):
+                    raise LimiterRejected(f"{self.name}: no slot within {self.max_wait_s:.1f}s")
+        return Slot()
+
+    async def aacquire(self, timeout: Optional[float] = None) -> Slot:
+        with self._lock:
+            waiter = self._try_admit(asyncio.get_running_loop())
+        if waiter is not None:
+            assert waiter.future is not None
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait_s if timeout is None else timeout)
+            except asyncio.TimeoutError:
+                if not self._abandon(waiter):
+                    raise LimiterRejected(f"{self.name}: no slot within {self.max_wait_s:.1f}s") from None
+            except asyncio.CancelledError:
+                if self._abandon(waiter):
+                    self.release(Slot(), adapt=False)
+                raise
+        return Slot()
+
+    def release(self, slot: Slot, adapt: bool = True) -> None:
+        now = time.monotonic()
+        latency_ms = (now - slot.started) * 1000.0
+        with self._lock:
+            self._inflight = max(0, self._inflight - 1)
+            if adapt:
+                self._adapt(slot, latency_ms, now)
+            self._grant()
+
+    def _adapt(self, slot: Slot, latency_ms: float, now: float) -> None:
+        congested = _is_overload(slot.status)
+        if not congested:
+            self._lat_fast = latency_ms if self._lat_fast is None else 0.7 * self._lat_fast + 0.3 * latency_ms
+            self._lat_slow = latency_ms if self._lat_slow is None else 0.95 * self._lat_slow + 0.05 * latency_ms
+            congested = self._lat_fast > self.latency_tolerance * max(self._lat_slow, self.latency_floor_ms)
+        if congested:
+            if slot.started >= self._last_cut:
+                self._limit = max(self.min_limit, self._limit * self.backoff)
+                self._last_cut = now
+        elif self._waiters or self._inflight + 1 >= self.limit:
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+
+    @contextmanager
+    def slot(self) -> Iterator[Slot]:
+        s = self.acquire()
+        try:
+            yield s
+        finally:
+            self.release(s)
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[Slot]:
+        s = await self.aacquire()
+        try:
+            yield s
+        finally:
+            self.release(s)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(section: str, name: Optional[str] = None) -> AdaptiveLimiter:
+    """Process-wide limiter for a providers.yaml section, seeded from its ``concurrency``.
+
+    ``name`` (default: the section) keys the limiter, so a second provider serving
+    the same section, such as a hedging fallback, gets its own limit.
+    """
+    name = name or section
+    limiter = _limiters.get(name)
+    if limiter is not None:
+        return limiter
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            try:
+                providers = load_providers_config()
+            except Exception:
+                providers = {}
+            cfg: Dict[str, Any] = providers.get(section) or {}
+            defaults: Dict[str, Any] = providers.get("limiter") or {}
+            limiter = AdaptiveLimiter(
+                name,
+                initial=cfg.get("concurrency", defaults.get("initial", 2)),
+                min_limit=defaults.get("min_limit", 1),
+                max_limit=cfg.get("concurrency_max", defaults.get("max_limit", 16)),
+                backoff=defaults.get("backoff", 0.5),
+                latency_tolerance=defaults.get("latency_tolerance", 2.0),
+                latency_floor_ms=defaults.get("latency_floor_ms", 20.0),
+                max_queue=defaults.get("max_queue", 64),
+                max_wait_s=defaults.get("max_wait_s", 10.0),
+            )
+            _limiters[name] = limiter
+    return limiter
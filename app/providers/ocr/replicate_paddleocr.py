@@ -1,46 +1,55 @@
 from __future__ import annotations
 
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Tuple
 import os
-import requests
+from app.providers.resilience import get_policy
+from app.providers.transport import get_transport
 
 
 class ReplicatePaddleOcr:
+    url = "https://api.replicate.com/v1/predictions"
+    section = "ocr"
+
     def __init__(self, version: str) -> None:
         self.version = version
-        self.token = os.getenv("REPLICATE_API_TOKEN", "")
 
-    def infer(self, image_b64: str) -> List[dict]:
-        if not self.token:
-            return []
+    @property
+    def token(self) -> str:
+        return os.getenv("REPLICATE_API_TOKEN", "")
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.token)
+
+    def _request(self, image_b64: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
         headers = {"Authorization": f"Token {self.token}", "Content-Type": "application/json"}
-        url = "https://api.replicate.com/v1/predictions"
         payload: Dict[str, Any] = {"version": self.version, "input": {"image": image_b64}}
-        backoffs = [0.5, 1.0, 2.0]
-        for delay in backoffs:
+        return headers, payload
+
+    @staticmethod
+    def _parse(data: Dict[str, Any]) -> List[dict]:
+        out = data.get("output") or []
+        ocr_items: List[dict] = []
+        for it in out:
             try:
-                resp = requests.post(url, headers=headers, json=payload, timeout=30)
-                if resp.status_code in (429, 500, 502, 503, 504):
-                    import time as _t
-                    _t.sleep(delay)
-                    continue
-                if not resp.ok:
-                    return []
-                data = resp.json()
-                out = data.get("output") or []
-                ocr_items: List[dict] = []
-                for it in out:
-                    try:
-                        text = it.get("text")
-                        box = it.get("box")
-                        if text and box and len(box) == 4:
-                            ocr_items.append({"text": str(text), "box": [float(x) for x in box]})
-                    except Exception:
-                        continue
-                return ocr_items
+                text = it.get("text")
+                box = it.get("box")
+                if text and box and len(box) == 4:
+                    ocr_items.append({"text": str(text), "box": [float(x) for x in box]})
             except Exception:
-                import time as _t
-                _t.sleep(delay)
-        return []
+                continue
+        return ocr_items
 
+    def infer(self, image_b64: str) -> List[dict]:
+        if not self.token:
+            return []
+        headers, payload = self._request(image_b64)
+        resp = get_policy(self.section).call(lambda: get_transport().post(self.url, headers=headers, json=payload))
+        return self._parse(resp.json())
 
+    async def ainfer(self, image_b64: str) -> List[dict]:
+        if not self.token:
+            return []
+        headers, payload = self._request(image_b64)
+        resp = await get_policy(self.section).acall(lambda: get_transport().apost(self.url, headers=headers, json=payload))
+        return self._parse(resp.json())
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.providers.limiter import AdaptiveLimiter, get_limiter
+from app.utils.config import load_providers_config
+
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class ProviderError(RuntimeError):
+    """A provider call failed with a non-retryable response."""
+
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class ProviderUnavailable(ProviderError):
+    """The circuit is open or retries were exhausted; callers should fail fast."""
+
+
+class TokenBucket:
+    """Smooths request starts to ``rate_per_s`` with bursts up to ``burst``.
+
+    ``reserve`` takes a token immediately (the balance may go negative) and returns
+    how long the caller must wait, so sync and async callers share one bucket.
+    """
+
+    def __init__(self, rate_per_s: float, burst: float) -> None:
+        self.rate = float(rate_per_s)
+        self.burst = float(max(1.0, burst))
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures; after
+    ``reset_timeout_s`` one half-open probe is let through and its outcome closes
+    or re-opens the circuit."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30.0) -> None:
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout_s = float(reset_timeout_s)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_inflight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout_s:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_inflight = False
+            if self._probe_inflight:
+                return False
+            self._probe_inflight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_inflight = False
+
+    def release_probe(self) -> None:
+        """End a half-open probe without a verdict (throttled or cancelled)."""
+        with self._lock:
+            self._probe_inflight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_inflight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            retry_in = 0.0
+            if state != self.CLOSED and self._state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout_s - (time.monotonic() - self._opened_at))
+            return {"state": state, "consecutive_failures": self._failures, "retry_in_s": round(retry_in, 2)}
+
+
+def retry_after_s(headers: Any) -> Optional[float]:
+    """Parse a ``Retry-After`` header given as seconds or an HTTP date."""
+    try:
+        value = headers.get("Retry-After") if headers is not None else None
+    except Exception:
+        return None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base_s: float, cap_s: float, hint_s: Optional[float] = None, hint_cap_s: float = 30.0) -> float:
+    """Full-jitter exponential backoff; a server ``Retry-After`` hint replaces it."""
+    if hint_s is not None:
+        return min(hint_cap_s, hint_s) + random.uniform(0.0, base_s)
+    return random.uniform(0.0, min(cap_s, base_s * (2 ** attempt)))
+
+
+class ResiliencePolicy:
+    """Retry, rate-limit and circuit-break one provider section's HTTP attempts.
+
+    Each attempt waits on the token bucket and holds an adaptive limiter slot.
+    Retryable statuses (429/5xx) and transport errors back off with jitter,
+    honouring ``Retry-After``. 5xx and transport errors count against the breaker;
+    429 only throttles. The successful response is returned; otherwise
+    ``ProviderError`` (non-retryable status) or ``ProviderUnavailable`` is raised.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limiter: Optional[AdaptiveLimiter] = None,
+        bucket: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_attempts: int = 3,
+        backoff_base_s: float = 0.25,
+        backoff_cap_s: float = 4.0,
+        retry_after_cap_s: float = 10.0,
+    ) -> None:
+        self.name = name
+        self.limiter = limiter
+        self.bucket = bucket
+        self.breaker = breaker or CircuitBreaker()
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base_s = float(backoff_base_s)
+        self.backoff_cap_s = float(backoff_cap_s)
+        self.retry_after_cap_s = float(retry_after_cap_s)
+
+    def _outcome(self, resp: Any, attempt: int) -> Optional[float]:
+        """Classify a response: None when final, else the delay before the next attempt."""
+        status = int(resp.status_code)
+        if status in RETRYABLE_STATUS:
+            if status == 429:
+                self.breaker.release_probe()
+            else:
+                self.breaker.record_failure()
+            return backoff_delay(attempt, self.backoff_base_s, self.backoff_cap_s, retry_after_s(resp.headers), self.retry_after_cap_s)
+        # Any non-retryable answer means the provider is up
+        self.breaker.record_success()
+        if status >= 400:
+            raise ProviderError(f"{self.name}: HTTP {status}", status=status)
+        return None
+
+    def _failed(self, attempt: int) -> float:
+        self.breaker.record_failure()
+        return backoff_delay(attempt, self.backoff_base_s, self.backoff_cap_s)
+
+    def _gate(self) -> None:
+        if not self.breaker.allow():
+            raise ProviderUnavailable(f"{self.name}: circuit open")
+
+    def call(self, send: Callable[[], Any]) -> Any:
+        last = "no attempts"
+        for attempt in range(self.max_attempts):
+            self._gate()
+            if self.bucket is not None:
+                self.bucket.acquire()
+            try:
+                if self.limiter is not None:
+                    with self.limiter.slot() as slot:
+                        resp = send()
+                        slot.status = resp.status_code
+                else:
+                    resp = send()
+            except Exception as e:
+                delay = self._failed(attempt)
+                last = f"{type(e).__name__}: {e}"
+            else:
+                delay_or_none = self._outcome(resp, attempt)
+                if delay_or_none is None:
+                    return resp
+                delay, last = delay_or_none, f"HTTP {resp.status_code}"
+            # An attempt that just opened the circuit fails fast on the next gate check
+            if attempt + 1 < self.max_attempts and self.breaker.state != CircuitBreaker.OPEN:
+                time.sleep(delay)
+        raise ProviderUnavailable(f"{self.name}: retries exhausted ({last})")
+
+    async def acall(self, send: Callable[[], Awaitable[Any]]) -> Any:
+        last = "no attempts"
+        for attempt in range(self.max_attempts):
+            self._gate()
+            if self.bucket is not None:
+                await self.bucket.aacquire()
+            try:
+                if self.limiter is not None:
+                    async with self.limiter.aslot() as slot:
+                        resp = await send()
+                        slot.status = resp.status_code
+                else:
+                    resp = await send()
+            except asyncio.CancelledError:
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                delay = self._failed(attempt)
+                last = f"{type(e).__name__}: {e}"
+            else:
+                delay_or_none = self._outcome(resp, attempt)
+                if delay_or_none is None:
+                    return resp
+                delay, last = delay_or_none, f"HTTP {resp.status_code}"
+            # An attempt that just opened the circuit fails fast on the next gate check
+            if attempt + 1 < self.max_attempts and self.breaker.state != CircuitBreaker.OPEN:
+                await asyncio.sleep(delay)
+        raise ProviderUnavailable(f"{self.name}: retries exhausted ({last})")
+
+
+_policies: Dict[str, ResiliencePolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(section: str, name: Optional[str] = None) -> ResiliencePolicy:
+    """Process-wide policy for a providers.yaml section (``resilience`` holds defaults).
+
+    ``name`` (default: the section) keys the policy and its limiter so each remote
+    provider has its own breaker.
+    """
+    name = name or section
+    policy = _policies.get(name)
+    if policy is not None:
+        return policy
+    with _policies_lock:
+        policy = _policies.get(name)
+        if policy is None:
+            try:
+                providers = load_providers_config()
+            except Exception:
+                providers = {}
+            cfg: Dict[str, Any] = providers.get(section) or {}
+            defaults: Dict[str, Any] = providers.get("resilience") or {}
+            rate = float(cfg.get("rate_per_s", defaults.get("rate_per_s", 0)))
+            policy = ResiliencePolicy(
+                name,
+                limiter=get_limiter(section, name),
+                bucket=TokenBucket(rate, cfg.get("burst", defaults.get("burst", rate))) if rate > 0 else None,
+                breaker=CircuitBreaker(
+                    failure_threshold=defaults.get("breaker_failures", 5),
+                    reset_timeout_s=defaults.get("breaker_reset_s", 30.0),
+                ),
+                max_attempts=defaults.get("max_attempts", 3),
+                backoff_base_s=defaults.get("backoff_base_s", 0.25),
+                backoff_cap_s=defaults.get("backoff_cap_s", 4.0),
+                retry_after_cap_s=defaults.get("retry_after_cap_s", 10.0),
+            )
+            _policies[name] = policy
+    return policy
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Circuit state of every provider policy that has made a call."""
+    with _policies_lock:
+        return {name: p.breaker.snapshot() for name, p in _policies.items()}
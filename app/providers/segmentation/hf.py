@@ -2,31 +2,44 @@ from __future__ import annotations
 
 from typing import List, Any, Dict
 import os
-import requests
+from app.providers.resilience import get_policy
+from app.providers.transport import get_transport
 
 
 class HfSegmentation:
+    section = "segmentation"
+
     def __init__(self, model_id: str) -> None:
         self.model_id = model_id
 
+    @property
+    def ready(self) -> bool:
+        return bool(os.getenv("HF_API_TOKEN") and os.getenv("HF_SEG_ENDPOINT"))
+
+    @staticmethod
+    def _parse(data: Any) -> List[dict]:
+        # Mask dicts pass through; restore_results normalizes them to RLE/polygons
+        # once the canvas size is known (app.utils.masks.normalize)
+        if isinstance(data, list):
+            return data
+        return data.get("masks", []) if isinstance(data, dict) else []
+
     def infer(self, image_b64: str) -> List[dict]:
         token = os.getenv("HF_API_TOKEN")
         endpoint = os.getenv("HF_SEG_ENDPOINT")  # optional fully qualified endpoint URL
         if not token or not endpoint:
             return []
-        try:
-            headers = {"Authorization": f"Bearer {token}"}
-            payload: Dict[str, Any] = {"inputs": image_b64}
-            resp = requests.post(endpoint, headers=headers, json=payload, timeout=30)
-            if not resp.ok:
-                return []
-            data = resp.json()
-            # Expecting a provider-specific schema; normalize to list of mask dicts
-            # For now pass through as-is; downstream will ignore if unusable
-            if isinstance(data, list):
-                return data
-            return data.get("masks", []) if isinstance(data, dict) else []
-        except Exception:
-            return []
-
+        headers = {"Authorization": f"Bearer {token}"}
+        payload: Dict[str, Any] = {"inputs": image_b64}
+        resp = get_policy(self.section).call(lambda: get_transport().post(endpoint, headers=headers, json=payload))
+        return self._parse(resp.json())
 
+    async def ainfer(self, image_b64: str) -> List[dict]:
+        token = os.getenv("HF_API_TOKEN")
+        endpoint = os.getenv("HF_SEG_ENDPOINT")
+        if not token or not endpoint:
+            return []
+        headers = {"Authorization": f"Bearer {token}"}
+        payload: Dict[str, Any] = {"inputs": image_b64}
+        resp = await get_policy(self.section).acall(lambda: get_transport().apost(endpoint, headers=headers, json=payload))
+        return self._parse(resp.json())
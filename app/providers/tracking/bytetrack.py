@@ -1,6 +1,15 @@
 from __future__ import annotations
 
-from typing import List, Dict
+import threading
+from collections import deque
+from itertools import compress, repeat
+from operator import delitem, itemgetter
+from typing import List, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from app.providers.detection.batch import DetectionBatch
 
 
 class SimpleTracker:
@@ -30,3 +39,440 @@ class SimpleTracker:
         return tracks
 
 
+_BOX_FIELDS = itemgetter("x1", "y1", "x2", "y2", "score")
+_CLS_FIELD = itemgetter("cls")
+
+
+def overlapping_pairs(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs of ``(N, 4)`` and ``(M, 4)`` xyxy boxes that intersect.
+
+    A sort-and-sweep on ``x1`` followed by a y-extent check keeps the work
+    near-linear for spread-out scenes instead of materialising the full
+    ``N x M`` IoU matrix.
+    """
+    empty = np.empty(0, dtype=np.intp)
+    if len(a) == 0 or len(b) == 0:
+        return empty, empty
+    # Per-coordinate rows: each candidate's ``a`` side is a ``repeat`` of its box
+    # and its ``b`` side a 1-D take from ``b`` sorted by x1
+    ac = np.ascontiguousarray(a.T)
+    order = b[:, 0].argsort()
+    bs = b.T.take(order, axis=1)
+    bx1 = bs[0]
+    max_w = float((bs[2] - bx1).max())
+    lo = bx1.searchsorted(ac[0] - max_w, side="left")
+    hi = bx1.searchsorted(ac[2], side="left")
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    if total == 0:
+        return empty, empty
+    # Sorted position of every candidate: each row's ``lo`` onwards, ``counts`` long
+    pos = (lo - counts.cumsum() + counts).repeat(counts) + np.arange(total)
+    hit = bs[2].take(pos) > ac[0].repeat(counts)
+    hit &= bs[1].take(pos) < ac[3].repeat(counts)
+    hit &= bs[3].take(pos) > ac[1].repeat(counts)
+    return np.arange(len(a)).repeat(counts)[hit], order.take(pos[hit])
+
+
+def pair_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise IoU of two equally long ``(K, 4)`` xyxy arrays."""
+    # Width and height rows side by side, so each step is one op over both
+    a, b = a.T, b.T
+    wh = np.maximum(np.minimum(a[2:], b[2:]) - np.maximum(a[:2], b[:2]), 0)
+    inter = wh[0] * wh[1]
+    a_wh, b_wh = a[2:] - a[:2], b[2:] - b[:2]
+    union = a_wh[0] * a_wh[1] + b_wh[0] * b_wh[1] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def associate(rows: np.ndarray, cols: np.ndarray, iou: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Maximum-IoU one-to-one matching over sparse candidate pairs.
+
+    Pairs that are each other's only candidate are matched directly; the optimal
+    assignment only runs on the ambiguous remainder, which is usually a small
+    fraction of the scene even when crowded.
+    """
+    if len(rows) == 0:
+        return rows, cols
+    row_n = np.bincount(rows)
+    col_n = np.bincount(cols)
+    lone = (row_n.take(rows) == 1) & (col_n.take(cols) == 1)
+    if lone.all():
+        return rows, cols
+    shared = ~lone
+    r, c, v = rows[shared], cols[shared], iou[shared]
+    sub_r, ri = _compact(r, len(row_n))
+    sub_c, ci = _compact(c, len(col_n))
+    sub = np.zeros((len(sub_r), len(sub_c)))
+    sub[ri, ci] = v
+    mr, mc = linear_sum_assignment(sub, maximize=True)
+    keep = sub[mr, mc] > 0
+    return (
+        np.concatenate([rows[lone], sub_r.take(mr[keep])]),
+        np.concatenate([cols[lone], sub_c.take(mc[keep])]),
+    )
+
+
+def _compact(x: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    # ``np.unique(x, return_inverse=True)`` for indices below ``size``, without the sort
+    seen = np.zeros(size, dtype=bool)
+    seen[x] = True
+    values = seen.nonzero()[0]
+    return values, values.searchsorted(x)
+
+
+class KalmanBoxFilter:
+    """Constant-velocity Kalman filter over ``(cx, cy, aspect, h)``, batched over tracks.
+
+    With a diagonal process/measurement noise and a position-only measurement,
+    the 8x8 covariance stays block-diagonal: each coordinate only correlates with
+    its own velocity. State is therefore kept as ``mean (N, 8)`` plus
+    ``var (N, 3, 4)`` holding the (pos, pos), (pos, vel) and (vel, vel) terms per
+    coordinate, and every step is elementwise.
+
+    Arrays are laid out with the track axis innermost in memory: ``mean`` is
+    ``np.zeros((8, n)).T`` and ``var`` is ``np.zeros((3, 4, n)).transpose(2, 0, 1)``,
+    so each coordinate of each term is contiguous across tracks and the
+    elementwise steps stream along N. Outputs keep the same layout.
+    """
+
+    _std_pos = 1.0 / 20
+    _std_vel = 1.0 / 160
+    # Per-coordinate noise multipliers; the aspect ratio uses fixed absolute noise
+    _scale = np.array([1.0, 1.0, 0.0, 1.0])
+    _fixed_pos = np.array([0.0, 0.0, 1e-2, 0.0])
+    _fixed_vel = np.array([0.0, 0.0, 1e-5, 0.0])
+    _fixed_meas = np.array([0.0, 0.0, 1e-1, 0.0])
+
+    def _std(self, h: np.ndarray, weight: float, fixed: np.ndarray) -> np.ndarray:
+        return (weight * (self._scale[:, None] * h) + fixed[:, None]).T
+
+    def initiate(self, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(z)
+        mean = np.zeros((8, n)).T
+        mean[:, :4] = z
+        v = np.zeros((3, 4, n))
+        v[0] = self._std(z[:, 3], 2 * self._std_pos, self._fixed_pos).T ** 2
+        v[2] = self._std(z[:, 3], 10 * self._std_vel, self._fixed_vel).T ** 2
+        return mean, v.transpose(2, 0, 1)
+
+    def predict(self, mean: np.ndarray, var: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # (4, n) blocks: pp, pv, vv per coordinate
+        pp, pv, vv = var.transpose(1, 2, 0)
+        h = mean[:, 3]
+        out = np.empty((3, 4, len(mean)))
+        np.multiply(pv, 2, out=out[0])
+        out[0] += pp
+        out[0] += vv
+        out[0] += self._std(h, self._std_pos, self._fixed_pos).T ** 2
+        np.add(pv, vv, out=out[1])
+        np.add(vv, self._std(h, self._std_vel, self._fixed_vel).T ** 2, out=out[2])
+        mean = mean.copy(order="K")
+        m = mean.T
+        m[:4] += m[4:]
+        return mean, out.transpose(2, 0, 1)
+
+    def update(
+        self, mean: np.ndarray, var: np.ndarray, z: np.ndarray, rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Correct with measurements ``z``, one per track or, with ``rows``, one per listed track.
+
+        Tracks left out of ``rows`` get zero gain and innovation, so they pass
+        through unchanged without gathering and scattering the state around them.
+        """
+        m = mean.T
+        pp, pv, vv = var.transpose(1, 2, 0)
+        n = m.shape[1]
+        s = pp + self._std(m[3], self._std_pos, self._fixed_meas).T ** 2
+        g_pos = pp / s
+        g_vel = pv / s
+        if rows is None:
+            innov = z.T - m[:4]
+        else:
+            innov = np.zeros((4, n))
+            innov[:, rows] = z.T - m[:4].take(rows, axis=1)
+            measured = np.zeros(n)
+            measured[rows] = 1
+            g_pos *= measured
+            g_vel *= measured
+        out_mean = np.empty((8, n))
+        np.multiply(g_pos, innov, out=out_mean[:4])
+        np.multiply(g_vel, innov, out=out_mean[4:])
+        out_mean += m
+        out = np.empty((3, 4, n))
+        np.multiply(g_vel, pv, out=out[2])
+        np.subtract(vv, out[2], out=out[2])
+        np.subtract(1, g_pos, out=g_pos)
+        np.multiply(g_pos, pp, out=out[0])
+        np.multiply(g_pos, pv, out=out[1])
+        return out_mean.T, out.transpose(2, 0, 1)
+
+
+# Box conversions keep the track axis innermost, the layout of the Kalman state
+
+
+def xyxy_to_xyah(b: np.ndarray) -> np.ndarray:
+    b = b.T
+    out = np.empty((4, b.shape[1]))
+    wh = np.subtract(b[2:], b[:2], out=out[2:])
+    np.maximum(wh[1], 1e-6, out=wh[1])
+    np.multiply(wh, 0.5, out=out[:2])
+    out[:2] += b[:2]
+    out[2] /= wh[1]
+    return out.T
+
+
+def xyah_to_xyxy(s: np.ndarray) -> np.ndarray:
+    s = s.T
+    half = np.empty((2, s.shape[1]))
+    np.multiply(s[2], s[3], out=half[0])
+    half[1] = s[3]
+    half /= 2
+    out = np.empty((4, s.shape[1]))
+    np.subtract(s[:2], half, out=out[:2])
+    np.add(s[:2], half, out=out[2:])
+    return out.T
+
+
+# Axis orders moving the track axis of 2-D and 3-D state innermost and back
+_TRACKS_LAST = {2: (1, 0), 3: (1, 2, 0)}
+_TRACKS_FIRST = {2: (1, 0), 3: (2, 0, 1)}
+
+
+def _rows(a: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    # Row gather that keeps the track axis innermost in memory
+    return a.transpose(_TRACKS_LAST[a.ndim]).take(idx, axis=-1).transpose(_TRACKS_FIRST[a.ndim])
+
+
+def _append_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Row concatenation with the same layout guarantee as ``_rows``
+    last = _TRACKS_LAST[a.ndim]
+    return np.concatenate([a.transpose(last), b.transpose(last)], axis=-1).transpose(_TRACKS_FIRST[a.ndim])
+
+
+class ByteTracker:
+    """ByteTrack-style multi-object tracker that persists across the frames of a run.
+
+    Track state lives in numpy arrays and is advanced by a batched Kalman filter.
+    Each frame, high-score detections are matched to all tracks by IoU, then
+    low-score detections rescue tracks that are still unmatched. Tracks unseen
+    for ``max_lost`` frames are evicted; unmatched high-score detections start
+    new tracks. ``update`` returns the tracks matched in the current frame.
+    Between detections, ``propagate`` coasts the tracks on their motion model.
+    """
+
+    def __init__(
+        self,
+        high_thresh: float = 0.5,
+        low_thresh: float = 0.1,
+        new_track_thresh: float = 0.6,
+        match_iou: float = 0.2,
+        low_match_iou: float = 0.5,
+        max_lost: int = 30,
+        max_tracks: int = 1024,
+        trail_len: int = 10,
+    ) -> None:
+        self.high_thresh = high_thresh
+        self.low_thresh = low_thresh
+        self.new_track_thresh = new_track_thresh
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.max_lost = int(max_lost)
+        self.max_tracks = int(max_tracks)
+        self.trail_len = int(trail_len)
+        self.kf = KalmanBoxFilter()
+        self.frame_id = 0
+        self._next_id = 1
+        self._mean, self._var = self.kf.initiate(np.zeros((0, 4)))
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._last_seen = np.zeros(0, dtype=np.int64)
+        self._cls = np.zeros(0, dtype=np.int64)
+        self._score = np.zeros(0)
+        self._coasted = 0
+        self._trails: List[List[Tuple[int, int]]] = []
+        self._cls_codes: Dict[str, int] = {}
+        self._cls_names: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._cls >= 0))
+
+    def _code(self, name: str) -> int:
+        code = self._cls_codes.get(name)
+        if code is None:
+            code = self._cls_codes[name] = len(self._cls_names)
+            self._cls_names.append(name)
+        return code
+
+    def _keep(self, mask: np.ndarray) -> None:
+        rows = mask.nonzero()[0]
+        self._mean, self._var = _rows(self._mean, rows), _rows(self._var, rows)
+        self._ids, self._last_seen, self._cls = self._ids[mask], self._last_seen[mask], self._cls[mask]
+        self._score = self._score[mask]
+        self._trails = list(compress(self._trails, mask.tolist()))
+
+    def _spawn(self, z: np.ndarray, cls: np.ndarray, score: np.ndarray) -> None:
+        mean, var = self.kf.initiate(z)
+        n = len(z)
+        self._mean = _append_rows(self._mean, mean)
+        self._var = _append_rows(self._var, var)
+        self._ids = np.concatenate([self._ids, np.arange(self._next_id, self._next_id + n)])
+        self._last_seen = np.concatenate([self._last_seen, np.full(n, self.frame_id)])
+        self._cls = np.concatenate([self._cls, cls])
+        self._score = np.concatenate([self._score, score])
+        self._trails.extend([] for _ in range(n))
+        self._next_id += n
+
+    def step(self, det_xyxy: np.ndarray, det_score: np.ndarray, det_cls: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance one frame on array inputs; returns matched (track row, detection index) pairs.
+
+        Track rows index the current state arrays (new tracks are appended) and stay
+        valid until the next call, which first evicts stale tracks.
+        """
+        prev_frame = self.frame_id
+        self.frame_id += 1
+        self._coasted = 0
+        self._evict()
+        if len(self._ids):
+            self._mean, self._var = self.kf.predict(self._mean, self._var)
+        trk_xyxy = xyah_to_xyxy(self._mean[:, :4])
+        det_xyxy = np.asfortranarray(det_xyxy)
+        det_xyah = xyxy_to_xyah(det_xyxy)
+
+        # One sweep and one IoU pass serve both stages; each stage then filters the pairs
+        ti, di = overlapping_pairs(trk_xyxy, det_xyxy)
+        # Never associate across classes
+        same = self._cls.take(ti) == det_cls.take(di)
+        ti, di = ti[same], di[same]
+        iou = pair_iou(_rows(trk_xyxy, ti), _rows(det_xyxy, di))
+        score = det_score.take(di)
+        high = score >= self.high_thresh
+        # Stage 1: every track (active or recently lost) against confident detections
+        ok = high & (iou >= self.match_iou)
+        t1, d1 = associate(ti[ok], di[ok], iou[ok])
+        # Stage 2: tracks active last frame but still unmatched against low-score detections
+        active = self._last_seen == prev_frame
+        active[t1] = False
+        ok = ~high & (score >= self.low_thresh) & active.take(ti) & (iou >= self.low_match_iou)
+        t2, d2 = associate(ti[ok], di[ok], iou[ok])
+
+        t_m = np.concatenate([t1, t2])
+        d_m = np.concatenate([d1, d2])
+        if len(t_m):
+            self._mean, self._var = self.kf.update(self._mean, self._var, _rows(det_xyah, d_m), t_m)
+            self._last_seen[t_m] = self.frame_id
+            self._score[t_m] = det_score[d_m]
+
+        unmatched = np.ones(len(det_xyxy), dtype=bool)
+        unmatched[d_m] = False
+        new = (unmatched & (det_score >= self.new_track_thresh)).nonzero()[0]
+        n_old = len(self._ids)
+        if len(new):
+            self._spawn(_rows(det_xyah, new), det_cls[new], det_score[new])
+        return (
+            np.concatenate([t_m, np.arange(n_old, n_old + len(new))]).astype(np.intp, copy=False),
+            np.concatenate([d_m, new]).astype(np.intp, copy=False),
+        )
+
+    def _evict(self) -> None:
+        """Drop tracks lost for more than ``max_lost`` frames, then the stalest beyond ``max_tracks``.
+
+        While stale rows are under an eighth of the state they are retired in
+        place with class ``-1``, which no detection matches, rather than
+        rebuilding every state array each frame.
+        """
+        keep = self.frame_id - self._last_seen <= self.max_lost
+        n_keep = np.count_nonzero(keep)
+        if n_keep > self.max_tracks:
+            order = np.argsort(-self._last_seen, kind="stable")
+            cap = np.zeros_like(keep)
+            cap[order[: self.max_tracks]] = True
+            keep &= cap
+        elif n_keep == len(keep):
+            return
+        elif 8 * n_keep > 7 * len(keep):
+            self._cls[~keep] = -1
+            return
+        self._keep(keep)
+
+    def update(self, boxes: Union[List[Dict], DetectionBatch]) -> List[Dict]:
+        """Track one frame of detections; returns the matched tracks.
+
+        ``boxes`` is a ``DetectionBatch``, whose arrays feed ``step`` directly, or
+        a list of ``{x1, y1, x2, y2, score, cls}`` dicts.
+        """
+        with self._lock:
+            if isinstance(boxes, DetectionBatch):
+                return self._update_batch(boxes)
+            return self._update(boxes)
+
+    def _update_batch(self, batch: DetectionBatch) -> List[Dict]:
+        # Map the batch's class table onto the tracker's once, not per box
+        table = self._codes(batch.names)
+        det_cls = table[batch.classes] if len(batch) else np.zeros(0, dtype=np.int64)
+        xyxy = np.asfortranarray(batch.xyxy, dtype=np.float64)
+        out_t, out_d = self.step(xyxy, batch.scores.astype(np.float64), det_cls)
+        labels = np.array(batch.names, dtype=object).take(batch.classes.take(out_d)).tolist()
+        return self._tracks(out_t, _rows(xyxy, out_d), labels)
+
+    def _update(self, boxes: List[Dict]) -> List[Dict]:
+        n_det = len(boxes)
+        try:
+            rows = list(map(_BOX_FIELDS, boxes))
+        except KeyError:
+            rows = [(b["x1"], b["y1"], b["x2"], b["y2"], b.get("score", 1.0)) for b in boxes]
+        arr = np.array(rows, dtype=np.float64).reshape(n_det, 5)
+        try:
+            names = list(map(_CLS_FIELD, boxes))
+        except KeyError:
+            names = [b.get("cls", "obj") for b in boxes]
+
+        out_t, out_d = self.step(arr[:, :4], arr[:, 4], self._codes(names))
+        return self._tracks(out_t, arr[out_d, :4], list(map(names.__getitem__, out_d.tolist())))
+
+    def _codes(self, names: Sequence[str]) -> np.ndarray:
+        """Tracker class codes of ``names``, registering any not seen before."""
+        codes = list(map(self._cls_codes.get, names))
+        if None in codes:
+            codes = [self._code(name) for name in names]
+        return np.array(codes, dtype=np.int64)
+
+    def _tracks(self, out_t: np.ndarray, xyxy: np.ndarray, labels: List[str]) -> List[Dict]:
+        # ``xyxy`` and ``labels`` are the matched detections, aligned with ``out_t``
+        trails = map(list.copy, self._extend_trails(out_t, xyxy))
+        return [
+            {"id": i, "cls": c, "x1": x1, "y1": y1, "x2": x2, "y2": y2, "trail": trail}
+            for i, c, x1, y1, x2, y2, trail in zip(self._ids[out_t].tolist(), labels, *xyxy.T.tolist(), trails)
+        ]
+
+    def _extend_trails(self, rows: np.ndarray, xyxy: np.ndarray) -> List[List[Tuple[int, int]]]:
+        # Points are int tuples, which the GC stops tracking: trail history then
+        # never piles up long-lived objects for full collections to rescan
+        cx, cy = ((xyxy[:, 0:2] + xyxy[:, 2:4]) / 2).astype(np.int64).T.tolist()
+        trails = list(map(self._trails.__getitem__, rows.tolist()))
+        # Exhausting each ``map`` into an empty deque runs it without a Python loop;
+        # plain lists rather than bounded deques make the per-frame copies a memcpy
+        deque(map(list.append, trails, zip(cx, cy)), maxlen=0)
+        deque(map(delitem, trails, repeat(slice(None, -self.trail_len))), maxlen=0)
+        return trails
+
+    def propagate(self, decay: float = 0.9) -> List[Dict]:
+        """Advance one frame without detections, moving tracks on their motion model.
+
+        Returns the tracks matched at the last detection step at their predicted
+        boxes, with ``score`` decayed by ``decay`` per frame coasted. Lost-track
+        bookkeeping only counts detection steps, so coasting never evicts.
+        """
+        with self._lock:
+            if len(self._ids):
+                self._mean, self._var = self.kf.predict(self._mean, self._var)
+            self._coasted += 1
+            rows = np.flatnonzero(self._last_seen == self.frame_id)
+            xyxy = xyah_to_xyxy(_rows(self._mean, rows)[:, :4])
+            trails = map(list.copy, self._extend_trails(rows, xyxy))
+            scores = (self._score[rows] * decay ** self._coasted).tolist()
+            names = map(self._cls_names.__getitem__, self._cls[rows].tolist())
+            return [
+                {"id": i, "cls": c, "x1": x1, "y1": y1, "x2": x2, "y2": y2, "score": score, "trail": trail}
+                for i, c, x1, y1, x2, y2, score, trail in zip(self._ids[rows].tolist(), names, *xyxy.T.tolist(), scores, trails)
+            ]
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from app.services.metrics import get_metrics_registry
+from app.utils.config import load_providers_config
+
+
+_tls = threading.local()
+
+
+class _CountingPoolMixin:
+    """Counts pooled connection reuse (hit) vs. fresh TCP/TLS connects (miss)."""
+
+    host: str
+
+    def _new_conn(self):  # type: ignore[no-untyped-def]
+        _tls.fresh = True
+        return super()._new_conn()  # type: ignore[misc]
+
+    def _get_conn(self, timeout: float | None = None):  # type: ignore[no-untyped-def]
+        _tls.fresh = False
+        conn = super()._get_conn(timeout)  # type: ignore[misc]
+        _record(self.host, hit=not getattr(_tls, "fresh", False))
+        return conn
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _record(host: str, hit: bool) -> None:
+    key = "hits" if hit else "misses"
+    with _stats_lock:
+        entry = _stats.setdefault(host, {"hits": 0, "misses": 0})
+        entry[key] += 1
+    m = get_metrics_registry()
+    (m.pool_hits if hit else m.pool_misses).labels(host=host).inc()
+
+
+def _host_key(url: str) -> tuple[str, str]:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}", parts.hostname or ""
+
+
+class ProviderTransport:
+    """Process-wide keep-alive HTTP sessions, one pooled session per host.
+
+    Adapters call ``post`` instead of ``requests.post`` so TCP+TLS handshakes are
+    paid once per pooled connection rather than once per frame. ``apost`` is the
+    asyncio equivalent backed by one ``httpx.AsyncClient`` per host and event loop.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        timeout_s: float = 30.0,
+        hosts: Dict[str, Dict[str, int]] | None = None,
+    ) -> None:
+        self.pool_connections = int(pool_connections)
+        self.pool_maxsize = int(pool_maxsize)
+        self.timeout_s = float(timeout_s)
+        self.hosts = hosts or {}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _pool_sizes(self, hostname: str) -> tuple[int, int]:
+        override = self.hosts.get(hostname, {})
+        return (
+            int(override.get("pool_connections", self.pool_connections)),
+            int(override.get("pool_maxsize", self.pool_maxsize)),
+        )
+
+    def session(self, url: str) -> requests.Session:
+        key, hostname = _host_key(url)
+        sess = self._sessions.get(key)
+        if sess is not None:
+            return sess
+        with self._lock:
+            sess = self._sessions.get(key)
+            if sess is None:
+                pool_connections, pool_maxsize = self._pool_sizes(hostname)
+                adapter = _PooledAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+                sess = requests.Session()
+                sess.mount("http://", adapter)
+                sess.mount("https://", adapter)
+                self._sessions[key] = sess
+        return sess
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout_s)
+        return self.session(url).post(url, **kwargs)
+
+    def async_client(self, url: str) -> httpx.AsyncClient:
+        key, hostname = _host_key(url)
+        loop = asyncio.get_running_loop()
+        clients = self._async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            _, maxsize = self._pool_sizes(hostname)
+            client = httpx.AsyncClient(
+                timeout=self.timeout_s,
+                limits=httpx.Limits(max_connections=maxsize, max_keepalive_connections=maxsize),
+            )
+            clients[key] = client
+        return client
+
+    async def apost(self, url: str, **kwargs: Any) -> httpx.Response:
+        kwargs.setdefault("timeout", self.timeout_s)
+        return await self.async_client(url).post(url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with _stats_lock:
+            return {h: dict(v) for h, v in _stats.items()}
+
+    def close(self) -> None:
+        with self._lock:
+            for sess in self._sessions.values():
+                sess.close()
+            self._sessions.clear()
+
+
+_singleton: ProviderTransport | None = None
+_singleton_lock = threading.Lock()
+
+
+def get_transport() -> ProviderTransport:
+    global _singleton
+    if _singleton is not None:
+        return _singleton
+    with _singleton_lock:
+        if _singleton is None:
+            try:
+                cfg = load_providers_config().get("transport", {}) or {}
+            except Exception:
+                cfg = {}
+            _singleton = ProviderTransport(
+                pool_connections=cfg.get("pool_connections", 4),
+                pool_maxsize=cfg.get("pool_maxsize", 16),
+                timeout_s=cfg.get("timeout_s", 30.0),
+                hosts=cfg.get("hosts") or {},
+            )
+    return _singleton
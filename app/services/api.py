@@ -1,29 +1,59 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
+from fastapi import BackgroundTasks, FastAPI, File, Form, Query, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
-import base64
+from itertools import count
 from pathlib import Path
+import shutil
+from typing import Iterator
 import numpy as np
 import cv2
 
-from .schemas import EvaluateRequest, ReportRequest, RunFrameRequest, RunVideoRequest
+from .schemas import RUN_ID_PATTERN, EvaluateRequest, ProfileName, ReportRequest, RunFrameRequest, RunVideoRequest
 from .metrics import get_metrics_registry
+from .event_index import project as project_event
 from .storage import RunRegistry
-from app.utils.config import load_providers_config
-from app.providers.detection.replicate import ReplicateDetector
-from app.utils.viz import draw_boxes, draw_track_ids, overlay_soft_masks, draw_ocr_labels
+from app.utils.config import load_profile_config, load_providers_config
+from app.utils.frame import Frame
+from app.utils.masks import decode as decode_mask, normalize as normalize_mask
+from app.utils.viz import RenderSpec, draw_boxes, render
 from app.utils.timing import StageTimer, timed
-from app.providers.tracking.bytetrack import SimpleTracker
-from app.providers.segmentation.hf import HfSegmentation
-from app.providers.ocr.replicate_paddleocr import ReplicatePaddleOcr
-
-
-app = FastAPI(title="Perception Ops Lab API", version="0.1.0")
+from app.providers.tracking.bytetrack import ByteTracker
+from app.providers.base import ainfer
+from app.providers.detection.batch import DetectionBatch
+from app.providers.factory import get_detector, get_ocr, get_segmenter
+from app.providers.resilience import breaker_states
+from app.pipelines.frame_executor import FrameExecutor, FrameResults, stage_timeouts
+from app.pipelines.keyframes import KeyframeScheduler, mean_confidence
+from app.pipelines.pacing import FramePacer
+from app.pipelines.postprocess import BoxFilter
+from app.pipelines.preprocess import PreparedFrame, prepare_frame, restore_results
+from app.pipelines.staged import Envelope, Stage, StagedPipeline
+from app.pipelines.tiling import TileJob, detect_tiles, prepare_tiles
+from app.pipelines.video_pipeline import MotionGate
+from app.pipelines.video_sink import SinkItem, VideoSink
+
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI):
+    yield
+    # Buffered run events reach events.jsonl before the process exits
+    await run_in_threadpool(registry.close)
+
+
+app = FastAPI(title="Perception Ops Lab API", version="0.1.0", lifespan=_lifespan)
 
 # Enable CORS for local Streamlit UI
 _cors_origins = os.getenv("CORS_ALLOW_ORIGINS", "http://localhost:8501,http://127.0.0.1:8501").split(",")
@@ -37,6 +67,51 @@ app.add_middleware(
 registry = RunRegistry()
 metrics = get_metrics_registry()
 _stop_requested: bool = False
+_RUN_ID_RE = re.compile(RUN_ID_PATTERN)
+
+
+@dataclass
+class _RunSession:
+    """State shared by the frames posted to one run."""
+
+    # Track IDs persist across the run's frames
+    tracker: ByteTracker = field(default_factory=ByteTracker)
+    # frame_id of each /run_frame event, increasing for the run's lifetime
+    frame_ids: Iterator[int] = field(default_factory=count)
+
+
+_sessions: "OrderedDict[str, _RunSession]" = OrderedDict()
+_sessions_lock = threading.Lock()
+_MAX_RUN_SESSIONS = 8
+# Latest state of the /run_video runs started by this process, polled through /runs/{run_id}
+_video_runs: "OrderedDict[str, dict]" = OrderedDict()
+_MAX_VIDEO_RUNS = 64
+
+
+def _next_frame_id(run_id: str) -> int:
+    # Frames after the last one logged, so numbering survives eviction and restarts
+    try:
+        return int(json.loads(registry.read_last_event(run_id) or "{}").get("frame_id", -1)) + 1
+    except (ValueError, TypeError, AttributeError):
+        return 0
+
+
+def _run_session(run_id: str) -> _RunSession:
+    with _sessions_lock:
+        session = _sessions.pop(run_id, None) or _RunSession(frame_ids=count(_next_frame_id(run_id)))
+        _sessions[run_id] = session
+        while len(_sessions) > _MAX_RUN_SESSIONS:
+            _sessions.popitem(last=False)
+        return session
+
+
+def _run_error(run_id: str) -> JSONResponse | None:
+    """400 for an id that cannot name a run directory, 404 for a run that does not exist."""
+    if not _RUN_ID_RE.match(run_id):
+        return JSONResponse({"error": f"invalid run_id: {run_id!r}"}, status_code=400)
+    if not (registry.base / run_id).is_dir():
+        return JSONResponse({"error": f"run not found: {run_id}"}, status_code=404)
+    return None
 
 
 @app.get("/health")
@@ -59,95 +134,189 @@ def health_providers() -> dict:
     except Exception:
         prov = {}
     ready["replicate_paddleocr_version"] = bool(prov.get("version"))
-    return {"status": "ok", "providers": ready}
+    return {"status": "ok", "providers": ready, "breakers": breaker_states()}
+
+
+def _batch(dets) -> DetectionBatch:
+    # Providers return batches; cached results from older versions may be lists
+    return DetectionBatch.coerce(dets)
+
+
+_ANNOTATED_MODES = ("b64", "binary", "none")
 
 
 @app.post("/run_frame")
-def run_frame(req: RunFrameRequest) -> dict:
-    # Process a single frame and persist artifacts
-    run_id = registry.ensure_run()
+async def run_frame(req: RunFrameRequest) -> dict:
+    # Process a single frame and persist artifacts; the base64 is kept for reuse
+    frame = Frame.from_b64(req.image_b64)
+    event, _ = await _process_frame(frame, req.profile, req.provider_override, req.overlay_opts, "b64", req.run_id)
+    return event
+
+
+@app.post("/run_frame/raw")
+async def run_frame_raw(
+    request: Request,
+    profile: ProfileName = "realtime",
+    annotated: str = "b64",
+    class_include: list[str] | None = Query(default=None),
+    run_id: str | None = Query(default=None, pattern=RUN_ID_PATTERN),
+) -> Response:
+    """Raw JPEG/PNG request body; options travel as query parameters."""
+    data = await request.body()
+    overlay_opts = {"class_include": class_include} if class_include else None
+    return await _frame_response(Frame.from_bytes(data), profile, None, overlay_opts, annotated, run_id)
+
+
+@app.post("/run_frame/upload")
+async def run_frame_upload(
+    file: UploadFile = File(...),
+    profile: ProfileName = Form("realtime"),
+    annotated: str = Form("b64"),
+    provider_override: str | None = Form(None),
+    overlay_opts: str | None = Form(None),
+    run_id: str | None = Form(None, pattern=RUN_ID_PATTERN),
+) -> Response:
+    """Multipart upload; ``provider_override``/``overlay_opts`` are JSON-encoded form fields."""
+    data = await file.read()
+    try:
+        override = json.loads(provider_override) if provider_override else None
+        opts = json.loads(overlay_opts) if overlay_opts else None
+    except json.JSONDecodeError as e:
+        return JSONResponse({"error": f"invalid JSON form field: {e}"}, status_code=422)
+    return await _frame_response(Frame.from_bytes(data), profile, override, opts, annotated, run_id)
+
+
+async def _frame_response(
+    frame: Frame,
+    profile: str,
+    provider_override: dict | None,
+    overlay_opts: dict | None,
+    annotated: str,
+    run_id: str | None = None,
+) -> Response:
+    """``annotated=binary`` answers with the JPEG itself and the event in ``X-Frame-Event``."""
+    if annotated not in _ANNOTATED_MODES:
+        return JSONResponse({"error": f"annotated must be one of {list(_ANNOTATED_MODES)}"}, status_code=422)
+    event, jpg_bytes = await _process_frame(frame, profile, provider_override, overlay_opts, annotated, run_id)
+    if annotated == "binary" and jpg_bytes is not None:
+        return Response(content=jpg_bytes, media_type="image/jpeg", headers={"X-Frame-Event": json.dumps(event)})
+    return JSONResponse(event)
+
+
+async def _process_frame(
+    frame: Frame,
+    profile: str,
+    provider_override: dict | None,
+    overlay_opts: dict | None,
+    annotated: str,
+    run_id: str | None = None,
+) -> tuple[dict, bytes | None]:
+    # The client's session id keys the run and its tracker; a fresh run otherwise
+    run_id = registry.ensure_run(run_id)
     # Minimal provider wiring
     providers = load_providers_config()
     det_cfg = providers.get("detection", {})
-    if req.provider_override and isinstance(req.provider_override, dict):
-        det_cfg = req.provider_override.get("detection", det_cfg)
-    det_provider = det_cfg.get("provider", "replicate")
+    ocr_cfg = providers.get("ocr", {})
+    if provider_override and isinstance(provider_override, dict):
+        det_cfg = provider_override.get("detection", det_cfg)
+        ocr_cfg = provider_override.get("ocr", ocr_cfg)
     det_model = det_cfg.get("model", "ultralytics/yolov8")
-    boxes = []
+    # Detection, segmentation and OCR run concurrently; frame latency is the slowest stage
+    detector = get_detector(det_cfg, profile)
+    prepared, tiles, pre_ms = await run_in_threadpool(_prepare_frame, frame, profile, detector is not None)
+    # A tiled profile sends detection per tile; segmentation and OCR still see the whole frame
+    executor = FrameExecutor(
+        detector=None if tiles else detector,
+        segmenter=get_segmenter(providers.get("segmentation", {}), profile),
+        ocr=get_ocr(ocr_cfg, profile),
+        timeouts_s=stage_timeouts(providers),
+    )
+    profile_cfg = load_profile_config(profile)
+    if prepared is not None and tiles:
+        nms_iou = float(profile_cfg.get("nms_iou", 0.5))
+        results, (boxes, tile_errors, tiles_ms) = await asyncio.gather(
+            executor.run(prepared.frame), detect_tiles(detector, tiles, nms_iou)
+        )
+        results = restore_results(results, prepared.geometry)
+        results.boxes = boxes
+        results.errors.extend(f"det: {e}" for e in tile_errors)
+        results.timings_ms["tiles"] = tiles_ms
+    elif prepared is not None:
+        results = restore_results(await executor.run(prepared.frame), prepared.geometry)
+    else:
+        # Undecodable input is forwarded as-is; providers may still accept it
+        results = await executor.run(frame)
+    results.timings_ms["pre"] = pre_ms
+    box_filter = BoxFilter.from_profile(profile_cfg, overlay_opts)
+    render_spec = RenderSpec.from_profile(profile_cfg, overlay_opts)
+    # Drawing and encoding are CPU-bound; keep them off the event loop
+    return await run_in_threadpool(_finish_frame, run_id, det_model, results, frame, box_filter, render_spec, annotated)
+
+
+def _prepare_frame(
+    frame: Frame, profile: str, tiled: bool = False
+) -> tuple[PreparedFrame | None, list[TileJob] | None, float]:
+    """Decode the upload once and letterbox it to the profile's input size for the providers.
+
+    With ``tiled`` and a profile that enables tiling, the detector's tiles are cut here too.
+    """
     timer = StageTimer()
-    if det_provider == "replicate":
-        with timed(timer, "model"):
-            det = ReplicateDetector(det_model)
-            boxes = [
-                {
-                    "x1": d.x1,
-                    "y1": d.y1,
-                    "x2": d.x2,
-                    "y2": d.y2,
-                    "score": d.score,
-                    "cls": d.cls,
-                }
-                for d in det.infer(req.image_b64)
-            ]
-
-    # Decode input and produce annotated overlay if possible
-    annotated_b64 = None
+    tiles = None
+    with timed(timer, "pre"):
+        try:
+            profile_cfg = load_profile_config(profile)
+            prepared = prepare_frame(frame, profile_cfg)
+            if tiled:
+                tiles = prepare_tiles(frame, profile_cfg)
+        except Exception:
+            prepared = None
+    pre_ms = timer.timings_ms.get("pre", 0.0)
+    metrics.latency_pre_ms.observe(pre_ms)
+    metrics.upload_bytes.labels(profile=profile).observe(
+        prepared.upload_bytes if prepared is not None else len(frame.source_bytes or b"")
+    )
+    return prepared, tiles, pre_ms
+
+
+def _finish_frame(
+    run_id: str,
+    det_model: str,
+    results: FrameResults,
+    frame: Frame,
+    box_filter: BoxFilter,
+    render_spec: RenderSpec,
+    annotated: str,
+) -> tuple[dict, bytes | None]:
+    # Threshold, class filter and NMS before tracking and drawing see the boxes
+    boxes = box_filter.apply(_batch(results.boxes))
+    ocr_items = results.ocr
+
+    # Produce annotated overlay if the input decoded
+    jpg_bytes = None
+    annotated_frame = None
     annotated_path = None
-    try:
-        img_bytes = base64.b64decode(req.image_b64.encode("utf-8"))
-        arr = np.frombuffer(img_bytes, dtype=np.uint8)
-        img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-    except Exception:
-        img = None
 
+    # Tracks persist for the run; computed before drawing track IDs
+    session = _run_session(run_id)
+    tracks = session.tracker.update(boxes)
+    img = frame.pixels
+    # Compact RLE/polygons with their size, for the overlay and the event log
+    shape = img.shape[:2] if img is not None else None
+    seg_masks = [m for m in (normalize_mask(m, shape) for m in results.masks) if isinstance(m, dict) and "size" in m]
     if img is not None:
-        box_tuples = [(b["x1"], b["y1"], b["x2"], b["y2"]) for b in boxes]
-        vis = draw_boxes(img, box_tuples) if box_tuples else img.copy()
-        # Real segmentation overlay if configured
+        # Masks travel encoded; decode only when they will be drawn
+        bin_masks = []
+        if render_spec.show_masks:
+            bin_masks = [d for d in map(decode_mask, seg_masks) if d is not None]
+        # Every enabled layer drawn into one copy of the frame
+        vis = render(img, replace(render_spec, boxes=boxes, masks=bin_masks, tracks=tracks, ocr=ocr_items))
         try:
-            seg = HfSegmentation(model_id="seg")
-            masks = seg.infer(req.image_b64)
-            # Expect either binary mask arrays or provider-specific; if binary buffers available, overlay
-            bin_masks = []
-            for m in masks:
-                buf = m.get("mask") if isinstance(m, dict) else None
-                if buf is not None:
-                    import base64 as _b64, numpy as _np
-                    raw = _b64.b64decode(buf)
-                    arr2 = _np.frombuffer(raw, dtype=_np.uint8)
-                    # Fallback shape; real endpoints should include shape metadata
-                    try:
-                        h, w = vis.shape[:2]
-                        bin_masks.append(arr2.reshape(h, w))
-                    except Exception:
-                        continue
-            if bin_masks:
-                vis = overlay_soft_masks(vis, bin_masks)
-        except Exception:
-            pass
-        # Simple tracking stub computed before drawing track IDs
-        tracks = SimpleTracker().update(boxes)
-        vis = draw_track_ids(vis, tracks)
-        # OCR labels if configured (Replicate PaddleOCR)
-        ocr_items = []
-        try:
-            ocr = providers.get("ocr", {})
-            ocr_provider = ocr.get("provider", "gcv")
-            if req.provider_override and isinstance(req.provider_override, dict):
-                ocr = req.provider_override.get("ocr", ocr)
-                ocr_provider = ocr.get("provider", ocr_provider)
-            if str(ocr_provider).startswith("replicate"):
-                version = ocr.get("version", "")
-                if version:
-                    ocr_items = ReplicatePaddleOcr(version=version).infer(req.image_b64)
-            vis = draw_ocr_labels(vis, ocr_items)
-        except Exception:
-            pass
-        ok, buf = cv2.imencode(".jpg", vis)
-        if ok:
-            jpg_bytes = buf.tobytes()
-            annotated_b64 = base64.b64encode(jpg_bytes).decode("utf-8")
-            run_dir = Path("runs") / run_id
+            annotated_frame = Frame(pixels=vis)
+            jpg_bytes = annotated_frame.encoded()
+        except ValueError:
+            annotated_frame = None
+        if jpg_bytes is not None:
+            run_dir = registry.base / run_id
             run_dir.mkdir(parents=True, exist_ok=True)
             existing = sorted(run_dir.glob("annotated_*.jpg"))
             if len(existing) < 3:
@@ -156,50 +325,97 @@ def run_frame(req: RunFrameRequest) -> dict:
                 out_path.write_bytes(jpg_bytes)
                 annotated_path = str(out_path)
 
-    # Apply overlay filters (class include) if provided
-    class_include = None
-    if req.overlay_opts and isinstance(req.overlay_opts, dict):
-        class_include = req.overlay_opts.get("class_include")
-    if class_include:
-        boxes = [b for b in boxes if b.get("cls") in class_include]
-
-    # Simple tracking already computed above when img is not None; ensure defined
-    if 'tracks' not in locals():
-        tracks = SimpleTracker().update(boxes)
-
     # Export basic metrics
-    if "model" in timer.timings_ms:
-        metrics.latency_model_ms.observe(timer.timings_ms["model"]) 
-
-    total_ms = sum(timer.timings_ms.values()) or 1e-6
-    fps_val = 1000.0 / total_ms
+    model_ms = results.timings_ms.get("model", 0.0)
+    metrics.latency_model_ms.observe(model_ms)
+    fps_val = 1000.0 / (model_ms or 1e-6)
 
     event = {
-        "boxes": boxes,
-        "masks": [],
+        "boxes": boxes.to_dicts(),
+        "masks": seg_masks,
         "tracks": tracks,
-        "ocr": ocr_items if 'ocr_items' in locals() else [],
-        "timings": {
-            "model": round(timer.timings_ms.get("model", 0.0), 2),
-        },
-        "frame_id": 0,
+        "ocr": ocr_items,
+        "timings": {k: round(v, 2) for k, v in results.timings_ms.items()},
+        "frame_id": next(session.frame_ids),
         "run_id": run_id,
         "ts": datetime.now(timezone.utc).isoformat(),
         "fps": fps_val,
         "provider_provenance": {"detector": f"replicate:{det_model}", "ocr": "gcv"},
-        "errors": [],
+        "errors": results.errors,
         "annotated_path": annotated_path,
-        "annotated_b64": annotated_b64,
     }
-    registry.append_event(run_id, json.dumps(event))
-    return event
+    if annotated == "b64":
+        event["annotated_b64"] = annotated_frame.b64() if annotated_frame is not None else None
+    registry.append_event(run_id, json.dumps(event), frame_id=event["frame_id"])
+    return event, jpg_bytes
+
 
+@app.post("/run_video", status_code=202)
+async def run_video(req: RunVideoRequest, background: BackgroundTasks) -> JSONResponse:
+    """Start the clip (up to ``duration_s`` of source time) and return its run id at once.
 
-@app.post("/run_video")
-def run_video(req: RunVideoRequest) -> JSONResponse:
-    # WebSocket stream is planned; acknowledge request for now
+    The run continues as a background task; events go to the run log as they
+    are produced and ``GET /runs/{run_id}`` reports its state and final summary.
+    """
+    cap = cv2.VideoCapture(req.video_path)
+    if not cap.isOpened():
+        cap.release()
+        return JSONResponse({"error": f"cannot open video: {req.video_path}"}, status_code=404)
     run_id = registry.ensure_run()
-    return JSONResponse({"status": "accepted", "run_id": run_id, "note": "WS stream TBD"})
+    _set_video_run({"run_id": run_id, "status": "running"})
+    background.add_task(_video_run_task, run_id, cap, req)
+    return JSONResponse({"run_id": run_id, "status": "running"}, status_code=202)
+
+
+def _set_video_run(state: dict) -> None:
+    _video_runs.pop(state["run_id"], None)
+    _video_runs[state["run_id"]] = state
+    while len(_video_runs) > _MAX_VIDEO_RUNS:
+        _video_runs.popitem(last=False)
+
+
+def _write_run_status(state: dict) -> None:
+    # Finished runs stay answerable after a restart
+    path = registry.base / state["run_id"] / "status.json"
+    try:
+        path.write_text(json.dumps(state), encoding="utf-8")
+    except OSError:
+        pass
+
+
+async def _video_run_task(run_id: str, cap: cv2.VideoCapture, req: RunVideoRequest) -> None:
+    async def _discard(event: dict) -> None:
+        return None
+
+    try:
+        summary = await _run_video_pipeline(
+            cap, req.profile, _discard, emit_video=req.emit_video, ab=req.ab, duration_s=req.duration_s, run_id=run_id
+        )
+        state = {"status": "done", **summary}
+    except Exception as e:
+        state = {"run_id": run_id, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+    finally:
+        cap.release()
+    _set_video_run(state)
+    await run_in_threadpool(_write_run_status, state)
+
+
+@app.get("/runs/{run_id}")
+def run_status(run_id: str) -> JSONResponse:
+    """A run's state: ``running``, ``done`` with the pipeline summary, or ``failed`` with its error.
+
+    Runs that were not started by ``/run_video`` report ``unknown``.
+    """
+    error = _run_error(run_id)
+    if error is not None:
+        return error
+    state = _video_runs.get(run_id)
+    if state is None:
+        try:
+            state = json.loads((registry.base / run_id / "status.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = {"run_id": run_id, "status": "unknown"}
+    return JSONResponse(state)
 
 
 @app.post("/run_control")
@@ -233,6 +449,7 @@ def report(req: ReportRequest) -> dict:
     from .report import build_pdf_report
     run_dir = Path("runs") / req.run_id
     run_dir.mkdir(parents=True, exist_ok=True)
+    registry.flush_events(req.run_id)
     path = build_pdf_report(run_dir)
     return {"report_path": str(path)}
 
@@ -256,67 +473,247 @@ def last_event() -> JSONResponse:
     return JSONResponse({"run_id": run_id, "event": parsed})
 
 
+def _truthy(value: str | None) -> bool:
+    return str(value or "").lower() in ("1", "true", "yes")
+
+
+async def _run_video_pipeline(
+    cap: cv2.VideoCapture,
+    profile: str,
+    on_event,
+    drop_policy: str | None = None,
+    live: bool = False,
+    emit_video: bool = False,
+    ab: bool = False,
+    duration_s: float | None = None,
+    run_id: str | None = None,
+) -> dict:
+    """Run a video through the staged pipeline, handing each event to ``on_event``.
+
+    With ``emit_video`` the overlays are rendered and encoded to
+    ``runs/<id>/out.mp4`` on the sink's own thread; ``ab`` also runs the other
+    profile's detector on keyframes and writes ``ab_composite.mp4`` in the same
+    pass. Both are copied to ``runs/latest`` for the UI when the run ends.
+    ``run_id`` continues a run the caller already created; a new one otherwise.
+    """
+    run_id = registry.ensure_run(run_id)
+    providers = load_providers_config()
+    det_cfg = providers.get("detection", {})
+    det_model = det_cfg.get("model", "ultralytics/yolov8")
+    det = get_detector(det_cfg, profile)
+    profile_cfg = load_profile_config(profile)
+    pipe_cfg = providers.get("pipeline") or {}
+    tracker = _run_session(run_id).tracker
+    global _stop_requested
+    _stop_requested = False
+    source_fps = cap.get(cv2.CAP_PROP_FPS)
+    # Cap the source at the profile's max_fps; live sources shed frames per
+    # drop_policy instead of queueing behind a slow provider
+    pacer = FramePacer(
+        cap.read,
+        source_fps=source_fps,
+        max_fps=profile_cfg.get("max_fps"),
+        policy=drop_policy or profile_cfg.get("drop_policy", "keep_latest"),
+        buffer=int(pipe_cfg.get("queue_size", 4)),
+        live=live,
+        should_stop=lambda: _stop_requested,
+    )
+    other = ("accuracy" if profile == "realtime" else "realtime") if ab else None
+    det_b = get_detector(det_cfg, other) if other else None
+    other_cfg = load_profile_config(other) if other else {}
+    sink = None
+    if emit_video:
+        run_dir = registry.base / run_id
+        sink = VideoSink(
+            run_dir / "out.mp4",
+            # The rate the pacer actually emits, so the clip plays at source speed
+            fps=pacer.output_fps,
+            queue_size=int(pipe_cfg.get("sink_queue_size", 16)),
+            ab_path=run_dir / "ab_composite.mp4" if other else None,
+            ab_labels=(profile, other or ""),
+            render_spec=RenderSpec.from_profile(profile_cfg),
+        )
+
+    # Only keyframes reach the detector; tracks are propagated in between
+    keyframes = KeyframeScheduler.from_profile(profile_cfg)
+    # Keyframes nearly identical to the last frame sent re-emit the previous
+    # frame's boxes and tracks without any call
+    gate = MotionGate.from_profile(profile_cfg)
+    last_boxes = DetectionBatch()
+    last_tracks: list = []
+    last_ab_boxes = DetectionBatch()
+    # Profile thresholds and NMS, applied before tracking and rendering
+    box_filter = BoxFilter.from_profile(profile_cfg)
+    filter_b = BoxFilter.from_profile(other_cfg)
+
+    def frames() -> Iterator[tuple]:
+        for paced in pacer:
+            if duration_s and paced.ts_s >= duration_s:
+                return
+            # The gate only sees keyframes, so its reference is always a frame
+            # the detector was actually sent
+            if not keyframes.should_detect():
+                yield paced, "propagated"
+            else:
+                yield paced, "detected" if gate.changed(paced.frame) else "reused"
+
+    def preprocess(item: tuple) -> tuple:
+        paced, source = item
+        if source != "detected":
+            return paced, source, None, None
+        # Letterbox to the profile's input size and encode for provider calls;
+        # a tiled profile is sent as overlapping crops instead
+        tiles = prepare_tiles(paced.frame, profile_cfg)
+        prepared = tiles or prepare_frame(paced.frame, profile_cfg)
+        uploads = [t.prepared for t in tiles] if tiles else [prepared]
+        metrics.upload_bytes.labels(profile=profile).observe(sum(p.upload_bytes for p in uploads))
+        prepared_b = None
+        if det_b is not None:
+            prepared_b = prepare_tiles(paced.frame, other_cfg) or prepare_frame(paced.frame, other_cfg)
+        return paced, source, prepared, prepared_b
+
+    async def _detect(detector, prepared, cfg: dict) -> tuple[list, list[str], float | None]:
+        # Source-frame boxes and per-tile errors, plus the tile latency when the frame was tiled
+        if isinstance(prepared, list):
+            return await detect_tiles(detector, prepared, float(cfg.get("nms_iou", 0.5)))
+        res = await ainfer(detector, prepared.frame)
+        return _batch(restore_results(FrameResults(boxes=_batch(res)), prepared.geometry).boxes), [], None
+
+    async def infer(item: tuple) -> tuple:
+        paced, source, prepared, prepared_b = item
+        errors: list[str] = []
+        dets = DetectionBatch()
+        dets_b = None
+        timings: dict = {}
+        if prepared is not None and det is not None:
+            calls = [_detect(det, prepared, profile_cfg)]
+            if prepared_b is not None:
+                calls.append(_detect(det_b, prepared_b, other_cfg))
+            out = await asyncio.gather(*calls, return_exceptions=True)
+            for tag, res in zip(("det", "ab"), out):
+                if isinstance(res, Exception):
+                    errors.append(f"{tag}: {type(res).__name__}: {res}")
+                    res = (DetectionBatch(), [], None)
+                boxes, tile_errors, tiles_ms = res
+                errors.extend(f"{tag}: {e}" for e in tile_errors)
+                if tag == "det":
+                    dets = boxes
+                    if tiles_ms is not None:
+                        timings["tiles"] = tiles_ms
+                else:
+                    dets_b = filter_b.apply(boxes)
+        return paced, source, dets, dets_b, errors, timings
+
+    def postprocess(item: tuple) -> dict:
+        nonlocal last_boxes, last_tracks, last_ab_boxes
+        paced, source, dets, dets_b, errors, timings = item
+        h, w = paced.frame.shape[:2]
+        if source == "propagated":
+            tracks = tracker.propagate(keyframes.decay)
+            keyframes.observe(mean_confidence(tracks))
+            boxes = DetectionBatch.coerce(tracks)
+        elif source == "detected":
+            boxes = box_filter.apply(dets)
+            tracks = tracker.update(boxes)
+        else:
+            # Unchanged scene: feeding the old boxes back to the tracker would
+            # count them as fresh matches, so the last frame is repeated as is
+            boxes, tracks = last_boxes, last_tracks
+        last_boxes, last_tracks = boxes, tracks
+        if dets_b is not None:
+            last_ab_boxes = dets_b
+        if sink is not None:
+            # Ordered stage: frames reach the encoder in sequence; never blocks
+            sink.submit(SinkItem(paced.frame, boxes, tracks, last_ab_boxes if other else None))
+        return {
+            "run_id": run_id,
+            "frame_id": paced.frame_id,
+            "dropped": paced.dropped,
+            "boxes": boxes.to_dicts(),
+            "boxes_source": source,
+            "tracks": tracks,
+            "masks": [],
+            "ocr": [],
+            "provider_provenance": {"detector": f"replicate:{det_model}", "ocr": ""},
+            "errors": errors,
+            "shape": {"w": w, "h": h},
+            "timings": timings,
+        }
+
+    # Decode, preprocess, inference, postprocess and delivery overlap; tracking
+    # and delivery see frames in order
+    queue_size = int(pipe_cfg.get("queue_size", 4))
+    pipeline = StagedPipeline(frames(), [
+        Stage("pre", preprocess, workers=int(pipe_cfg.get("preprocess_workers", 2)), queue_size=queue_size),
+        Stage("model", infer, workers=int(pipe_cfg.get("inference_workers", 4)), queue_size=queue_size),
+        Stage("post", postprocess, ordered=True, queue_size=queue_size),
+    ])
+    last_sent = [time.perf_counter(), 0.0]
+
+    async def send(env: Envelope) -> None:
+        now = time.perf_counter()
+        # Delivered frame rate, smoothed over a few frames
+        inst = 1.0 / max(now - last_sent[0], 1e-6)
+        last_sent[0] = now
+        last_sent[1] = inst if env.seq == 0 else 0.8 * last_sent[1] + 0.2 * inst
+        event = {
+            **env.value,
+            "ts": datetime.now(timezone.utc).isoformat(),
+            # Stage timings plus any the stages measured themselves (tiles)
+            "timings": {k: round(v, 2) for k, v in {**env.timings_ms, **env.value.get("timings", {})}.items()},
+            "fps": last_sent[1],
+        }
+        registry.append_event(run_id, json.dumps(event), frame_id=event["frame_id"])
+        metrics.fps.set(event["fps"])  # basic metric update
+        await on_event(event)
+
+    video = None
+    try:
+        await pipeline.run(send)
+    finally:
+        pacer.close()
+        # Ended or disconnected: the run's buffered events go to disk now
+        await run_in_threadpool(registry.close_run, run_id)
+        if sink is not None:
+            video = await run_in_threadpool(sink.close)
+            await run_in_threadpool(_publish_latest, video)
+    return {"run_id": run_id, "frames_in": pipeline.frames_in, "frames_out": pipeline.frames_out, "video": video}
+
+
+def _publish_latest(video: dict) -> None:
+    latest = Path("runs/latest")
+    latest.mkdir(parents=True, exist_ok=True)
+    for key, name in (("path", "out.mp4"), ("ab_path", "ab_composite.mp4")):
+        src = video.get(key)
+        if src and Path(src).exists():
+            shutil.copyfile(src, latest / name)
+
+
 @app.websocket("/ws/run_video")
 async def ws_run_video(ws: WebSocket) -> None:
+    """Stream per-frame events; ``emit_video=1`` ends with a ``{"video": {...}}`` summary."""
     await ws.accept()
     cap = None
     try:
         params = dict(ws.query_params)
         video_path = params.get("video_path", "data/samples/day.mp4")
-        profile = params.get("profile", "realtime")
-        run_id = registry.ensure_run()
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             await ws.send_json({"error": f"cannot open video: {video_path}"})
             await ws.close()
             return
-        frame_id = 0
-        timer = StageTimer()
-        providers = load_providers_config()
-        det_cfg = providers.get("detection", {})
-        det_model = det_cfg.get("model", "ultralytics/yolov8")
-        global _stop_requested
-        _stop_requested = False
-        while True:
-            ok, frame = cap.read()
-            if not ok:
-                break
-            if _stop_requested:
-                break
-            h, w = frame.shape[:2]
-            # Encode frame to base64 for provider calls
-            ok2, buf = cv2.imencode(".jpg", frame)
-            if not ok2:
-                break
-            b64 = base64.b64encode(buf.tobytes()).decode("utf-8")
-            # Detection
-            with timed(timer, "model"):
-                det = ReplicateDetector(det_model)
-                dets = det.infer(b64)
-            boxes = [{"x1": d.x1, "y1": d.y1, "x2": d.x2, "y2": d.y2, "score": d.score, "cls": d.cls} for d in dets]
-            # Tracking
-            tracks = SimpleTracker().update(boxes)
-            # Build event
-            total_ms = sum(timer.timings_ms.values()) or 1e-6
-            fps_val = 1000.0 / total_ms
-            event = {
-                "run_id": run_id,
-                "frame_id": frame_id,
-                "ts": datetime.now(timezone.utc).isoformat(),
-                "timings": {"model": round(timer.timings_ms.get("model", 0.0), 2)},
-                "fps": fps_val,
-                "boxes": boxes,
-                "tracks": tracks,
-                "masks": [],
-                "ocr": [],
-                "provider_provenance": {"detector": f"replicate:{det_model}", "ocr": ""},
-                "errors": [],
-                "shape": {"w": w, "h": h},
-            }
-            registry.append_event(run_id, json.dumps(event))
-            metrics.fps.set(event["fps"])  # basic metric update
-            await ws.send_json(event)
-            frame_id += 1
+        emit_video = _truthy(params.get("emit_video"))
+        summary = await _run_video_pipeline(
+            cap,
+            params.get("profile", "realtime"),
+            ws.send_json,
+            drop_policy=params.get("drop_policy"),
+            live=_truthy(params.get("live")),
+            emit_video=emit_video,
+            ab=_truthy(params.get("ab")),
+        )
+        if emit_video:
+            await ws.send_json({"run_id": summary["run_id"], "video": summary["video"]})
         await ws.close()
     except WebSocketDisconnect:
         return
@@ -342,29 +739,33 @@ def ab_compare(payload: dict) -> dict:
             cap.set(cv2.CAP_PROP_POS_FRAMES, total // 2)
     except Exception:
         pass
-    ok, frame = cap.read()
+    ok, pixels = cap.read()
     cap.release()
     if not ok:
         return {"ok": False, "error": "failed to read frame"}
-    ok2, buf = cv2.imencode(".jpg", frame)
-    if not ok2:
-        return {"ok": False, "error": "encode failure"}
-    b64 = base64.b64encode(buf.tobytes()).decode("utf-8")
+    frame = Frame(pixels=pixels)
     providers = load_providers_config()
     det_cfg = providers.get("detection", {})
-    det_model = det_cfg.get("model", "ultralytics/yolov8")
-    # Helper to annotate
-    def _annotate(img_b64: str) -> tuple[list[dict], np.ndarray]:
-        det = ReplicateDetector(det_model)
-        dets = det.infer(img_b64)
-        boxes = [{"x1": d.x1, "y1": d.y1, "x2": d.x2, "y2": d.y2} for d in dets]
-        arr = cv2.imdecode(np.frombuffer(base64.b64decode(img_b64), dtype=np.uint8), cv2.IMREAD_COLOR)
-        vis = draw_boxes(arr, [(b["x1"], b["y1"], b["x2"], b["y2"]) for b in boxes]) if boxes else arr
-        return boxes, vis
+
+    # Helper to annotate: each profile letterboxes to its own input size and
+    # boxes are mapped back onto the full-resolution frame
+    def _annotate(profile: str) -> tuple[list[dict], np.ndarray]:
+        # Shared cached detector: repeated comparisons of the same frame are cache hits
+        det = get_detector(det_cfg, profile)
+        try:
+            profile_cfg = load_profile_config(profile)
+            prepared = prepare_frame(frame, profile_cfg)
+            dets = _batch(det.infer(prepared.image_b64) if det is not None else None)
+            dets = _batch(restore_results(FrameResults(boxes=dets), prepared.geometry).boxes)
+            dets = BoxFilter.from_profile(profile_cfg).apply(dets)
+        except Exception:
+            dets = DetectionBatch()
+        vis = draw_boxes(frame, dets) if len(dets) else pixels.copy()
+        return dets.to_dicts(), vis
     # Realtime
-    _, vis_rt = _annotate(b64)
-    # Accuracy (same flow for now; in a real setup you would swap models/providers)
-    _, vis_ac = _annotate(b64)
+    _, vis_rt = _annotate("realtime")
+    # Accuracy
+    _, vis_ac = _annotate("accuracy")
     out = Path("runs/latest")
     out.mkdir(parents=True, exist_ok=True)
     cv2.imwrite(str(out / "realtime_frame.png"), vis_rt)
@@ -390,28 +791,57 @@ def events_snapshot(limit: int = 50) -> JSONResponse:
     run_id = registry.last_run_id()
     if not run_id:
         return JSONResponse({"run_id": None, "fps": [], "latency_pre": [], "latency_model": [], "latency_post": [], "frame_ids": []})
-    path = Path("runs") / run_id / "events.jsonl"
     fps: list[float] = []
     lpre: list[float] = []
     lmod: list[float] = []
     lpost: list[float] = []
     fids: list[int] = []
-    if path.exists():
-        lines = path.read_text(encoding="utf-8").splitlines()
-        for line in lines[-limit:]:
-            try:
-                obj = json.loads(line)
-                fids.append(int(obj.get("frame_id", 0)))
-                fps.append(float(obj.get("fps", 0.0)))
-                t = obj.get("timings", {})
-                lpre.append(float(t.get("pre", 0.0)))
-                lmod.append(float(t.get("model", 0.0)))
-                lpost.append(float(t.get("post", 0.0)))
-            except Exception:
-                continue
+    # Only the last ``limit`` lines are read, located through the run's offset index
+    for line in registry.tail_events(run_id, limit):
+        try:
+            obj = json.loads(line)
+            fids.append(int(obj.get("frame_id", 0)))
+            fps.append(float(obj.get("fps", 0.0)))
+            t = obj.get("timings", {})
+            lpre.append(float(t.get("pre", 0.0)))
+            lmod.append(float(t.get("model", 0.0)))
+            lpost.append(float(t.get("post", 0.0)))
+        except Exception:
+            continue
     return JSONResponse({"run_id": run_id, "fps": fps, "latency_pre": lpre, "latency_model": lmod, "latency_post": lpost, "frame_ids": fids})
 
 
+@app.get("/events_range")
+def events_range(
+    start: int = 0,
+    end: int | None = None,
+    fields: str | None = None,
+    run_id: str | None = None,
+    limit: int = 1000,
+) -> JSONResponse:
+    """Events with ``start <= frame_id <= end`` (end defaults to ``start``), oldest first.
+
+    ``fields`` is a comma-separated projection, e.g. ``frame_id,fps,timings.model``;
+    only the matching lines are read and parsed.
+    """
+    rid = run_id or registry.last_run_id()
+    if not rid:
+        return JSONResponse({"run_id": None, "events": []})
+    error = _run_error(rid)
+    if error is not None:
+        return error
+    stop = start if end is None else end
+    keys = [f.strip() for f in (fields or "").split(",") if f.strip()]
+    events = []
+    for line in registry.events_range(rid, start, stop, limit=max(0, limit)):
+        try:
+            obj = json.loads(line)
+        except Exception:
+            continue
+        events.append(project_event(obj, keys) if keys else obj)
+    return JSONResponse({"run_id": rid, "start": start, "end": stop, "events": events})
+
+
 @app.get("/load_metrics")
 def load_metrics(run_id: str | None = None) -> JSONResponse:
     rid = run_id or registry.last_run_id()
@@ -436,6 +866,7 @@ def export_run(payload: dict) -> dict:
     if not run_dir.exists():
         return {"zip_path": None, "error": "run dir not found"}
     import shutil
+    registry.flush_events(rid)
     zip_base = Path("runs") / f"{rid}_bundle"
     zip_file = shutil.make_archive(str(zip_base), "zip", str(run_dir))
     return {"zip_path": zip_file, "run_id": rid}
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+import time
 from typing import Protocol, Optional, Dict, Any
 import requests
 
@@ -56,13 +58,29 @@ class HttpClient:
         emit_video: bool = False,
         overlays: Optional[Dict[str, bool]] = None,
         thresholds: Optional[Dict[str, Any]] = None,
+        timeout_s: float = 120.0,
+        poll_s: float = 0.5,
     ) -> Dict[str, Any]:
+        """Start the run and poll ``/runs/{run_id}`` until it is no longer ``running``.
+
+        Returns the last state seen, which is still ``running`` if ``timeout_s`` passed first.
+        """
         resp = requests.post(
             f"{self.base}/run_video",
             json=_pack(video_path, profile, duration_s, emit_video, overlays, thresholds),
-            timeout=120,
+            timeout=30,
         )
         resp.raise_for_status()
+        state = resp.json()
+        deadline = time.monotonic() + timeout_s
+        while state.get("status") == "running" and time.monotonic() < deadline:
+            time.sleep(poll_s)
+            state = self.run_status(state["run_id"])
+        return state
+
+    def run_status(self, run_id: str) -> Dict[str, Any]:
+        resp = requests.get(f"{self.base}/runs/{run_id}", timeout=10)
+        resp.raise_for_status()
         return resp.json()
 
     def run_control(self, action: str) -> Dict[str, Any]:
@@ -70,6 +88,37 @@ class HttpClient:
         resp.raise_for_status()
         return resp.json()
 
+    def run_frame(
+        self,
+        image: bytes,
+        profile: str = "realtime",
+        overlay_opts: Optional[Dict[str, Any]] = None,
+        provider_override: Optional[Dict[str, Any]] = None,
+        filename: str = "frame.jpg",
+        run_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Upload raw image bytes; the annotated frame comes back as ``annotated_jpeg`` bytes.
+
+        Pass the ``run_id`` of the first response with later frames of the same
+        stream so they share one run and keep their track IDs.
+        """
+        form: Dict[str, str] = {"profile": profile, "annotated": "binary"}
+        if run_id:
+            form["run_id"] = run_id
+        if overlay_opts:
+            form["overlay_opts"] = json.dumps(overlay_opts)
+        if provider_override:
+            form["provider_override"] = json.dumps(provider_override)
+        resp = requests.post(f"{self.base}/run_frame/upload", files={"file": (filename, image)}, data=form, timeout=30)
+        resp.raise_for_status()
+        if resp.headers.get("content-type", "").startswith("image/"):
+            event = json.loads(resp.headers.get("X-Frame-Event", "{}"))
+            event["annotated_jpeg"] = resp.content
+            return event
+        event = resp.json()
+        event.setdefault("annotated_jpeg", None)
+        return event
+
     def ab_compare(self, video_path: str) -> Dict[str, Any]:
         resp = requests.post(f"{self.base}/ab_compare", json={"video_path": video_path}, timeout=60)
         resp.raise_for_status()
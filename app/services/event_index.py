@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# One fixed-width record per events.jsonl line, so record k sits at k * itemsize
+INDEX_DTYPE = np.dtype([("frame_id", "<i8"), ("offset", "<i8"), ("length", "<i8")])
+NO_FRAME_ID = -1
+
+
+def index_path(events_path: str | Path) -> Path:
+    """``runs/<id>/events.idx`` next to ``runs/<id>/events.jsonl``."""
+    return Path(events_path).with_suffix(".idx")
+
+
+def _frame_id(line: bytes) -> int:
+    try:
+        return int(json.loads(line).get("frame_id", NO_FRAME_ID))
+    except Exception:
+        return NO_FRAME_ID
+
+
+def records(frame_ids: Sequence[int], offsets: Sequence[int], lengths: Sequence[int]) -> bytes:
+    """Index records for lines written at ``offsets``; appended by the event writer."""
+    out = np.empty(len(offsets), dtype=INDEX_DTYPE)
+    out["frame_id"], out["offset"], out["length"] = frame_ids, offsets, lengths
+    return out.tobytes()
+
+
+def load(events_path: str | Path) -> np.ndarray:
+    """The run's index records (memory-mapped; only the pages a query touches are read)."""
+    path = index_path(events_path)
+    try:
+        n = path.stat().st_size // INDEX_DTYPE.itemsize
+    except OSError:
+        return np.empty(0, dtype=INDEX_DTYPE)
+    if not n:
+        return np.empty(0, dtype=INDEX_DTYPE)
+    return np.memmap(path, dtype=INDEX_DTYPE, mode="r", shape=(n,))
+
+
+def _indexed_end(entries: np.ndarray) -> int:
+    return int(entries[-1]["offset"] + entries[-1]["length"]) if len(entries) else 0
+
+
+def _scan(f, start: int) -> Tuple[List[Tuple[int, int, int]], List[bytes]]:
+    # Complete lines from ``start`` on; a torn final line (no newline) is left out
+    f.seek(start)
+    data = f.read()
+    rows: List[Tuple[int, int, int]] = []
+    lines: List[bytes] = []
+    pos = 0
+    while True:
+        nl = data.find(b"\n", pos)
+        if nl < 0:
+            break
+        line = data[pos:nl + 1]
+        if line.strip():
+            rows.append((_frame_id(line), start + pos, len(line)))
+            lines.append(line)
+        pos = nl + 1
+    return rows, lines
+
+
+def sync(events_path: str | Path) -> int:
+    """Index any lines of ``events.jsonl`` the sidecar does not cover yet; returns the file size.
+
+    Runs when a writer opens the log, so runs written before the index existed,
+    or cut short by a crash, are indexed once and then kept up to date.
+    """
+    events_path = Path(events_path)
+    idx = index_path(events_path)
+    if not events_path.exists():
+        return 0
+    entries = load(events_path)
+    size = events_path.stat().st_size
+    start = _indexed_end(entries)
+    if start > size:
+        # The log was replaced or truncated; start the index over
+        entries, start = np.empty(0, dtype=INDEX_DTYPE), 0
+    keep = len(entries) * INDEX_DTYPE.itemsize
+    del entries
+    with events_path.open("rb") as f:
+        rows, _ = _scan(f, start)
+    with idx.open("ab") as out:
+        # Drop a torn trailing record, and everything when starting over
+        out.truncate(keep)
+        if rows:
+            fids, offs, lens = zip(*rows)
+            out.write(records(fids, offs, lens))
+    return size
+
+
+def _read(f, entries: np.ndarray) -> List[bytes]:
+    if not len(entries):
+        return []
+    offs, lens = entries["offset"], entries["length"]
+    if np.array_equal(offs[1:], offs[:-1] + lens[:-1]):
+        # Consecutive lines: one read
+        f.seek(int(offs[0]))
+        blob = f.read(int(offs[-1] + lens[-1] - offs[0]))
+        return blob.splitlines()
+    out = []
+    for o, n in zip(offs.tolist(), lens.tolist()):
+        f.seek(o)
+        out.append(f.read(n).rstrip(b"\n"))
+    return out
+
+
+def _unindexed(f, entries: np.ndarray) -> Tuple[List[Tuple[int, int, int]], List[bytes]]:
+    # Lines appended past the index (e.g. a writer without one) are scanned, not lost
+    f.seek(0, os.SEEK_END)
+    end = _indexed_end(entries)
+    return _scan(f, end) if f.tell() > end else ([], [])
+
+
+def tail(events_path: str | Path, n: int) -> List[str]:
+    """The last ``n`` events, oldest first, reading only their bytes."""
+    events_path = Path(events_path)
+    if n <= 0 or not events_path.exists():
+        return []
+    entries = load(events_path)
+    with events_path.open("rb") as f:
+        _, extra = _unindexed(f, entries)
+        want = max(0, n - len(extra))
+        lines = _read(f, entries[len(entries) - want:] if want else entries[:0]) + [l.rstrip(b"\n") for l in extra]
+    return [l.decode("utf-8") for l in lines[-n:]]
+
+
+def frame_range(events_path: str | Path, start: int, end: int, limit: Optional[int] = None) -> List[str]:
+    """Events whose ``frame_id`` is in ``[start, end]``, in log order, at most ``limit``.
+
+    Video runs log frames in order, so the interval is found by binary search;
+    otherwise the index's frame ids are filtered in one vectorized pass. Only
+    the matching lines are read.
+    """
+    events_path = Path(events_path)
+    if not events_path.exists():
+        return []
+    entries = load(events_path)
+    fids = entries["frame_id"]
+    if len(fids) and bool(np.all(fids[1:] >= fids[:-1])):
+        lo, hi = np.searchsorted(fids, start, side="left"), np.searchsorted(fids, end, side="right")
+        picked = entries[lo:hi]
+    else:
+        picked = entries[(fids >= start) & (fids <= end)]
+    if limit is not None:
+        picked = picked[:max(0, int(limit))]
+    with events_path.open("rb") as f:
+        lines = _read(f, picked)
+        rows, extra = _unindexed(f, entries)
+    lines += [l.rstrip(b"\n") for (fid, _, _), l in zip(rows, extra) if start <= fid <= end]
+    if limit is not None:
+        lines = lines[:max(0, int(limit))]
+    return [l.decode("utf-8") for l in lines]
+
+
+def project(event: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Only ``fields`` of an event; ``a.b`` selects a nested key (``timings.model``)."""
+    out: Dict[str, Any] = {}
+    for name in fields:
+        cur: Any = event
+        parts = name.split(".")
+        for p in parts:
+            if not isinstance(cur, dict) or p not in cur:
+                break
+            cur = cur[p]
+        else:
+            dst = out
+            for p in parts[:-1]:
+                dst = dst.setdefault(p, {})
+            dst[parts[-1]] = cur
+    return out
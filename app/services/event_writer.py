@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services import event_index
+from app.services.metrics import get_metrics_registry
+
+
+FSYNC_POLICIES = ("never", "batch", "close")
+
+logger = logging.getLogger(__name__)
+
+
+class EventWriter:
+    """Appends one run's ``events.jsonl`` lines from a background thread.
+
+    ``write`` only appends to an in-memory batch under a lock, so frame
+    handlers never touch the file. The thread writes the batch with one
+    ``write`` call on a file it keeps open once ``flush_events`` lines or
+    ``flush_bytes`` are pending, or ``flush_interval_s`` after the oldest
+    pending line. ``fsync`` is ``never`` (leave it to the OS), ``batch`` (after
+    every flushed batch) or ``close`` (once, when the run ends). Any number of
+    threads may call ``write``; lines keep the order ``write`` was called in.
+
+    Each batch also appends a ``(frame_id, offset, length)`` record per line
+    to the ``events.idx`` sidecar (``event_index``), after the lines themselves,
+    so the index never points past the data.
+
+    Both files are opened by the constructor, which logs and raises the
+    ``OSError`` if that fails: a run whose log cannot be opened is refused up
+    front instead of losing its events in the background.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        flush_events: int = 64,
+        flush_bytes: int = 1 << 20,
+        flush_interval_s: float = 0.5,
+        fsync: str = "batch",
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path = Path(path)
+        self.flush_events = max(1, int(flush_events))
+        self.flush_bytes = max(1, int(flush_bytes))
+        self.flush_interval_s = float(flush_interval_s)
+        self.fsync = fsync
+        self.written = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last: Optional[str] = None
+        self._pending: List[Tuple[str, int]] = []
+        self._pending_bytes = 0
+        self._oldest = 0.0
+        # Sequence numbers of lines accepted, on disk and asked for by flush()
+        self._seq = 0
+        self._done = 0
+        self._wanted = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        m = get_metrics_registry()
+        self._flush_ms = m.event_flush_ms
+        self._events = m.events_written
+        self._f, self._idx, self._offset = self._open()
+        self._thread = threading.Thread(target=self._run, name=f"events-{self.path.parent.name}", daemon=True)
+        self._thread.start()
+
+    def write(self, event_json: str, frame_id: Optional[int] = None) -> None:
+        """Queue one event line; returns immediately. ``frame_id`` keys the line in the index."""
+        line = event_json.rstrip("\n") + "\n"
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"event writer for {self.path} is closed")
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append((line, event_index.NO_FRAME_ID if frame_id is None else int(frame_id)))
+            self._pending_bytes += len(line)
+            self._seq += 1
+            self.last = line.rstrip("\n")
+            # The first pending line starts the thread's flush_interval_s timer
+            if len(self._pending) in (1, self.flush_events) or self._pending_bytes >= self.flush_bytes:
+                self._cond.notify_all()
+
+    def _due(self) -> bool:
+        return bool(self._pending) and (
+            self._closed
+            or len(self._pending) >= self.flush_events
+            or self._pending_bytes >= self.flush_bytes
+            or time.monotonic() - self._oldest >= self.flush_interval_s
+            or self._done < self._wanted
+        )
+
+    def _open(self) -> Tuple[Any, Any, int]:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Lines already in the log (an earlier writer, a pre-index run) are indexed first
+            offset = event_index.sync(self.path)
+            f = self.path.open("ab")
+            try:
+                idx = event_index.index_path(self.path).open("ab")
+            except BaseException:
+                f.close()
+                raise
+        except OSError:
+            logger.exception("cannot open event log %s", self.path)
+            raise
+        return f, idx, offset
+
+    def _run(self) -> None:
+        f, idx, offset = self._f, self._idx, self._offset
+        with f, idx:
+            while True:
+                with self._cond:
+                    while not self._due() and not (self._closed and not self._pending):
+                        timeout = None
+                        if self._pending:
+                            timeout = max(0.0, self._oldest + self.flush_interval_s - time.monotonic())
+                        self._cond.wait(timeout)
+                    if self._closed and not self._pending:
+                        break
+                    batch, self._pending, self._pending_bytes = self._pending, [], 0
+                    upto = self._seq
+                t0 = time.perf_counter()
+                try:
+                    data = [line.encode("utf-8") for line, _ in batch]
+                    f.write(b"".join(data))
+                    f.flush()
+                    lengths = [len(d) for d in data]
+                    ends = list(accumulate(lengths, initial=offset))
+                    idx.write(event_index.records([fid for _, fid in batch], ends[:-1], lengths))
+                    idx.flush()
+                    offset = ends[-1]
+                    if self.fsync == "batch":
+                        os.fsync(f.fileno())
+                        os.fsync(idx.fileno())
+                except Exception:
+                    self.errors += 1
+                    logger.exception("failed to write %d events to %s", len(batch), self.path)
+                    # Keep later records aligned with whatever did reach the file
+                    offset = os.fstat(f.fileno()).st_size
+                self._flush_ms.observe((time.perf_counter() - t0) * 1000.0)
+                self._events.inc(len(batch))
+                with self._cond:
+                    self.written += len(batch)
+                    self.flushes += 1
+                    self._done = upto
+                    self._cond.notify_all()
+            if self.fsync == "close":
+                try:
+                    os.fsync(f.fileno())
+                    os.fsync(idx.fileno())
+                except Exception:
+                    self.errors += 1
+                    logger.exception("failed to fsync %s", self.path)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued so far now; True once it is on disk."""
+        with self._cond:
+            target = self._seq
+            self._wanted = max(self._wanted, target)
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._done >= target or not self._thread.is_alive(), timeout)
+
+    def close(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Flush pending events, apply the ``close`` fsync and stop the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "events_written": self.written,
+            "flushes": self.flushes,
+            "errors": self.errors,
+        }
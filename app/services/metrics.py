@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, Gauge, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, Gauge, generate_latest
 
 
 @dataclass
@@ -11,7 +11,30 @@ class MetricsRegistry:
     latency_pre_ms: Histogram
     latency_model_ms: Histogram
     latency_post_ms: Histogram
+    latency_tiles_ms: Histogram
     fps: Gauge
+    pool_hits: Counter
+    pool_misses: Counter
+    cache_hits: Counter
+    cache_misses: Counter
+    cache_evictions: Counter
+    cache_disk_bytes: Gauge
+    calls_coalesced: Counter
+    provider_inflight: Gauge
+    provider_queue_depth: Gauge
+    provider_concurrency_limit: Gauge
+    hedges_fired: Counter
+    hedges_won: Counter
+    upload_bytes: Histogram
+    stage_queue_depth: Gauge
+    stage_utilization: Gauge
+    frames_dropped: Counter
+    gate_frames: Counter
+    gate_skip_ratio: Gauge
+    sink_frames: Counter
+    sink_encode_fps: Gauge
+    event_flush_ms: Histogram
+    events_written: Counter
 
     def export_prometheus_text(self) -> tuple[str, str]:
         return generate_latest(self.registry).decode("utf-8"), CONTENT_TYPE_LATEST
@@ -29,14 +52,63 @@ def get_metrics_registry() -> MetricsRegistry:
     latency_pre_ms = Histogram("latency_pre_ms", "Pre-processing latency", registry=reg, buckets=(1, 5, 10, 25, 50, 100, 250, 500))
     latency_model_ms = Histogram("latency_model_ms", "Model latency", registry=reg, buckets=(1, 5, 10, 25, 50, 100, 250, 500))
     latency_post_ms = Histogram("latency_post_ms", "Post-processing latency", registry=reg, buckets=(1, 5, 10, 25, 50, 100, 250, 500))
+    latency_tiles_ms = Histogram("latency_tiles_ms", "Tiled detection latency, all tiles of a frame", registry=reg, buckets=(10, 25, 50, 100, 250, 500, 1000, 2500))
     fps = Gauge("fps", "Frames per second", registry=reg)
+    pool_hits = Counter("provider_pool_hits", "Provider requests served on a pooled keep-alive connection", ["host"], registry=reg)
+    pool_misses = Counter("provider_pool_misses", "Provider requests that opened a new connection", ["host"], registry=reg)
+    cache_hits = Counter("inference_cache_hits", "Inference cache hits", ["tier"], registry=reg)
+    cache_misses = Counter("inference_cache_misses", "Inference cache misses (both tiers)", registry=reg)
+    cache_evictions = Counter("inference_cache_evictions", "Inference cache evictions", ["tier"], registry=reg)
+    cache_disk_bytes = Gauge("inference_cache_disk_bytes", "Bytes held by the on-disk inference cache", registry=reg)
+    calls_coalesced = Counter("provider_calls_coalesced", "Provider calls merged into an identical in-flight call", ["provider"], registry=reg)
+    provider_inflight = Gauge("provider_inflight", "Requests in flight to a provider", ["provider"], registry=reg)
+    provider_queue_depth = Gauge("provider_queue_depth", "Requests waiting for a provider concurrency slot", ["provider"], registry=reg)
+    provider_concurrency_limit = Gauge("provider_concurrency_limit", "Current adaptive concurrency limit", ["provider"], registry=reg)
+    hedges_fired = Counter("provider_hedges_fired", "Hedge requests sent after the primary exceeded its latency quantile", ["provider"], registry=reg)
+    hedges_won = Counter("provider_hedges_won", "Hedge requests that answered before the primary", ["provider"], registry=reg)
+    upload_bytes = Histogram(
+        "provider_upload_bytes", "Encoded frame bytes sent to providers", ["profile"], registry=reg,
+        buckets=(16e3, 32e3, 64e3, 128e3, 256e3, 512e3, 1e6, 2e6, 4e6),
+    )
+    stage_queue_depth = Gauge("pipeline_queue_depth", "Frames waiting in front of a video pipeline stage", ["stage"], registry=reg)
+    stage_utilization = Gauge("pipeline_stage_utilization", "Fraction of time a pipeline stage's workers are busy", ["stage"], registry=reg)
+    frames_dropped = Counter("video_frames_dropped", "Video frames skipped by frame pacing", ["reason"], registry=reg)
+    gate_frames = Counter("motion_gate_frames", "Video frames sent to providers or skipped as unchanged by the motion gate", ["result"], registry=reg)
+    gate_skip_ratio = Gauge("motion_gate_skip_ratio", "Fraction of keyframes the motion gate skipped in the current run", registry=reg)
+    sink_frames = Counter("video_sink_frames", "Frames written to or dropped by the output video sink", ["result"], registry=reg)
+    sink_encode_fps = Gauge("video_sink_encode_fps", "Output video render+encode throughput (frames/s of sink busy time)", registry=reg)
+    event_flush_ms = Histogram("event_log_flush_ms", "Time to write (and fsync) one batch of run events", registry=reg, buckets=(0.1, 0.5, 1, 5, 10, 25, 50, 100))
+    events_written = Counter("event_log_events_written", "Run events written to events.jsonl by the background writer", registry=reg)
 
     _singleton = MetricsRegistry(
         registry=reg,
         latency_pre_ms=latency_pre_ms,
         latency_model_ms=latency_model_ms,
         latency_post_ms=latency_post_ms,
+        latency_tiles_ms=latency_tiles_ms,
         fps=fps,
+        pool_hits=pool_hits,
+        pool_misses=pool_misses,
+        cache_hits=cache_hits,
+        cache_misses=cache_misses,
+        cache_evictions=cache_evictions,
+        cache_disk_bytes=cache_disk_bytes,
+        calls_coalesced=calls_coalesced,
+        provider_inflight=provider_inflight,
+        provider_queue_depth=provider_queue_depth,
+        provider_concurrency_limit=provider_concurrency_limit,
+        hedges_fired=hedges_fired,
+        hedges_won=hedges_won,
+        upload_bytes=upload_bytes,
+        stage_queue_depth=stage_queue_depth,
+        stage_utilization=stage_utilization,
+        frames_dropped=frames_dropped,
+        gate_frames=gate_frames,
+        gate_skip_ratio=gate_skip_ratio,
+        sink_frames=sink_frames,
+        sink_encode_fps=sink_encode_fps,
+        event_flush_ms=event_flush_ms,
+        events_written=events_written,
     )
     return _singleton
 
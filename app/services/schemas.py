@@ -6,6 +6,8 @@ from pydantic import BaseModel, Field
 
 
 ProfileName = Literal["realtime", "accuracy"]
+# Client-chosen run ids name a directory under runs/, so no separators or dot-only names
+RUN_ID_PATTERN = r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$"
 
 
 class RunFrameRequest(BaseModel):
@@ -14,12 +16,19 @@ class RunFrameRequest(BaseModel):
     # Optional override of provider/model for showcase flexibility
     provider_override: dict | None = None
     # Optional overlay/threshold options
-    overlay_opts: dict | None = None  # {"class_include": [str], "mask_opacity": float, "conf_thresh": float, "nms_iou": float}
+    overlay_opts: dict | None = None  # {"class_include": [str], "mask_opacity": float, "conf_thresh": float, "nms_iou": float, "soft_nms": bool}
+    # Session the frame belongs to; frames sharing it share a run and its tracker.
+    # Omitted: a new run is started and its id returned for the next frame
+    run_id: str | None = Field(default=None, pattern=RUN_ID_PATTERN)
 
 
 class RunVideoRequest(BaseModel):
     video_path: str
     profile: ProfileName = Field(default="realtime")
+    duration_s: float | None = None
+    # Render overlays to runs/<id>/out.mp4; ``ab`` adds the realtime/accuracy composite
+    emit_video: bool = False
+    ab: bool = False
 
 
 class EvaluateRequest(BaseModel):
@@ -2,18 +2,37 @@ from __future__ import annotations
 
 import datetime as dt
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Any, Dict, List
+
+from app.services import event_index
+from app.services.event_writer import EventWriter
+from app.utils.config import load_providers_config
+
+
+# Runs with an open event writer (and its thread); the least recently written is closed
+_MAX_OPEN_WRITERS = 8
 
 
 class RunRegistry:
-    def __init__(self, base_dir: str | os.PathLike | None = None) -> None:
+    def __init__(self, base_dir: str | os.PathLike | None = None, event_opts: Dict[str, Any] | None = None) -> None:
         self.base = Path(base_dir or Path.cwd() / "runs")
         self.base.mkdir(parents=True, exist_ok=True)
         self._last_run_id: str | None = None
+        # EventWriter options; None reads the ``events`` section of providers.yaml
+        self._event_opts = event_opts
+        self._writers: "OrderedDict[str, EventWriter]" = OrderedDict()
+        self._writers_lock = threading.Lock()
 
     def new_run_id(self) -> str:
         ts = dt.datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
-        return ts
+        # Runs started within the same second (background video runs) get a suffix
+        rid, n = ts, 1
+        while (self.base / rid).exists():
+            rid, n = f"{ts}-{n}", n + 1
+        return rid
 
     def ensure_run(self, run_id: str | None = None) -> str:
         rid = run_id or self.new_run_id()
@@ -26,20 +45,77 @@ class RunRegistry:
     def last_run_id(self) -> str | None:
         return self._last_run_id
 
-    def append_event(self, run_id: str, event_json: str) -> None:
-        path = self.base / run_id / "events.jsonl"
-        with path.open("a", encoding="utf-8") as f:
-            f.write(event_json.rstrip("\n") + "\n")
+    def _writer_opts(self) -> Dict[str, Any]:
+        if self._event_opts is None:
+            try:
+                self._event_opts = dict(load_providers_config().get("events") or {})
+            except Exception:
+                self._event_opts = {}
+        return self._event_opts
+
+    def event_writer(self, run_id: str) -> EventWriter:
+        """The run's background event writer, opened on first use."""
+        evicted = []
+        with self._writers_lock:
+            writer = self._writers.pop(run_id, None)
+            if writer is None:
+                writer = EventWriter(self.base / run_id / "events.jsonl", **self._writer_opts())
+            self._writers[run_id] = writer
+            while len(self._writers) > _MAX_OPEN_WRITERS:
+                evicted.append(self._writers.popitem(last=False)[1])
+        for w in evicted:
+            w.close()
+        return writer
+
+    def append_event(self, run_id: str, event_json: str, frame_id: int | None = None) -> None:
+        """Queue an event for the run's ``events.jsonl``; the write happens in the background.
+
+        ``frame_id`` keys the line in the run's offset index for ``events_range``.
+        Raises ``OSError`` if the log still cannot be opened after one retry.
+        """
+        try:
+            self.event_writer(run_id).write(event_json, frame_id)
+        except (RuntimeError, OSError):
+            # The writer was closed under us (evicted or run ended) or could not
+            # open the log; reopen once and let a second failure reach the caller
+            with self._writers_lock:
+                self._writers.pop(run_id, None)
+            self.event_writer(run_id).write(event_json, frame_id)
+
+    def flush_events(self, run_id: str, timeout: float | None = 5.0) -> None:
+        """Block until the run's queued events are in ``events.jsonl`` (before reading the file)."""
+        with self._writers_lock:
+            writer = self._writers.get(run_id)
+        if writer is not None:
+            writer.flush(timeout)
+
+    def close_run(self, run_id: str) -> Dict[str, Any] | None:
+        """Flush and stop the run's event writer, e.g. when its stream ends or disconnects."""
+        with self._writers_lock:
+            writer = self._writers.pop(run_id, None)
+        return writer.close() if writer is not None else None
+
+    def close(self) -> None:
+        """Flush and stop every open event writer (process shutdown)."""
+        with self._writers_lock:
+            writers, self._writers = list(self._writers.values()), OrderedDict()
+        for w in writers:
+            w.close()
 
     def read_last_event(self, run_id: str) -> str | None:
-        path = self.base / run_id / "events.jsonl"
-        if not path.exists():
-            return None
-        last = None
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    last = line.strip()
-        return last
+        with self._writers_lock:
+            writer = self._writers.get(run_id)
+        if writer is not None and writer.last is not None:
+            return writer.last
+        last = event_index.tail(self.base / run_id / "events.jsonl", 1)
+        return last[0] if last else None
 
+    def tail_events(self, run_id: str, n: int) -> List[str]:
+        """The run's last ``n`` event lines, read through the offset index."""
+        self.flush_events(run_id)
+        return event_index.tail(self.base / run_id / "events.jsonl", n)
 
+    def events_range(self, run_id: str, start: int, end: int, limit: int | None = None) -> List[str]:
+        """Event lines with ``start <= frame_id <= end``, read through the offset index."""
+        self.flush_events(run_id)
+        return event_index.frame_range(self.base / run_id / "events.jsonl", start, end, limit)
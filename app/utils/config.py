@@ -13,3 +13,10 @@ def load_providers_config(path: str | Path = None) -> Dict[str, Any]:
     return yaml.safe_load(cfg_path.read_text(encoding="utf-8")) or {}
 
 
+def load_profile_config(name: str = "realtime", path: str | Path = None) -> Dict[str, Any]:
+    cfg_path = Path(path) if path else Path(__file__).resolve().parents[1] / "configs" / "profiles" / f"{name}.yaml"
+    if not cfg_path.exists():
+        return {}
+    return yaml.safe_load(cfg_path.read_text(encoding="utf-8")) or {}
+
+
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+class Frame:
+    """One image, with its pixel array and encoded forms computed lazily and cached.
+
+    A frame can start from pixels (decoded video), encoded bytes (an upload) or
+    base64 (a JSON request). Whatever is asked for later is derived once and kept,
+    so a frame that arrived as JPEG and is sent on unchanged is never decoded and
+    re-encoded, and its base64 string is never rebuilt. Treat ``pixels`` as
+    read-only; drawing should copy it and wrap the result in a new ``Frame``.
+    """
+
+    def __init__(
+        self,
+        pixels: Optional[np.ndarray] = None,
+        encoded: Optional[bytes] = None,
+        b64: Optional[str] = None,
+    ) -> None:
+        self._pixels = pixels
+        self._source = encoded
+        self._source_b64 = b64
+        # (ext, quality) -> (bytes, base64 or None)
+        self._encodings: Dict[Tuple[str, Optional[int]], list] = {}
+        self._decoded = pixels is not None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Frame":
+        return cls(encoded=data)
+
+    @classmethod
+    def from_b64(cls, data: str) -> "Frame":
+        return cls(b64=data)
+
+    @property
+    def source_bytes(self) -> Optional[bytes]:
+        """The bytes this frame arrived as, if any (decoded from base64 once)."""
+        if self._source is None and self._source_b64 is not None:
+            with self._lock:
+                if self._source is None:
+                    try:
+                        self._source = base64.b64decode(self._source_b64.encode("utf-8"))
+                    except (binascii.Error, ValueError):
+                        self._source = b""
+        return self._source
+
+    @property
+    def source_b64(self) -> Optional[str]:
+        """Base64 of the bytes this frame arrived as, if any."""
+        if self._source_b64 is None and self._source is not None:
+            with self._lock:
+                if self._source_b64 is None:
+                    self._source_b64 = base64.b64encode(self._source).decode("utf-8")
+        return self._source_b64
+
+    @property
+    def pixels(self) -> Optional[np.ndarray]:
+        """BGR pixel array, decoded once; None if the source bytes are not an image."""
+        if not self._decoded:
+            data = self.source_bytes
+            with self._lock:
+                if not self._decoded:
+                    img = None
+                    if data:
+                        try:
+                            img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                        except Exception:
+                            img = None
+                    self._pixels = img
+                    self._decoded = True
+        return self._pixels
+
+    @property
+    def shape(self) -> Optional[Tuple[int, ...]]:
+        px = self.pixels
+        return None if px is None else px.shape
+
+    def _entry(self, ext: str, quality: Optional[int]) -> list:
+        key = (ext, quality)
+        entry = self._encodings.get(key)
+        if entry is None:
+            px = self.pixels
+            if px is None:
+                raise ValueError("frame has no decodable pixels to encode")
+            params = [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)] if quality is not None and ext == ".jpg" else []
+            with self._lock:
+                entry = self._encodings.get(key)
+                if entry is None:
+                    ok, buf = cv2.imencode(ext, px, params)
+                    if not ok:
+                        raise ValueError(f"{ext} encode failed")
+                    entry = self._encodings[key] = [buf.tobytes(), None]
+        return entry
+
+    def encoded(self, ext: Optional[str] = None, quality: Optional[int] = None) -> bytes:
+        """Encoded image bytes, cached per format and quality.
+
+        Without arguments, a frame that arrived encoded returns its original bytes;
+        otherwise it is encoded as ``ext`` (JPEG by default).
+        """
+        if ext is None and quality is None and self._has_source():
+            return self.source_bytes  # type: ignore[return-value]
+        return self._entry(ext or ".jpg", quality)[0]
+
+    def b64(self, ext: Optional[str] = None, quality: Optional[int] = None) -> str:
+        """Base64 of ``encoded(ext, quality)``, cached alongside it."""
+        if ext is None and quality is None and self._has_source():
+            return self.source_b64  # type: ignore[return-value]
+        entry = self._entry(ext or ".jpg", quality)
+        if entry[1] is None:
+            entry[1] = base64.b64encode(entry[0]).decode("utf-8")
+        return entry[1]
+
+    def _has_source(self) -> bool:
+        return self._source is not None or self._source_b64 is not None
+
+
+FrameLike = Union[Frame, np.ndarray]
+ImageInput = Union[Frame, str]
+
+
+def as_frame(image: FrameLike) -> Frame:
+    return image if isinstance(image, Frame) else Frame(pixels=image)
+
+
+def pixels_of(image: FrameLike) -> np.ndarray:
+    if isinstance(image, Frame):
+        if image.pixels is None:
+            raise ValueError("frame does not decode to an image")
+        return image.pixels
+    return image
+
+
+def as_b64(image: ImageInput) -> str:
+    """Provider wire format: base64 of the frame's encoded bytes."""
+    return image.b64() if isinstance(image, Frame) else image
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import base64
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+# Keys of a provider mask dict that carry pixels rather than metadata
+_PIXEL_KEYS = ("mask", "rle", "counts", "size", "shape", "polygons", "segmentation", "format")
+_PNG_MAGIC = b"\x89PNG"
+
+
+def _intervals(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Foreground runs of ``mask`` in column-major order, as ``(starts, ends)`` flat indices.
+
+    Only the mask's bounding rectangle is scanned; a zero row is appended to it
+    so no run crosses a column boundary and each run maps straight to the frame.
+    """
+    m = np.ascontiguousarray(mask)
+    if m.dtype != np.uint8:
+        m = (m > 0).astype(np.uint8)
+    x, y, w, h = cv2.boundingRect(m)
+    if not w or not h:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    roi = np.zeros((h + 1, w), dtype=np.int8)
+    roi[:h] = m[y:y + h, x:x + w] > 0
+    d = np.diff(roi.ravel(order="F"), prepend=np.int8(0))
+    starts, ends = np.flatnonzero(d == 1), np.flatnonzero(d == -1)
+    H = mask.shape[0]
+    return (starts // (h + 1) + x) * H + starts % (h + 1) + y, (ends // (h + 1) + x) * H + ends % (h + 1) + y
+
+
+def _counts_from_intervals(starts: np.ndarray, ends: np.ndarray, total: int) -> np.ndarray:
+    # COCO counts alternate background/foreground run lengths, background first;
+    # a run ending where the next starts (across a column) is one run
+    joined = np.flatnonzero(starts[1:] == ends[:-1])
+    starts, ends = np.delete(starts, joined + 1), np.delete(ends, joined)
+    edges = np.empty(2 * len(starts) + 2, dtype=np.int64)
+    edges[0], edges[-1] = 0, total
+    edges[1:-1:2], edges[2:-1:2] = starts, ends
+    counts = np.diff(edges)
+    return counts[:-1] if len(counts) > 1 and counts[-1] == 0 else counts
+
+
+def _counts_to_string(counts: Sequence[int]) -> str:
+    """pycocotools' compressed counts string (``rleToString``)."""
+    out: List[str] = []
+    for i, x in enumerate(counts):
+        x = int(x) - (int(counts[i - 2]) if i > 2 else 0)
+        more = True
+        while more:
+            c = x & 0x1F
+            x >>= 5
+            more = x != -1 if c & 0x10 else x != 0
+            if more:
+                c |= 0x20
+            out.append(chr(c + 48))
+    return "".join(out)
+
+
+def _string_to_counts(s: str) -> List[int]:
+    """Inverse of ``_counts_to_string`` (``rleFrString``)."""
+    counts: List[int] = []
+    p = 0
+    while p < len(s):
+        x = k = 0
+        more = True
+        while more:
+            c = ord(s[p]) - 48
+            x |= (c & 0x1F) << (5 * k)
+            more = bool(c & 0x20)
+            p += 1
+            k += 1
+            if not more and c & 0x10:
+                x |= -1 << (5 * k)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return counts
+
+
+def _counts(rle: Dict[str, Any]) -> np.ndarray:
+    c = rle["counts"]
+    return np.asarray(_string_to_counts(c) if isinstance(c, str) else c, dtype=np.int64)
+
+
+def encode_rle(mask: np.ndarray, compress: bool = True) -> Dict[str, Any]:
+    """COCO RLE of a binary mask: ``{"size": [h, w], "counts": ...}``.
+
+    ``counts`` is the pycocotools compressed string, or a list of ints with
+    ``compress=False``. Runs are column-major, starting with background.
+    """
+    h, w = mask.shape[:2]
+    counts = _counts_from_intervals(*_intervals(mask), h * w)
+    return {"size": [int(h), int(w)], "counts": _counts_to_string(counts) if compress else counts.tolist()}
+
+
+def decode_rle(rle: Dict[str, Any]) -> np.ndarray:
+    h, w = (int(v) for v in rle["size"])
+    counts = _counts(rle)
+    flat = np.zeros(h * w, dtype=np.uint8)
+    values = np.repeat((np.arange(len(counts)) % 2).astype(np.uint8), counts)
+    flat[:len(values)] = values[:h * w]
+    return flat.reshape(w, h).T.copy()
+
+
+def encode_polygons(mask: np.ndarray, epsilon: float = 1.0) -> Dict[str, Any]:
+    """Outer contours of a binary mask simplified to within ``epsilon`` px, COCO-style.
+
+    ``polygons`` are flat ``[x0, y0, x1, y1, ...]`` lists. Lossy: holes are
+    dropped and edges move by up to ``epsilon``.
+    """
+    h, w = mask.shape[:2]
+    m = mask if mask.dtype == np.uint8 else (mask > 0).astype(np.uint8)
+    contours, _ = cv2.findContours(m, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    polys: List[List[float]] = []
+    for c in contours:
+        approx = cv2.approxPolyDP(c, float(epsilon), True) if epsilon > 0 else c
+        if len(approx) >= 3:
+            polys.append(approx.reshape(-1).astype(float).tolist())
+    return {"size": [int(h), int(w)], "polygons": polys}
+
+
+def decode_polygons(poly: Dict[str, Any]) -> np.ndarray:
+    h, w = (int(v) for v in poly["size"])
+    out = np.zeros((h, w), dtype=np.uint8)
+    pts = [np.round(np.asarray(p, dtype=np.float64).reshape(-1, 2)).astype(np.int32) for p in poly.get("polygons") or []]
+    if pts:
+        cv2.fillPoly(out, pts, 1)
+    return out
+
+
+def encode(mask: np.ndarray, fmt: str = "rle", epsilon: float = 1.0) -> Dict[str, Any]:
+    """A binary mask as ``{"format", "size", ...}``: RLE (lossless) or simplified polygons."""
+    if fmt == "polygon":
+        return {"format": "polygon", **encode_polygons(mask, epsilon)}
+    return {"format": "rle", **encode_rle(mask)}
+
+
+def decode(m: Any) -> Optional[np.ndarray]:
+    """Dense ``(h, w)`` uint8 mask of an encoded mask; None when it cannot be decoded.
+
+    Encoded masks stay compact through transport, caching and the event log;
+    call this only where pixels are needed, i.e. rendering.
+    """
+    if isinstance(m, np.ndarray):
+        return m
+    if not isinstance(m, dict) or "size" not in m:
+        return None
+    try:
+        if m.get("format") == "polygon" or "polygons" in m:
+            return decode_polygons(m)
+        return decode_rle(m)
+    except Exception:
+        return None
+
+
+def _raw_to_dense(buf: Any, shape: Optional[Tuple[int, int]]) -> Optional[np.ndarray]:
+    data = base64.b64decode(buf) if isinstance(buf, str) else bytes(buf)
+    if data[:4] == _PNG_MAGIC:
+        # Hugging Face segmentation endpoints return each mask as a PNG
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        return None if img is None else (img > 0).astype(np.uint8)
+    if shape is None:
+        return None
+    return np.frombuffer(data, dtype=np.uint8).reshape(int(shape[0]), int(shape[1]))
+
+
+def normalize(m: Any, shape: Optional[Tuple[int, int]] = None, fmt: str = "rle", epsilon: float = 1.0) -> Any:
+    """Provider mask output in one encoded form, keeping its metadata (label, score, ...).
+
+    Accepts already-encoded masks (RLE with ``size``, string or list counts, or
+    polygons), dense arrays, base64 PNGs, and raw base64 ``uint8`` buffers; raw
+    buffers use their own ``shape``/``size`` when given, else ``shape`` (the
+    frame the provider saw). Unusable entries are returned unchanged.
+    """
+    if isinstance(m, np.ndarray):
+        return encode(m, fmt, epsilon)
+    if not isinstance(m, dict):
+        return m
+    meta = {k: v for k, v in m.items() if k not in _PIXEL_KEYS}
+    try:
+        if "counts" in m and "size" in m:
+            return {**meta, "format": "rle", "size": [int(v) for v in m["size"]], "counts": m["counts"]}
+        if isinstance(m.get("rle"), dict):
+            return {**meta, "format": "rle", "size": [int(v) for v in m["rle"]["size"]], "counts": m["rle"]["counts"]}
+        polys = m.get("polygons", m.get("segmentation"))
+        own = m.get("size") or m.get("shape")
+        if isinstance(polys, list) and (own or shape):
+            size = [int(v) for v in (own or shape)[:2]]
+            return {**meta, "format": "polygon", "size": size, "polygons": polys}
+        if m.get("mask") is not None:
+            dense = _raw_to_dense(m["mask"], tuple(own[:2]) if own else shape)
+            if dense is not None:
+                return {**meta, **encode(dense, fmt, epsilon)}
+    except Exception:
+        return m
+    return m
+
+
+def area(m: Dict[str, Any]) -> int:
+    """Foreground pixel count, read off the RLE run lengths."""
+    if m.get("format") == "polygon" or "polygons" in m:
+        m = to_rle(m)
+    return int(_counts(m)[1::2].sum())
+
+
+def to_rle(m: Dict[str, Any]) -> Dict[str, Any]:
+    """RLE form of an encoded mask; polygons are rasterised once."""
+    if m.get("format") == "polygon" or "polygons" in m:
+        return {"format": "rle", **encode_rle(decode_polygons(m))}
+    return m
+
+
+def _runs(m: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    edges = np.cumsum(_counts(to_rle(m)))
+    return edges[0::2][: len(edges) // 2], edges[1::2]
+
+
+def _run_overlap(a: Tuple[np.ndarray, np.ndarray], b: Tuple[np.ndarray, np.ndarray]) -> int:
+    # Every b run that can intersect a run of a is found by binary search; the
+    # overlap of each candidate pair is clipped interval length
+    a_s, a_e = a
+    b_s, b_e = b
+    if not len(a_s) or not len(b_s):
+        return 0
+    lo = np.searchsorted(b_e, a_s, side="right")
+    hi = np.searchsorted(b_s, a_e, side="left")
+    n = np.maximum(hi - lo, 0)
+    if not n.sum():
+        return 0
+    ai = np.repeat(np.arange(len(a_s)), n)
+    bj = np.repeat(lo, n) + (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n))
+    inter = np.minimum(a_e[ai], b_e[bj]) - np.maximum(a_s[ai], b_s[bj])
+    return int(np.clip(inter, 0, None).sum())
+
+
+def iou_matrix(a: Sequence[Dict[str, Any]], b: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """Pairwise mask IoU, ``(len(a), len(b))``, computed on run lengths without decoding.
+
+    Masks of different sizes never overlap.
+    """
+    ra, rb = [_runs(m) for m in a], [_runs(m) for m in b]
+    area_a = np.array([int((e - s).sum()) for s, e in ra], dtype=np.float64)
+    area_b = np.array([int((e - s).sum()) for s, e in rb], dtype=np.float64)
+    size_a, size_b = [tuple(m["size"]) for m in a], [tuple(m["size"]) for m in b]
+    out = np.zeros((len(a), len(b)), dtype=np.float64)
+    for i, x in enumerate(ra):
+        for j, y in enumerate(rb):
+            if size_a[i] != size_b[j]:
+                continue
+            inter = _run_overlap(x, y)
+            union = area_a[i] + area_b[j] - inter
+            out[i, j] = inter / union if union > 0 else 0.0
+    return out
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from app.utils import masks as mask_codec
 
 
 def iou_xyxy(a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]) -> float:
@@ -21,23 +25,76 @@ def iou_xyxy(a: Tuple[float, float, float, float], b: Tuple[float, float, float,
     return inter / union if union > 0 else 0.0
 
 
-def map50_placeholder(pred: List[Tuple[float, float, float, float]], gt: List[Tuple[float, float, float, float]]) -> float:
+def _xyxy(boxes: Any) -> np.ndarray:
+    # A DetectionBatch, an (n, 4) array or a list of (x1, y1, x2, y2) tuples
+    return np.asarray(getattr(boxes, "xyxy", boxes), dtype=np.float64).reshape(-1, 4)
+
+
+def iou_matrix(a: Any, b: Any) -> np.ndarray:
+    """Pairwise IoU, ``(len(a), len(b))``, of two sets of xyxy boxes."""
+    a, b = _xyxy(a), _xyxy(b)
+    iw = np.clip(np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]), 0, None)
+    ih = np.clip(np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]), 0, None)
+    inter = iw * ih
+    area_a = np.clip(a[:, 2] - a[:, 0], 0, None) * np.clip(a[:, 3] - a[:, 1], 0, None)
+    area_b = np.clip(b[:, 2] - b[:, 0], 0, None) * np.clip(b[:, 3] - b[:, 1], 0, None)
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.where(union > 0, union, 1.0), 0.0)
+
+
+def map50_placeholder(pred: Any, gt: Any) -> float:
     # Very rough placeholder: fraction of gt matched by IoU>=0.5
+    # ``pred``/``gt`` may be DetectionBatches, arrays or lists of xyxy tuples
+    g = _xyxy(gt)
+    p = _xyxy(pred)
+    if not len(g) or not len(p):
+        return 0.0
+    iou = iou_matrix(g, p)
+    used = np.zeros(len(p), dtype=bool)
     matched = 0
-    used = [False] * len(pred)
-    for g in gt:
-        best_iou = 0.0
-        best_idx = -1
-        for i, p in enumerate(pred):
-            if used[i]:
-                continue
-            iou = iou_xyxy(p, g)
-            if iou >= 0.5 and iou > best_iou:
-                best_iou = iou
-                best_idx = i
-        if best_idx >= 0:
-            used[best_idx] = True
+    for row in iou:
+        # Best still-unused prediction for this gt box, first on ties
+        j = int(np.argmax(np.where(used, 0.0, row)))
+        if row[j] >= 0.5 and not used[j]:
+            used[j] = True
             matched += 1
-    return matched / max(1, len(gt))
+    return matched / len(g)
+
+
+def mask_miou(pred: List[Dict[str, Any]], gt: List[Dict[str, Any]]) -> float:
+    """Mean over gt masks of the best-matching prediction's IoU; each prediction matches once.
+
+    Masks are encoded RLE/polygon dicts (``app.utils.masks``); IoU is taken on
+    run lengths, so no dense mask is materialized.
+    """
+    if not gt or not pred:
+        return 0.0
+    iou = mask_codec.iou_matrix(gt, pred)
+    used = np.zeros(len(pred), dtype=bool)
+    total = 0.0
+    for row in iou:
+        j = int(np.argmax(np.where(used, -1.0, row)))
+        if not used[j] and row[j] > 0:
+            used[j] = True
+            total += float(row[j])
+    return total / len(gt)
+
 
+def map50_by_box_source(events: List[Dict[str, Any]], gt_by_frame: Dict[int, List[Tuple[float, float, float, float]]]) -> Dict[str, Dict[str, float]]:
+    """Split detection accuracy by whether each frame's boxes were detected, propagated or reused.
 
+    ``events`` are per-frame log rows; frames without ground truth are only counted.
+    """
+    out: Dict[str, Dict[str, float]] = {}
+    for source in ("detected", "propagated", "reused"):
+        rows = [e for e in events if e.get("boxes_source", "detected") == source]
+        scored = [e for e in rows if int(e.get("frame_id", -1)) in gt_by_frame]
+        scores = [
+            map50_placeholder(
+                [(b["x1"], b["y1"], b["x2"], b["y2"]) for b in e.get("boxes", [])],
+                gt_by_frame[int(e["frame_id"])],
+            )
+            for e in scored
+        ]
+        out[source] = {"frames": len(rows), "map50": sum(scores) / len(scores) if scores else 0.0}
+    return out
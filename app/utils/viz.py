@@ -1,21 +1,28 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import cv2
 
+from app.utils.frame import FrameLike, pixels_of
 
-def draw_boxes(image: np.ndarray, boxes: List[Tuple[int, int, int, int]], color=(2, 171, 193)) -> np.ndarray:
-    out = image.copy()
+
+def draw_boxes(image: FrameLike, boxes: Any, color=(2, 171, 193)) -> np.ndarray:
+    """``boxes``: ``(x1, y1, x2, y2)`` tuples, an ``(n, 4)`` array or a ``DetectionBatch``."""
+    out = pixels_of(image).copy()
     bgr = (int(color[2]) if len(color) == 3 else 193, int(color[1]) if len(color) == 3 else 171, int(color[0]) if len(color) == 3 else 2)
-    for x1, y1, x2, y2 in boxes:
+    xyxy = getattr(boxes, "xyxy", boxes)
+    if isinstance(xyxy, np.ndarray):
+        xyxy = xyxy.astype(np.int64).tolist()
+    for x1, y1, x2, y2 in xyxy:
         cv2.rectangle(out, (int(x1), int(y1)), (int(x2), int(y2)), bgr, 2)
     return out
 
 
-def draw_track_ids(image: np.ndarray, tracks: List[dict]) -> np.ndarray:
-    out = image.copy()
+def draw_track_ids(image: FrameLike, tracks: List[dict]) -> np.ndarray:
+    out = pixels_of(image).copy()
     for t in tracks:
         x1, y1 = int(t.get("x1", 0)), int(t.get("y1", 0))
         tid = str(t.get("id", "?"))
@@ -28,7 +35,8 @@ def draw_track_ids(image: np.ndarray, tracks: List[dict]) -> np.ndarray:
     return out
 
 
-def overlay_soft_masks(image: np.ndarray, masks: List[np.ndarray], color=(2, 171, 193), alpha: float = 0.35) -> np.ndarray:
+def overlay_soft_masks(image: FrameLike, masks: List[np.ndarray], color=(2, 171, 193), alpha: float = 0.35) -> np.ndarray:
+    image = pixels_of(image)
     out = image.copy()
     overlay = image.copy()
     bgr = (int(color[2]), int(color[1]), int(color[0]))
@@ -37,8 +45,8 @@ def overlay_soft_masks(image: np.ndarray, masks: List[np.ndarray], color=(2, 171
     return cv2.addWeighted(overlay, alpha, out, 1 - alpha, 0)
 
 
-def draw_ocr_labels(image: np.ndarray, ocr_items: List[dict]) -> np.ndarray:
-    out = image.copy()
+def draw_ocr_labels(image: FrameLike, ocr_items: List[dict]) -> np.ndarray:
+    out = pixels_of(image).copy()
     for o in ocr_items:
         box = o.get("box") or []
         if len(box) == 4:
@@ -50,3 +58,112 @@ def draw_ocr_labels(image: np.ndarray, ocr_items: List[dict]) -> np.ndarray:
     return out
 
 
+# One colour per mask label, cycled; the first matches overlay_soft_masks
+MASK_PALETTE = np.array(
+    [(193, 171, 2), (60, 180, 75), (200, 130, 0), (48, 130, 245), (180, 30, 145), (240, 240, 70)], dtype=np.uint8
+)
+_BOX_BGR = (193, 171, 2)
+_TRACK_BGR = (0, 255, 255)
+_OCR_BGR = (0, 200, 120)
+
+
+@dataclass
+class RenderSpec:
+    """Layers to draw on a frame and which of them the profile's ``render`` flags enable.
+
+    ``boxes`` is a ``DetectionBatch``, an ``(n, 4)`` array or xyxy tuples;
+    ``masks`` are frame-sized arrays, non-zero inside the mask.
+    """
+
+    boxes: Any = ()
+    masks: Sequence[np.ndarray] = ()
+    tracks: Sequence[dict] = ()
+    ocr: Sequence[dict] = ()
+    show_boxes: bool = True
+    show_masks: bool = True
+    show_tracks: bool = True
+    show_ocr: bool = True
+    mask_alpha: float = 0.35
+
+    @classmethod
+    def from_profile(cls, profile_cfg: Dict[str, Any], overlay_opts: Optional[Dict[str, Any]] = None, **layers: Any) -> "RenderSpec":
+        flags = profile_cfg.get("render") or {}
+        opts = overlay_opts if isinstance(overlay_opts, dict) else {}
+        return cls(
+            show_boxes=bool(flags.get("show_boxes", True)),
+            show_masks=bool(flags.get("show_masks", True)),
+            show_tracks=bool(flags.get("show_tracks", True)),
+            show_ocr=bool(flags.get("show_ocr", True)),
+            mask_alpha=float(opts.get("mask_opacity", flags.get("mask_opacity", 0.35))),
+            **layers,
+        )
+
+
+def mask_labels(masks: Sequence[np.ndarray], shape: Tuple[int, int]) -> Tuple[Optional[np.ndarray], List[Tuple[int, int, int, int, int]]]:
+    """Fold binary masks into one ``uint8`` label map (0 = none, k = mask k; later masks win).
+
+    Also returns each mask's ``(k, x, y, w, h)`` bounding rectangle, so only the
+    covered regions are touched afterwards rather than the whole frame.
+    """
+    label: Optional[np.ndarray] = None
+    regions: List[Tuple[int, int, int, int, int]] = []
+    for k, m in enumerate(masks, start=1):
+        if m is None or m.shape[:2] != shape or k > 255:
+            continue
+        if m.dtype != np.uint8:
+            m = (m > 0).astype(np.uint8)
+        x, y, w, h = cv2.boundingRect(m)
+        if not w or not h:
+            continue
+        if label is None:
+            label = np.zeros(shape, dtype=np.uint8)
+        np.copyto(label[y:y + h, x:x + w], k, where=m[y:y + h, x:x + w] > 0)
+        regions.append((k, x, y, w, h))
+    return label, regions
+
+
+def render(image: FrameLike, spec: RenderSpec, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Draw every enabled layer of ``spec`` into a single output buffer.
+
+    The frame is copied once (into ``out`` when given, e.g. a reused buffer),
+    masks are folded into one label map and each covered pixel is
+    alpha-blended once, then boxes, track IDs/trails and OCR labels are drawn
+    in place. ``draw_*``/``overlay_soft_masks`` each copy the whole frame.
+    """
+    src = pixels_of(image)
+    if out is None:
+        out = src.copy()
+    elif out is not src:
+        np.copyto(out, src)
+    if spec.show_masks and len(spec.masks):
+        label, regions = mask_labels(spec.masks, out.shape[:2])
+        a = float(spec.mask_alpha)
+        for k, x, y, w, h in regions:
+            # Each pixel carries one label, so it is blended exactly once
+            roi = out[y:y + h, x:x + w]
+            colour = np.empty_like(roi)
+            colour[:] = MASK_PALETTE[(k - 1) % len(MASK_PALETTE)]
+            mixed = cv2.addWeighted(colour, a, roi, 1.0 - a, 0.0)
+            cv2.copyTo(mixed, (label[y:y + h, x:x + w] == k).view(np.uint8), roi)
+    if spec.show_boxes and len(spec.boxes):
+        xyxy = getattr(spec.boxes, "xyxy", spec.boxes)
+        for x1, y1, x2, y2 in np.asarray(xyxy).reshape(-1, 4).astype(np.int64).tolist():
+            cv2.rectangle(out, (x1, y1), (x2, y2), _BOX_BGR, 2)
+    if spec.show_tracks:
+        for t in spec.tracks:
+            x1, y1 = int(t.get("x1", 0)), int(t.get("y1", 0))
+            cv2.putText(out, f"ID {t.get('id', '?')}", (x1, max(0, y1 - 5)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, _TRACK_BGR, 1, cv2.LINE_AA)
+            trail = t.get("trail") or []
+            if len(trail) > 1:
+                cv2.polylines(out, [np.asarray(trail, dtype=np.int32).reshape(-1, 1, 2)], False, _TRACK_BGR, 1)
+    if spec.show_ocr:
+        for o in spec.ocr:
+            box = o.get("box") if isinstance(o, dict) else None
+            if not box or len(box) != 4:
+                continue
+            x1, y1, x2, y2 = map(int, box)
+            cv2.rectangle(out, (x1, y1), (x2, y2), _OCR_BGR, 1)
+            text = str(o.get("text", ""))
+            if text:
+                cv2.putText(out, text, (x1, max(0, y1 - 6)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, _OCR_BGR, 1, cv2.LINE_AA)
+    return out
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.services import event_index
+from app.services.event_writer import EventWriter
+
+
+def _time(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def _scan_last(path: Path) -> str | None:
+    # RunRegistry.read_last_event before the index
+    last = None
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                last = line.strip()
+    return last
+
+
+def _scan_range(path: Path, start: int, end: int) -> list:
+    out = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        obj = json.loads(line)
+        if start <= obj.get("frame_id", -1) <= end:
+            out.append(obj)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="events.jsonl reads: full scans vs the byte-offset index")
+    ap.add_argument("--events", type=int, default=50000)
+    ap.add_argument("--tail", type=int, default=50)
+    ap.add_argument("--repeats", type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "events.jsonl"
+        w = EventWriter(path, flush_events=1024, fsync="never")
+        for i in range(args.events):
+            w.write(json.dumps({"frame_id": i, "fps": 24.0, "timings": {"pre": 3.0, "model": 40.0, "post": 2.0},
+                                "boxes": [{"x1": 1.0, "y1": 2.0, "x2": 30.0, "y2": 40.0, "score": 0.9, "cls": "car"}] * 10}), frame_id=i)
+        w.close()
+        mid = args.events // 2
+        print(f"events={args.events} log={path.stat().st_size / 1e6:.1f}MB")
+        rows = [
+            ("last event", lambda: _scan_last(path), lambda: event_index.tail(path, 1)),
+            (f"tail {args.tail}", lambda: path.read_text(encoding="utf-8").splitlines()[-args.tail:], lambda: event_index.tail(path, args.tail)),
+            ("range 100", lambda: _scan_range(path, mid, mid + 99), lambda: [json.loads(l) for l in event_index.frame_range(path, mid, mid + 99)]),
+        ]
+        print(f"  {'read':<12} {'scan':>10} {'index':>10}")
+        for name, scan, indexed in rows:
+            a, b = _time(scan, args.repeats), _time(indexed, args.repeats)
+            print(f"  {name:<12} {a:>8.2f}ms {b:>8.3f}ms  ({a / max(b, 1e-9):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.event_writer import EventWriter
+
+
+def _event(i: int) -> str:
+    return json.dumps({
+        "run_id": "bench", "frame_id": i, "boxes": [{"x1": 1.0, "y1": 2.0, "x2": 30.0, "y2": 40.0, "score": 0.9, "cls": "car"}] * 20,
+        "timings": {"pre": 3.1, "model": 41.7, "post": 2.2}, "fps": 24.0,
+    })
+
+
+def _append(path: Path, line: str) -> None:
+    # What RunRegistry.append_event used to do for every frame
+    with path.open("a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Per-frame event log cost on the caller: open/append/close vs the buffered writer")
+    ap.add_argument("--events", type=int, default=2000)
+    ap.add_argument("--fsync", default="batch", choices=("never", "batch", "close"))
+    args = ap.parse_args()
+
+    lines = [_event(i) for i in range(args.events)]
+    with tempfile.TemporaryDirectory() as tmp:
+        direct = Path(tmp) / "direct.jsonl"
+        samples = []
+        t0 = time.perf_counter()
+        for line in lines:
+            t = time.perf_counter()
+            _append(direct, line)
+            samples.append((time.perf_counter() - t) * 1e6)
+        direct_total = time.perf_counter() - t0
+        print(f"events={args.events} bytes/event={len(lines[0])}")
+        print(f"  open/append  p50 {statistics.median(samples):8.1f}us  p99 {statistics.quantiles(samples, n=100)[98]:8.1f}us  total {direct_total * 1e3:7.1f}ms")
+
+        w = EventWriter(Path(tmp) / "buffered.jsonl", fsync=args.fsync)
+        samples = []
+        t0 = time.perf_counter()
+        for line in lines:
+            t = time.perf_counter()
+            w.write(line)
+            samples.append((time.perf_counter() - t) * 1e6)
+        stats = w.close()
+        total = time.perf_counter() - t0
+        print(f"  writer       p50 {statistics.median(samples):8.1f}us  p99 {statistics.quantiles(samples, n=100)[98]:8.1f}us  total {total * 1e3:7.1f}ms  "
+              f"({stats['flushes']} flushes, fsync={args.fsync})")
+
+
+if __name__ == "__main__":
+    main()
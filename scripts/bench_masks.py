@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from app.utils import masks
+
+
+def synthetic_masks(width: int, height: int, n: int, seed: int = 0) -> list[np.ndarray]:
+    """Blob-shaped instance masks (filled ellipses) of mixed sizes."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        m = np.zeros((height, width), dtype=np.uint8)
+        cx, cy = int(rng.uniform(0, width)), int(rng.uniform(0, height))
+        ax, ay = int(rng.uniform(10, width / 6)), int(rng.uniform(10, height / 6))
+        cv2.ellipse(m, (cx, cy), (ax, ay), float(rng.uniform(0, 180)), 0, 360, 1, -1)
+        out.append(m)
+    return out
+
+
+def _time(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def _dense_iou(a: list[np.ndarray], b: list[np.ndarray]) -> np.ndarray:
+    out = np.zeros((len(a), len(b)))
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            union = np.count_nonzero(x | y)
+            out[i, j] = np.count_nonzero(x & y) / union if union else 0.0
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Mask transport size and IoU cost: raw base64 buffers vs RLE/polygons")
+    ap.add_argument("--width", type=int, default=1920)
+    ap.add_argument("--height", type=int, default=1080)
+    ap.add_argument("--masks", type=int, default=10)
+    ap.add_argument("--repeats", type=int, default=5)
+    args = ap.parse_args()
+
+    dense = synthetic_masks(args.width, args.height, args.masks)
+    other = synthetic_masks(args.width, args.height, args.masks, seed=1)
+    raw = [{"mask": base64.b64encode(m.tobytes()).decode("utf-8")} for m in dense]
+    rle = [masks.encode(m) for m in dense]
+    poly = [masks.encode(m, "polygon") for m in dense]
+    rle_b = [masks.encode(m) for m in other]
+    print(f"{args.width}x{args.height} masks={args.masks}")
+    print(f"  {'form':<8} {'event bytes':>12} {'encode':>10} {'decode':>10}")
+    print(f"  {'raw b64':<8} {len(json.dumps(raw)):>12}")
+    for name, enc, fmt in (("rle", rle, "rle"), ("polygon", poly, "polygon")):
+        t_enc = _time(lambda: [masks.encode(m, fmt) for m in dense], args.repeats)
+        t_dec = _time(lambda: [masks.decode(m) for m in enc], args.repeats)
+        print(f"  {name:<8} {len(json.dumps(enc)):>12} {t_enc:>8.2f}ms {t_dec:>8.2f}ms")
+    t_dense = _time(lambda: _dense_iou(dense, other), args.repeats)
+    t_rle = _time(lambda: masks.iou_matrix(rle, rle_b), args.repeats)
+    print(f"  iou {args.masks}x{args.masks}: dense {t_dense:.2f}ms, on runs {t_rle:.2f}ms ({t_dense / max(t_rle, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
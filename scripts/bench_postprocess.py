@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.pipelines.postprocess import select
+
+
+def raw_detections(n_boxes: int, n_objects: int = 40, n_classes: int = 5, seed: int = 0) -> tuple:
+    """Raw detector head output: clusters of jittered boxes around objects, mostly low scores."""
+    rng = np.random.default_rng(seed)
+    centre = rng.uniform(0, 1800, size=(n_objects, 2))
+    size = rng.uniform(20, 200, size=(n_objects, 2))
+    owner = rng.integers(0, n_objects, n_boxes)
+    ctr = centre[owner] + rng.normal(0, 4, size=(n_boxes, 2))
+    wh = size[owner] * rng.uniform(0.9, 1.1, size=(n_boxes, 2))
+    xyxy = np.hstack([ctr - wh / 2, ctr + wh / 2]).astype(np.float32)
+    scores = rng.beta(0.5, 4, n_boxes).astype(np.float32)
+    return xyxy, scores, (owner % n_classes).astype(np.intp), [f"c{i}" for i in range(n_classes)]
+
+
+def _time(fn, repeats: int, warmup: int = 10) -> list[float]:
+    for _ in range(warmup):
+        fn()
+    samples: list[float] = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return sorted(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Per-frame latency of threshold + class filter + NMS")
+    ap.add_argument("--boxes", type=int, nargs="+", default=[1000, 3000, 8400])
+    ap.add_argument("--conf", type=float, default=0.25)
+    ap.add_argument("--iou", type=float, default=0.5)
+    ap.add_argument("--repeats", type=int, default=100)
+    ap.add_argument("--rounds", type=int, default=10, help="interleaved rounds; each pass keeps its fastest round")
+    ap.add_argument("--budget-ms", type=float, default=1.0, help="budget for the median hard and soft NMS passes")
+    args = ap.parse_args()
+
+    cases = [(n, soft, raw_detections(n)) for n in args.boxes for soft in (False, True)]
+    # Every round times every case, so a slow stretch of the host hits all of
+    # them; each case keeps the round with the lowest median, as ``timeit``
+    # keeps its best repeat
+    best: dict[tuple[int, bool], list[float]] = {}
+    for _ in range(args.rounds):
+        for n, soft, (xyxy, scores, classes, names) in cases:
+            samples = _time(
+                lambda: select(xyxy, scores, classes, names, conf_thresh=args.conf, nms_iou=args.iou, soft=soft),
+                args.repeats,
+            )
+            if (n, soft) not in best or statistics.median(samples) < statistics.median(best[n, soft]):
+                best[n, soft] = samples
+
+    worst = 0.0
+    for n, soft, (xyxy, scores, classes, names) in cases:
+        kept = len(select(xyxy, scores, classes, names, conf_thresh=args.conf, nms_iou=args.iou, soft=soft)[0])
+        samples = best[n, soft]
+        p50, p95 = statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+        worst = max(worst, p50)
+        label = "soft" if soft else "hard"
+        print(f"boxes={n:<6} {label} candidates={int((scores >= args.conf).sum()):<5} kept={kept:<4} p50={p50:.3f}ms p95={p95:.3f}ms")
+    if worst > args.budget_ms:
+        raise SystemExit(f"median NMS {worst:.3f}ms exceeds {args.budget_ms}ms budget")
+
+
+if __name__ == "__main__":
+    main()
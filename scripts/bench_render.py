@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from dataclasses import replace
+
+import numpy as np
+
+from app.utils.viz import RenderSpec, draw_boxes, draw_ocr_labels, draw_track_ids, overlay_soft_masks, render
+
+
+def synthetic_layers(width: int, height: int, n_boxes: int, n_masks: int, n_ocr: int, seed: int = 0) -> RenderSpec:
+    """A busy street frame's worth of boxes, masks, tracks with trails and OCR labels."""
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform([0, 0], [width - 120, height - 120], size=(n_boxes, 2))
+    wh = rng.uniform(16, 120, size=(n_boxes, 2))
+    xyxy = np.hstack([xy, xy + wh]).astype(np.float32)
+    masks = []
+    for i in range(n_masks):
+        m = np.zeros((height, width), dtype=np.uint8)
+        x1, y1, x2, y2 = xyxy[i % n_boxes].astype(int)
+        m[y1:y2, x1:x2] = 1
+        masks.append(m)
+    tracks = [
+        {"id": i + 1, "x1": float(b[0]), "y1": float(b[1]), "x2": float(b[2]), "y2": float(b[3]),
+         "trail": [[int(b[0]) - 4 * k, int(b[1]) - 2 * k] for k in range(10)]}
+        for i, b in enumerate(xyxy)
+    ]
+    ocr = [{"text": f"SIGN {i}", "box": xyxy[i % n_boxes].tolist()} for i in range(n_ocr)]
+    return RenderSpec(boxes=xyxy, masks=masks, tracks=tracks, ocr=ocr)
+
+
+def _time(fn, repeats: int, warmup: int = 3) -> float:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Overlay rendering cost: per-layer draw_* chain vs the single-pass compositor")
+    ap.add_argument("--width", type=int, default=1920)
+    ap.add_argument("--height", type=int, default=1080)
+    ap.add_argument("--boxes", type=int, default=100)
+    ap.add_argument("--masks", type=int, default=10)
+    ap.add_argument("--ocr", type=int, default=10)
+    ap.add_argument("--repeats", type=int, default=30)
+    args = ap.parse_args()
+
+    img = np.random.default_rng(1).integers(0, 255, size=(args.height, args.width, 3), dtype=np.uint8)
+    spec = synthetic_layers(args.width, args.height, args.boxes, args.masks, args.ocr)
+    box_tuples = [tuple(b) for b in spec.boxes.tolist()]
+    none = RenderSpec(show_boxes=False, show_masks=False, show_tracks=False, show_ocr=False)
+
+    def legacy() -> np.ndarray:
+        vis = draw_boxes(img, box_tuples)
+        vis = overlay_soft_masks(vis, spec.masks)
+        vis = draw_track_ids(vis, spec.tracks)
+        return draw_ocr_labels(vis, spec.ocr)
+
+    layers = {
+        "boxes": (lambda: draw_boxes(img, box_tuples), {"show_boxes": True}),
+        "masks": (lambda: overlay_soft_masks(img, spec.masks), {"show_masks": True}),
+        "tracks": (lambda: draw_track_ids(img, spec.tracks), {"show_tracks": True}),
+        "ocr": (lambda: draw_ocr_labels(img, spec.ocr), {"show_ocr": True}),
+    }
+    buf = np.empty_like(img)
+    base = _time(lambda: render(img, none, out=buf), args.repeats)
+    print(f"{args.width}x{args.height} boxes={args.boxes} masks={args.masks} tracks={args.boxes} ocr={args.ocr}")
+    print(f"  {'layer':<8} {'draw_*':>10} {'render':>10}")
+    print(f"  {'copy':<8} {'':>10} {base:>8.2f}ms")
+    for name, (legacy_fn, flags) in layers.items():
+        only = replace(none, **flags, **{name: getattr(spec, name)})
+        single = _time(lambda: render(img, only, out=buf), args.repeats) - base
+        print(f"  {name:<8} {_time(legacy_fn, args.repeats):>8.2f}ms {single:>8.2f}ms")
+    full_legacy = _time(legacy, args.repeats)
+    full = _time(lambda: render(img, spec, out=buf), args.repeats)
+    print(f"  {'total':<8} {full_legacy:>8.2f}ms {full:>8.2f}ms  ({full_legacy / max(full, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
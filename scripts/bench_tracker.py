@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import statistics
+import time
+
+import numpy as np
+
+from app.providers.detection.batch import DetectionBatch
+from app.providers.tracking.bytetrack import ByteTracker
+
+
+def synthetic_scene(n_objects: int, n_frames: int, seed: int = 0) -> list[list[dict]]:
+    """Objects drifting across a 1920x1080 frame with jitter, dropouts and low-score noise."""
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform([0, 0], [1880, 1040], size=(n_objects, 2))
+    vel = rng.normal(0, 3, size=(n_objects, 2))
+    size = rng.uniform(16, 48, size=(n_objects, 2))
+    frames: list[list[dict]] = []
+    for _ in range(n_frames):
+        pos = (pos + vel) % [1880, 1040]
+        jitter = rng.normal(0, 1.0, size=pos.shape)
+        scores = rng.uniform(0.05, 1.0, size=n_objects)
+        visible = rng.random(n_objects) > 0.05
+        boxes = []
+        for i in np.flatnonzero(visible):
+            x, y = pos[i] + jitter[i]
+            w, h = size[i]
+            boxes.append({"x1": float(x), "y1": float(y), "x2": float(x + w), "y2": float(y + h),
+                          "score": float(scores[i]), "cls": "car" if i % 3 else "person"})
+        frames.append(boxes)
+    return frames
+
+
+def _stats(samples: list[float]) -> tuple[float, float, float]:
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))], samples[-1]
+
+
+def _replay(fn, frames: list, warmup: int = 20) -> tuple[list[float], ByteTracker]:
+    """Per-frame ms of ``fn(tracker, frame)`` over ``frames``, from a fresh tracker."""
+    tracker = ByteTracker()
+    for f in frames[:warmup]:
+        fn(tracker, f)
+    samples: list[float] = []
+    for f in frames[warmup:]:
+        t0 = time.perf_counter()
+        fn(tracker, f)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples, tracker
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Per-frame latency of ByteTracker on a synthetic scene")
+    ap.add_argument("--objects", type=int, default=300)
+    ap.add_argument("--frames", type=int, default=500)
+    ap.add_argument("--repeats", type=int, default=10, help="replays of the scene; each frame keeps its best time")
+    ap.add_argument(
+        "--budget-ms", type=float, default=1.0,
+        help="p95 budget for update() on a DetectionBatch, the path the pipelines take",
+    )
+    args = ap.parse_args()
+
+    frames = synthetic_scene(args.objects, args.frames)
+    # Tracker step on arrays: motion model, association and track lifecycle
+    cls_codes = {"car": 0, "person": 1}
+    arrays = [
+        (
+            np.array([(b["x1"], b["y1"], b["x2"], b["y2"]) for b in f], dtype=np.float64).reshape(-1, 4),
+            np.array([b["score"] for b in f], dtype=np.float64),
+            np.array([cls_codes[b["cls"]] for b in f], dtype=np.int64),
+        )
+        for f in frames
+    ]
+    # Provider-shaped input: an array-backed DetectionBatch per frame
+    batches = [DetectionBatch.coerce(f) for f in frames]
+    # The fixtures are ~100k long-lived dicts; frozen, the collector stops
+    # rescanning them and full collections only see what the tracker allocates
+    gc.collect()
+    gc.freeze()
+
+    paths = {
+        "step": (lambda t, a: t.step(*a), arrays),
+        # End to end through update(): box dicts in, track dicts out
+        "update": (ByteTracker.update, frames),
+        "batch": (ByteTracker.update, batches),
+    }
+    # Replays see identical state, so a frame's spread across them is machine
+    # noise: each frame keeps its best time, the way ``timeit`` takes a minimum,
+    # and the paths take turns so slow stretches of the host hit all of them
+    best: dict[str, list[float]] = {}
+    for _ in range(args.repeats):
+        for name, (fn, items) in paths.items():
+            samples, tracker = _replay(fn, items)
+            best[name] = list(map(min, best.get(name, samples), samples))
+    step_ms, update_ms, batch_ms = (_stats(best[name]) for name in paths)
+
+    print(f"objects={args.objects} frames={args.frames} repeats={args.repeats} live_tracks={len(tracker)}")
+    for name, (p50, p95, worst) in (("step", step_ms), ("update", update_ms), ("batch", batch_ms)):
+        print(f"  {name:<6} p50={p50:.3f}ms p95={p95:.3f}ms max={worst:.3f}ms")
+    # Gate on what a frame actually pays: provider batch in, track dicts out, tail latency
+    if batch_ms[1] > args.budget_ms:
+        raise SystemExit(f"p95 batch update {batch_ms[1]:.3f}ms exceeds {args.budget_ms}ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import pytest
 from fastapi.testclient import TestClient
 from app.services.api import app
 
@@ -7,6 +8,27 @@ from app.services.api import app
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def _isolated_runs(tmp_path, monkeypatch):
+    # Run dirs, runs/latest, video run states and the inference cache go to tmp, not the checkout
+    from collections import OrderedDict
+
+    import app.providers.cache as cache
+    import app.providers.factory as factory
+    import app.services.api as api
+    from app.services.storage import RunRegistry
+
+    registry = RunRegistry(tmp_path / "runs")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api, "registry", registry)
+    monkeypatch.setattr(api, "_video_runs", OrderedDict())
+    monkeypatch.setattr(cache, "_singleton", cache.InferenceCache(disk_dir=tmp_path / "cache"))
+    # Adapters are memoized with the cache they were built with
+    monkeypatch.setattr(factory, "_instances", {})
+    yield
+    registry.close()
+
+
 def test_health() -> None:
     r = client.get("/health")
     assert r.status_code == 200
@@ -38,3 +60,209 @@ def test_ab_compare_happy_path(tmp_path, monkeypatch) -> None:
     r = client.post("/ab_compare", json={"video_path": vid})
     assert r.status_code == 200
     assert r.json().get("ok") is True
+
+
+def _jpeg_bytes() -> bytes:
+    import cv2
+    import numpy as np
+    ok, buf = cv2.imencode(".jpg", np.zeros((48, 64, 3), dtype=np.uint8))
+    assert ok
+    return buf.tobytes()
+
+
+def test_run_frame_raw_body() -> None:
+    r = client.post("/run_frame/raw?profile=realtime", content=_jpeg_bytes(), headers={"Content-Type": "image/jpeg"})
+    assert r.status_code == 200
+    js = r.json()
+    assert js["annotated_b64"] and js["boxes"] == []
+
+
+def test_run_frame_upload_binary_response() -> None:
+    import json
+    r = client.post(
+        "/run_frame/upload",
+        files={"file": ("frame.jpg", _jpeg_bytes(), "image/jpeg")},
+        data={"profile": "accuracy", "annotated": "binary", "overlay_opts": json.dumps({"class_include": ["person"]})},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/jpeg"
+    assert r.content[:2] == b"\xff\xd8"
+    event = json.loads(r.headers["X-Frame-Event"])
+    assert "annotated_b64" not in event and event["run_id"]
+
+
+def test_run_frame_session_keeps_tracks_across_second_boundary(tmp_path, monkeypatch) -> None:
+    import itertools
+    from collections import OrderedDict
+
+    import app.services.api as api
+    from app.providers.detection.batch import DetectionBatch
+
+    class _OneBox:
+        async def ainfer(self, image_b64: str) -> DetectionBatch:
+            return DetectionBatch.from_rows([(8.0, 8.0, 40.0, 40.0, 0.9, "person")])
+
+    monkeypatch.setattr(api, "get_detector", lambda cfg, profile="realtime": _OneBox())
+    # Every server-side run id lands in a new wall-clock second
+    seconds = (f"2026-01-01_00-00-{s:02d}" for s in itertools.count())
+    monkeypatch.setattr(api.registry, "new_run_id", lambda: next(seconds))
+    monkeypatch.setattr(api, "_sessions", OrderedDict())
+    first = client.post("/run_frame/raw?run_id=cam-7", content=_jpeg_bytes(), headers={"Content-Type": "image/jpeg"}).json()
+    second = client.post("/run_frame/raw?run_id=cam-7", content=_jpeg_bytes(), headers={"Content-Type": "image/jpeg"}).json()
+    assert first["run_id"] == second["run_id"] == "cam-7"
+    assert [t["id"] for t in first["tracks"]] == [t["id"] for t in second["tracks"]]
+    assert len(second["tracks"]) == 1
+    assert (first["frame_id"], second["frame_id"]) == (0, 1)
+    # An evicted session resumes numbering after the run's last logged frame
+    api._sessions.clear()
+    third = client.post("/run_frame/raw?run_id=cam-7", content=_jpeg_bytes(), headers={"Content-Type": "image/jpeg"}).json()
+    assert third["frame_id"] == 2
+    # Without a session id each frame starts a run, and its id is returned to reuse
+    a = client.post("/run_frame/raw", content=_jpeg_bytes(), headers={"Content-Type": "image/jpeg"}).json()
+    b = client.post("/run_frame/raw", content=_jpeg_bytes(), headers={"Content-Type": "image/jpeg"}).json()
+    assert a["run_id"] != b["run_id"]
+
+
+def test_run_frame_rejects_path_like_run_id() -> None:
+    r = client.post("/run_frame/raw?run_id=../x", content=_jpeg_bytes(), headers={"Content-Type": "image/jpeg"})
+    assert r.status_code == 422
+
+
+def test_ws_run_video_streams_ordered_events(tmp_path) -> None:
+    import cv2
+    import numpy as np
+    vid = str(tmp_path / "tiny.mp4")
+    out = cv2.VideoWriter(vid, cv2.VideoWriter_fourcc(*"mp4v"), 5.0, (64, 48))
+    for i in range(6):
+        # Distinct frames so the motion gate lets every one through
+        out.write(np.full((48, 64, 3), 40 * i, dtype=np.uint8))
+    out.release()
+    frame_ids = []
+    with client.websocket_connect(f"/ws/run_video?video_path={vid}") as ws:
+        while True:
+            try:
+                event = ws.receive_json()
+            except Exception:
+                break
+            frame_ids.append(event["frame_id"])
+            assert {"pre", "model", "post"} <= set(event["timings"])
+            # realtime detects every third frame and propagates tracks in between
+            assert event["boxes_source"] == ("detected" if event["frame_id"] % 3 == 0 else "propagated")
+    assert frame_ids == list(range(6))
+
+
+def test_ws_run_video_reuses_results_for_static_frames(tmp_path, monkeypatch) -> None:
+    import cv2
+    import numpy as np
+
+    import app.services.api as api
+    from app.providers.detection.batch import DetectionBatch
+
+    class _OneBox:
+        async def ainfer(self, image_b64: str) -> DetectionBatch:
+            return DetectionBatch.from_rows([(8.0, 8.0, 40.0, 40.0, 0.9, "person")])
+
+    monkeypatch.setattr(api, "get_detector", lambda cfg, profile="realtime": _OneBox())
+    vid = str(tmp_path / "static.mp4")
+    out = cv2.VideoWriter(vid, cv2.VideoWriter_fourcc(*"mp4v"), 5.0, (64, 48))
+    for _ in range(7):
+        out.write(np.full((48, 64, 3), 90, dtype=np.uint8))
+    out.release()
+    events = []
+    with client.websocket_connect(f"/ws/run_video?video_path={vid}") as ws:
+        while True:
+            try:
+                events.append(ws.receive_json())
+            except Exception:
+                break
+    # Keyframes (every 3rd frame in the realtime profile) hit the gate; the rest propagate
+    sources = [e["boxes_source"] for e in events]
+    assert sources == ["detected", "propagated", "propagated", "reused", "propagated", "propagated", "reused"]
+    # A reused frame repeats the previous frame instead of re-matching old boxes
+    assert len(events[0]["tracks"]) == 1
+    assert events[3]["tracks"] == events[2]["tracks"]
+
+
+def test_ws_run_video_emits_video_and_ab_composite(tmp_path) -> None:
+    import cv2
+    import numpy as np
+    vid = str(tmp_path / "clip.mp4")
+    out = cv2.VideoWriter(vid, cv2.VideoWriter_fourcc(*"mp4v"), 5.0, (64, 48))
+    for i in range(5):
+        out.write(np.full((48, 64, 3), 40 * i, dtype=np.uint8))
+    out.release()
+    messages = []
+    with client.websocket_connect(f"/ws/run_video?video_path={vid}&emit_video=1&ab=1") as ws:
+        while True:
+            try:
+                messages.append(ws.receive_json())
+            except Exception:
+                break
+    video = messages[-1]["video"]
+    assert video["frames_written"] + video["frames_dropped"] == 5
+    assert video["path"].endswith("out.mp4") and video["ab_path"].endswith("ab_composite.mp4")
+    assert (tmp_path / "runs" / "latest" / "out.mp4").exists()
+    assert (tmp_path / "runs" / "latest" / "ab_composite.mp4").exists()
+
+
+def _run_video(payload: dict) -> dict:
+    # /run_video answers at once; the run's state is polled until it finishes
+    import time
+
+    r = client.post("/run_video", json=payload)
+    assert r.status_code == 202 and r.json()["status"] == "running"
+    run_id = r.json()["run_id"]
+    deadline = time.time() + 30.0
+    state = client.get(f"/runs/{run_id}").json()
+    while state["status"] == "running" and time.time() < deadline:
+        time.sleep(0.05)
+        state = client.get(f"/runs/{run_id}").json()
+    assert state["status"] == "done" and state["run_id"] == run_id
+    return state
+
+
+def test_run_video_http_honours_duration(tmp_path) -> None:
+    import cv2
+    import numpy as np
+    vid = str(tmp_path / "clip.mp4")
+    out = cv2.VideoWriter(vid, cv2.VideoWriter_fourcc(*"mp4v"), 5.0, (64, 48))
+    for i in range(10):
+        out.write(np.full((48, 64, 3), 20 * i, dtype=np.uint8))
+    out.release()
+    js = _run_video({"video_path": vid, "duration_s": 1, "emit_video": True})
+    # One second of a 5 fps clip
+    assert js["frames_out"] == 5 and js["video"]["frames_written"] == 5
+    assert (tmp_path / "runs" / "latest" / "out.mp4").exists()
+
+
+def test_emitted_video_fps_matches_frames_kept(tmp_path) -> None:
+    import cv2
+    import numpy as np
+    vid = str(tmp_path / "clip30.mp4")
+    out = cv2.VideoWriter(vid, cv2.VideoWriter_fourcc(*"mp4v"), 30.0, (64, 48))
+    for i in range(30):
+        out.write(np.full((48, 64, 3), 8 * i, dtype=np.uint8))
+    out.release()
+    # realtime caps at 24 fps: one second of 30 fps source keeps 24 frames
+    video = _run_video({"video_path": vid, "profile": "realtime", "emit_video": True})["video"]
+    kept = video["frames_written"] + video["frames_dropped"]
+    assert kept == 24
+    cap = cv2.VideoCapture(str(tmp_path / "runs" / "latest" / "out.mp4"))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    # The clip plays for as long as the source did
+    assert fps == pytest.approx(24.0, abs=0.01)
+    assert kept / fps == pytest.approx(1.0, abs=0.01)
+
+
+def test_run_status_validates_run_id(tmp_path) -> None:
+    import app.services.api as api
+
+    assert client.get("/runs/.hidden").status_code == 400
+    assert client.get("/runs/no_such_run").status_code == 404
+    assert client.post("/run_video", json={"video_path": str(tmp_path / "missing.mp4")}).status_code == 404
+    # Runs not started by /run_video exist but have no video state
+    rid = client.post("/run_frame/raw", content=_jpeg_bytes(), headers={"Content-Type": "image/jpeg"}).json()["run_id"]
+    assert client.get(f"/runs/{rid}").json() == {"run_id": rid, "status": "unknown"}
+    # Runs started in the same second still get their own ids
+    assert api.registry.ensure_run() != api.registry.ensure_run()
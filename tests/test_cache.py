@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.providers.cache import _MISS, CachedProvider, InferenceCache, cache_key
+
+
+class _Counting:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def infer(self, image_b64: str) -> list:
+        self.calls += 1
+        return [image_b64]
+
+
+def test_cache_key_covers_model_and_thresholds() -> None:
+    base = cache_key("aGVsbG8=", "replicate", "m1", {"confidence_thresh": 0.35})
+    assert base == cache_key("aGVsbG8=", "replicate", "m1", {"confidence_thresh": 0.35})
+    assert base != cache_key("aGVsbG8=", "replicate", "m2", {"confidence_thresh": 0.35})
+    assert base != cache_key("aGVsbG8=", "replicate", "m1", {"confidence_thresh": 0.25})
+    assert base != cache_key("aGVsbG9=", "replicate", "m1", {"confidence_thresh": 0.35})
+
+
+def test_cached_provider_memory_and_disk_tiers(tmp_path) -> None:
+    adapter = _Counting()
+    cache = InferenceCache(memory_items=1, disk_dir=tmp_path)
+    wrapped = CachedProvider(adapter, cache, "replicate", "m1")
+    assert wrapped.infer("a") == ["a"]
+    assert wrapped.infer("a") == ["a"]
+    assert asyncio.run(wrapped.ainfer("a")) == ["a"]
+    assert adapter.calls == 1
+    # "b" evicts "a" from memory; "a" is then served from disk
+    wrapped.infer("b")
+    assert wrapped.infer("a") == ["a"]
+    assert adapter.calls == 2
+    # A fresh cache over the same directory reloads the disk index
+    again = CachedProvider(adapter, InferenceCache(memory_items=4, disk_dir=tmp_path), "replicate", "m1")
+    assert again.infer("b") == ["b"]
+    assert adapter.calls == 2
+
+
+def test_disk_tier_respects_size_cap(tmp_path) -> None:
+    cache = InferenceCache(memory_items=1, disk_dir=tmp_path, disk_max_bytes=400)
+    for i in range(20):
+        cache.put(f"{i:040x}", ["x" * 50])
+    stored = list(tmp_path.glob("*/*.json"))
+    assert 0 < len(stored) < 20
+    assert sum(p.stat().st_size for p in stored) <= 400
+
+
+def test_disk_entries_are_json_and_validated(tmp_path) -> None:
+    import pickle
+
+    import numpy as np
+
+    from app.providers.detection.batch import DetectionBatch
+
+    legacy = tmp_path / "ab" / f"{'ab' * 20}.pkl"
+    legacy.parent.mkdir()
+    legacy.write_bytes(pickle.dumps(["old"]))
+    cache = InferenceCache(memory_items=1, disk_dir=tmp_path)
+    # Pickled entries from older versions are deleted, never loaded
+    assert not legacy.exists()
+    batch = DetectionBatch.from_rows([(1.5, 2.25, 30.1, 40.7, 0.875, "car"), (5, 6, 7, 8, 0.3, "person")])
+    cache.put("a" * 40, batch)
+    cache.put("b" * 40, ["evicts a from memory"])
+    back = cache.get("a" * 40)
+    assert np.array_equal(back.xyxy, batch.xyxy) and np.array_equal(back.scores, batch.scores)
+    assert back.to_dicts() == batch.to_dicts()
+    # A tampered entry is a miss and is removed
+    path = next(tmp_path.glob(f"*/{'b' * 40}.json"))
+    cache.put("c" * 40, ["evicts b"])
+    path.write_bytes(pickle.dumps(["payload"]))
+    assert cache.get("b" * 40) is _MISS and not path.exists()
+    bad = tmp_path / "cc" / f"{'c' * 40}.json"
+    bad.write_text('{"kind": "batch", "xyxy": [[0, 0, 1, 1]], "scores": [1], "classes": [3], "names": ["a"]}')
+    cache.put("d" * 40, ["evicts c"])
+    assert cache.get("c" * 40) is _MISS and not bad.exists()
+
+
+def test_async_lookup_reads_disk_off_the_event_loop(tmp_path) -> None:
+    import threading
+
+    cache = InferenceCache(memory_items=1, disk_dir=tmp_path)
+    wrapped = CachedProvider(_Counting(), cache, "replicate", "m1")
+    wrapped.infer("a")
+    wrapped.infer("b")
+    readers = []
+    read_disk = cache._read_disk
+
+    def spy(key: str):
+        readers.append(threading.current_thread())
+        return read_disk(key)
+
+    cache._read_disk = spy
+    assert asyncio.run(wrapped.ainfer("a")) == ["a"]
+    assert readers and threading.main_thread() not in readers
+
+
+class _FakeTransport:
+    def __init__(self) -> None:
+        self.posts = 0
+
+    def post(self, url: str, **kwargs):
+        self.posts += 1
+        data = {"output": [{"x1": 1, "y1": 2, "x2": 3, "y2": 4, "score": 0.9, "class": "person"}]}
+        return type("Resp", (), {"status_code": 200, "headers": {}, "json": lambda self: data})()
+
+
+def test_token_set_after_unconfigured_miss_reaches_provider(tmp_path, monkeypatch) -> None:
+    from app.providers.detection import replicate
+    from app.providers.hedge import HedgedProvider
+
+    transport = _FakeTransport()
+    monkeypatch.setattr(replicate, "get_transport", lambda: transport)
+    monkeypatch.delenv("REPLICATE_API_TOKEN", raising=False)
+    cache = InferenceCache(memory_items=4, disk_dir=tmp_path)
+    adapter = HedgedProvider(replicate.ReplicateDetector("m1"), "replicate", "m1")
+    wrapped = CachedProvider(adapter, cache, "replicate", "m1")
+    # No token: the "not configured" empty answer is returned but not stored
+    assert len(wrapped.infer("a")) == 0
+    assert transport.posts == 0 and not list(tmp_path.glob("*/*.json"))
+    monkeypatch.setenv("REPLICATE_API_TOKEN", "tok")
+    assert len(wrapped.infer("a")) == 1
+    assert len(wrapped.infer("a")) == 1
+    assert transport.posts == 1
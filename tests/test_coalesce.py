@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from app.providers.coalesce import CoalescingProvider
+
+
+class _Slow:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def infer(self, image_b64: str) -> list:
+        self.calls += 1
+        time.sleep(0.1)
+        return [image_b64]
+
+    async def ainfer(self, image_b64: str) -> list:
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        return [image_b64]
+
+
+def test_concurrent_threads_share_one_call() -> None:
+    adapter = _Slow()
+    wrapped = CoalescingProvider(adapter, "test", "m")
+    out: list = []
+    threads = [threading.Thread(target=lambda: out.append(wrapped.infer("same"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert adapter.calls == 1
+    assert out == [["same"]] * 5
+
+
+def test_concurrent_tasks_share_one_call_and_survive_cancellation() -> None:
+    adapter = _Slow()
+    wrapped = CoalescingProvider(adapter, "test", "m")
+
+    async def main() -> list:
+        leader = asyncio.ensure_future(wrapped.ainfer("same"))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(wrapped.ainfer("same")) for _ in range(3)]
+        other = asyncio.ensure_future(wrapped.ainfer("other"))
+        leader.cancel()
+        return await asyncio.gather(*followers, other)
+
+    res = asyncio.run(main())
+    assert res == [["same"]] * 3 + [["other"]]
+    assert adapter.calls == 2
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import pickle
+
+import numpy as np
+
+from app.pipelines.postprocess import BoxFilter
+from app.providers.detection.batch import Detection, DetectionBatch
+from app.providers.detection.replicate import ReplicateDetector
+from app.providers.tracking.bytetrack import ByteTracker
+from app.utils.metrics import map50_placeholder
+from app.utils.viz import draw_boxes
+
+
+def _rows() -> list:
+    return [(0, 0, 10, 10, 0.9, "car"), (20, 20, 40, 40, 0.8, "person"), (50, 50, 60, 60, 0.4, "car")]
+
+
+def test_batch_arrays_and_event_shape() -> None:
+    b = DetectionBatch.from_rows(_rows())
+    assert b.xyxy.dtype == np.float32 and b.xyxy.shape == (3, 4)
+    assert b.names == ("car", "person") and b.labels == ["car", "person", "car"]
+    d = b.to_dicts()[1]
+    assert set(d) == {"x1", "y1", "x2", "y2", "score", "cls"}
+    assert d["cls"] == "person" and (d["x1"], d["y2"]) == (20.0, 40.0) and abs(d["score"] - 0.8) < 1e-6
+    assert b[0] == Detection(0.0, 0.0, 10.0, 10.0, b[0].score, "car")
+    sub = b[b.scores > 0.5]
+    assert len(sub) == 2 and sub.names == b.names
+    assert len(DetectionBatch()) == 0 and not DetectionBatch() and DetectionBatch().to_dicts() == []
+    clone = pickle.loads(pickle.dumps(b))
+    assert np.array_equal(clone.xyxy, b.xyxy) and clone.names == b.names
+
+
+def test_coerce_and_concat_merge_class_tables() -> None:
+    a = DetectionBatch.coerce([{"x1": 0, "y1": 0, "x2": 5, "y2": 5, "score": 0.5, "cls": "sign"}])
+    b = DetectionBatch.coerce([Detection(1, 1, 6, 6, 0.7, "car")])
+    assert DetectionBatch.coerce(a) is a
+    merged = DetectionBatch.concat([a, DetectionBatch(), b.translate(10, 20)])
+    assert merged.labels == ["sign", "car"]
+    assert merged.xyxy[1].tolist() == [11.0, 21.0, 16.0, 26.0]
+
+
+def test_provider_parser_returns_a_batch() -> None:
+    out = ReplicateDetector._parse({"output": [{"x1": 1, "y1": 2, "x2": 3, "y2": 4, "score": 0.5, "class": "car"}, {"x1": "bad"}]})
+    assert isinstance(out, DetectionBatch) and out.labels == ["car"]
+
+
+def test_consumers_take_batches_directly() -> None:
+    b = DetectionBatch.from_rows(_rows())
+    kept = BoxFilter(conf_thresh=0.5, nms_iou=0.5).apply(b)
+    assert isinstance(kept, DetectionBatch) and kept.labels == ["car", "person"]
+    from_batch = ByteTracker().update(kept)
+    from_dicts = ByteTracker().update(kept.to_dicts())
+    assert [(t["id"], t["cls"], t["x1"]) for t in from_batch] == [(t["id"], t["cls"], t["x1"]) for t in from_dicts]
+    img = np.zeros((64, 64, 3), dtype=np.uint8)
+    assert np.array_equal(draw_boxes(img, kept), draw_boxes(img, [(0, 0, 10, 10), (20, 20, 40, 40)]))
+    assert map50_placeholder(kept, [(0, 0, 10, 10), (20, 20, 40, 40)]) == 1.0
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.services import api, event_index
+from app.services.event_writer import EventWriter
+from app.services.storage import RunRegistry
+
+
+def _event(i: int) -> str:
+    return json.dumps({"frame_id": i, "fps": 10.0 + i, "timings": {"model": float(i), "pre": 1.0}, "boxes": []})
+
+
+def test_writer_maintains_offsets_for_tail_and_ranges(tmp_path) -> None:
+    path = tmp_path / "events.jsonl"
+    w = EventWriter(path, flush_events=7, fsync="never")
+    for i in range(50):
+        w.write(_event(i), frame_id=i)
+    w.close()
+    entries = event_index.load(path)
+    assert len(entries) == 50 and entries["frame_id"].tolist() == list(range(50))
+    raw = path.read_bytes()
+    for e in entries[[0, 17, 49]]:
+        line = raw[e["offset"]:e["offset"] + e["length"]]
+        assert json.loads(line)["frame_id"] == e["frame_id"]
+    assert [json.loads(l)["frame_id"] for l in event_index.tail(path, 3)] == [47, 48, 49]
+    assert [json.loads(l)["frame_id"] for l in event_index.frame_range(path, 10, 14)] == [10, 11, 12, 13, 14]
+    assert len(event_index.frame_range(path, 10, 40, limit=4)) == 4
+    assert event_index.frame_range(path, 100, 200) == []
+
+
+def test_unordered_frame_ids_and_pre_index_logs(tmp_path) -> None:
+    path = tmp_path / "events.jsonl"
+    # A log written before the index existed
+    path.write_text("".join(_event(i) + "\n" for i in (5, 3, 9)), encoding="utf-8")
+    assert [json.loads(l)["frame_id"] for l in event_index.tail(path, 2)] == [3, 9]
+    w = EventWriter(path, fsync="never")
+    w.write(_event(4), frame_id=4)
+    w.close()
+    # Opening the writer indexed the old lines before appending
+    assert event_index.load(path)["frame_id"].tolist() == [5, 3, 9, 4]
+    assert [json.loads(l)["frame_id"] for l in event_index.frame_range(path, 3, 5)] == [5, 3, 4]
+
+
+def test_project_selects_nested_fields() -> None:
+    ev = json.loads(_event(2))
+    assert event_index.project(ev, ["frame_id", "timings.model", "missing.key"]) == {"frame_id": 2, "timings": {"model": 2.0}}
+
+
+def test_events_range_endpoint(tmp_path, monkeypatch) -> None:
+    reg = RunRegistry(tmp_path, event_opts={"flush_interval_s": 60.0})
+    monkeypatch.setattr(api, "registry", reg)
+    rid = reg.ensure_run("run_r")
+    for i in range(20):
+        reg.append_event(rid, _event(i), frame_id=i)
+    client = TestClient(api.app)
+    r = client.get("/events_range", params={"start": 5, "end": 7, "fields": "frame_id,timings.model"})
+    assert r.status_code == 200
+    assert r.json()["events"] == [{"frame_id": i, "timings": {"model": float(i)}} for i in (5, 6, 7)]
+    snap = client.get("/events_snapshot", params={"limit": 3}).json()
+    assert snap["frame_ids"] == [17, 18, 19]
+    assert client.get("/last_event").json()["event"]["frame_id"] == 19
+    # An explicit run id must name an existing run directory
+    assert client.get("/events_range", params={"run_id": "../run_r"}).status_code == 400
+    assert client.get("/events_range", params={"run_id": "no_such_run"}).status_code == 404
+    assert client.get("/events_range", params={"run_id": rid, "start": 19}).json()["events"][0]["frame_id"] == 19
+    reg.close()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+import pytest
+
+from app.services.event_writer import EventWriter
+from app.services.storage import RunRegistry
+
+
+def _lines(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_concurrent_producers_keep_every_line_in_order(tmp_path) -> None:
+    w = EventWriter(tmp_path / "events.jsonl", flush_events=16, flush_interval_s=10.0, fsync="never")
+
+    def produce(k: int) -> None:
+        for i in range(200):
+            w.write(json.dumps({"p": k, "i": i}))
+
+    threads = [threading.Thread(target=produce, args=(k,)) for k in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = w.close()
+    rows = _lines(tmp_path / "events.jsonl")
+    assert stats["events_written"] == len(rows) == 1200
+    for k in range(6):
+        assert [r["i"] for r in rows if r["p"] == k] == list(range(200))
+    # Lines were batched rather than written one by one
+    assert stats["flushes"] < 1200
+
+
+def test_flush_thresholds_and_explicit_flush(tmp_path) -> None:
+    path = tmp_path / "events.jsonl"
+    w = EventWriter(path, flush_events=3, flush_interval_s=60.0, fsync="never")
+    w.write('{"a": 1}')
+    time.sleep(0.05)
+    assert not path.exists() or path.read_text() == ""
+    w.write('{"a": 2}')
+    w.write('{"a": 3}')  # reaches flush_events
+    deadline = time.time() + 2.0
+    while len(_lines(path)) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(_lines(path)) == 3
+    w.write('{"a": 4}')
+    assert w.flush(timeout=2.0)
+    assert [r["a"] for r in _lines(path)] == [1, 2, 3, 4]
+    w.close()
+    with pytest.raises(RuntimeError):
+        w.write("{}")
+
+
+def test_interval_flush_and_bad_fsync_policy(tmp_path) -> None:
+    path = tmp_path / "events.jsonl"
+    w = EventWriter(path, flush_events=1000, flush_interval_s=0.05, fsync="batch")
+    w.write('{"x": 1}')
+    deadline = time.time() + 2.0
+    while not (path.exists() and path.read_text()) and time.time() < deadline:
+        time.sleep(0.01)
+    assert _lines(path) == [{"x": 1}]
+    w.close()
+    with pytest.raises(ValueError):
+        EventWriter(tmp_path / "other.jsonl", fsync="sometimes")
+
+
+def test_registry_buffers_per_run_and_flushes_on_close(tmp_path) -> None:
+    reg = RunRegistry(tmp_path, event_opts={"flush_events": 100, "flush_interval_s": 60.0})
+    rid = reg.ensure_run("run_a")
+    for i in range(5):
+        reg.append_event(rid, json.dumps({"frame_id": i}))
+    # The newest event is served from memory before it reaches the file
+    assert json.loads(reg.read_last_event(rid))["frame_id"] == 4
+    reg.flush_events(rid)
+    assert len(_lines(tmp_path / rid / "events.jsonl")) == 5
+    reg.append_event(rid, json.dumps({"frame_id": 5}))
+    assert reg.close_run(rid)["events_written"] == 6
+    # A closed run reopens on the next event and appends after the old lines
+    reg.append_event(rid, json.dumps({"frame_id": 6}))
+    reg.close()
+    assert [r["frame_id"] for r in _lines(tmp_path / rid / "events.jsonl")] == list(range(7))
+
+
+def test_unopenable_log_is_logged_and_raised(tmp_path, caplog) -> None:
+    # A file where the run directory should be: the log can never be opened
+    (tmp_path / "blocked").write_text("")
+    with pytest.raises(OSError):
+        EventWriter(tmp_path / "blocked" / "events.jsonl")
+    assert "cannot open event log" in caplog.text
+    reg = RunRegistry(tmp_path, event_opts={})
+    caplog.clear()
+    with pytest.raises(OSError):
+        reg.append_event("blocked", json.dumps({"frame_id": 0}))
+    # Logged once for the first attempt and once for the retry
+    assert caplog.text.count("cannot open event log") == 2
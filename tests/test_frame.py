@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import base64
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from app.pipelines.preprocess import prepare_frame
+from app.utils.frame import Frame, as_b64
+
+
+def _jpeg(w: int = 64, h: int = 48) -> bytes:
+    ok, buf = cv2.imencode(".jpg", np.full((h, w, 3), 120, dtype=np.uint8))
+    assert ok
+    return buf.tobytes()
+
+
+def test_upload_is_decoded_once_and_forwarded_without_reencoding() -> None:
+    data = _jpeg()
+    b64 = base64.b64encode(data).decode("utf-8")
+    frame = Frame.from_b64(b64)
+    with mock.patch("app.utils.frame.cv2.imdecode", wraps=cv2.imdecode) as dec:
+        assert frame.shape == (48, 64, 3)
+        assert frame.pixels is frame.pixels
+        prepared = prepare_frame(frame, {"input_size": 640})
+    assert dec.call_count == 1
+    # Within the input size: providers get the original payload, not a re-encode
+    assert prepared.frame is frame and prepared.image_b64 is b64
+    assert prepared.upload_bytes == len(data) and frame.encoded() == data
+
+
+def test_encodings_are_cached_per_format_and_quality() -> None:
+    frame = Frame(pixels=np.zeros((32, 32, 3), dtype=np.uint8))
+    with mock.patch("app.utils.frame.cv2.imencode", wraps=cv2.imencode) as enc:
+        low = frame.encoded(quality=50)
+        assert frame.encoded(quality=50) is low
+        assert frame.b64(quality=50) is frame.b64(quality=50)
+        assert base64.b64decode(frame.b64(quality=50)) == low
+        assert frame.encoded(".png")[:4] == b"\x89PNG"
+    assert enc.call_count == 2
+    assert as_b64(frame) == frame.b64() and as_b64("abc") == "abc"
+
+
+def test_undecodable_input_has_no_pixels() -> None:
+    frame = Frame.from_b64("not base64!")
+    assert frame.pixels is None and frame.source_bytes == b""
+    assert as_b64(frame) == "not base64!"
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from app.pipelines.frame_executor import FrameExecutor, stage_timeouts
+
+
+class _Sleepy:
+    def __init__(self, delay: float, out: list) -> None:
+        self.delay = delay
+        self.out = out
+
+    async def ainfer(self, image_b64: str) -> list:
+        await asyncio.sleep(self.delay)
+        return self.out
+
+
+class _SyncOnly:
+    def infer(self, image_b64: str) -> list:
+        return ["text"]
+
+
+def test_frame_executor_runs_stages_concurrently() -> None:
+    ex = FrameExecutor(detector=_Sleepy(0.2, ["box"]), segmenter=_Sleepy(0.2, ["mask"]), ocr=_SyncOnly())
+    t0 = time.perf_counter()
+    res = asyncio.run(ex.run("b64"))
+    elapsed = time.perf_counter() - t0
+    assert res.boxes == ["box"] and res.masks == ["mask"] and res.ocr == ["text"]
+    assert elapsed < 0.35
+    assert not res.errors
+
+
+def test_frame_executor_stage_timeout_is_isolated() -> None:
+    ex = FrameExecutor(detector=_Sleepy(0.01, ["box"]), segmenter=_Sleepy(1.0, ["mask"]), timeouts_s={"seg": 0.05})
+    res = asyncio.run(ex.run("b64"))
+    assert res.boxes == ["box"]
+    assert res.masks == []
+    assert res.errors and res.errors[0].startswith("seg: timeout")
+
+
+def test_stage_timeouts_from_config() -> None:
+    assert stage_timeouts({"detection": {"timeout_s": 3}}) == {"det": 3.0, "seg": 10.0, "ocr": 10.0}
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from app.providers.cache import CachedProvider, InferenceCache
+from app.providers.hedge import HedgeBudget, HedgedProvider, LatencyWindow
+
+
+class _Adapter:
+    def __init__(self, name: str, delay_s: float) -> None:
+        self.name = name
+        self.delay_s = delay_s
+        self.calls = 0
+        self.cancelled = 0
+
+    def infer(self, image_b64: str) -> list:
+        self.calls += 1
+        time.sleep(self.delay_s)
+        return [self.name]
+
+    async def ainfer(self, image_b64: str) -> list:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay_s)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return [self.name]
+
+
+def _warm_window(p_ms: float) -> LatencyWindow:
+    window = LatencyWindow(min_samples=5)
+    for _ in range(100):
+        window.observe(p_ms)
+    return window
+
+
+def test_budget_caps_hedge_ratio() -> None:
+    budget = HedgeBudget(0.1)
+    spent = 0
+    for _ in range(100):
+        budget.record_call()
+        spent += budget.try_spend()
+    assert spent == 10
+
+
+def test_no_hedging_until_window_is_warm() -> None:
+    primary, fallback = _Adapter("primary", 0.0), _Adapter("fallback", 0.0)
+    hedged = HedgedProvider(primary, "test-cold", "m", fallback=fallback, budget_ratio=1.0)
+    assert hedged.infer("x") == ["primary"]
+    assert fallback.calls == 0
+
+
+def test_async_hedge_wins_and_cancels_slow_primary() -> None:
+    primary, fallback = _Adapter("primary", 0.5), _Adapter("fallback", 0.01)
+    hedged = HedgedProvider(primary, "test-async", "m", fallback=fallback, budget_ratio=1.0, window=_warm_window(20))
+
+    async def main() -> list:
+        return await hedged.ainfer("x")
+
+    t0 = time.perf_counter()
+    assert asyncio.run(main()) == ["fallback"]
+    assert time.perf_counter() - t0 < 0.3
+    assert primary.cancelled == 1
+    assert hedged._won._value.get() == 1
+    # The cancelled primary still counts, censored at the time it had run
+    assert len(hedged.window._samples) == 101
+    assert hedged.window._samples[-1] >= 20
+
+
+def test_sync_hedge_wins_and_budget_limits_duplicates() -> None:
+    primary, fallback = _Adapter("primary", 0.2), _Adapter("fallback", 0.0)
+    hedged = HedgedProvider(primary, "test-sync", "m", fallback=fallback, budget_ratio=0.5, window=_warm_window(10))
+    results = [hedged.infer("x") for _ in range(4)]
+    assert results.count(["fallback"]) == 2
+    assert fallback.calls == 2
+    assert hedged._fired._value.get() == 2
+
+
+def test_fallback_answers_are_not_cached_under_primary_key() -> None:
+    primary, fallback = _Adapter("primary", 0.2), _Adapter("fallback", 0.0)
+    hedged = HedgedProvider(primary, "test-cache", "m", fallback=fallback, budget_ratio=1.0, window=_warm_window(10))
+    cached = CachedProvider(hedged, InferenceCache(memory_items=8), "test-cache", "m")
+    assert cached.infer("x") == ["fallback"]
+    assert asyncio.run(cached.ainfer("x")) == ["fallback"]
+    assert fallback.calls == 2
+    # A duplicate of the primary is the primary's own answer and is stored
+    dup = CachedProvider(HedgedProvider(primary, "test-dup", "m", budget_ratio=1.0, window=_warm_window(10)),
+                         InferenceCache(memory_items=8), "test-dup", "m")
+    calls = primary.calls
+    assert dup.infer("y") == ["primary"]
+    assert dup.infer("y") == ["primary"]
+    assert primary.calls - calls == 2
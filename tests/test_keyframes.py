@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from app.pipelines.keyframes import KeyframeScheduler, mean_confidence
+from app.utils.metrics import map50_by_box_source
+
+
+def test_interval_schedules_keyframes() -> None:
+    s = KeyframeScheduler(interval=3)
+    assert [s.should_detect() for _ in range(7)] == [True, False, False, True, False, False, True]
+    assert all(KeyframeScheduler.from_profile({}).should_detect() for _ in range(3))
+
+
+def test_confidence_decay_forces_keyframe() -> None:
+    s = KeyframeScheduler.from_profile({"keyframe": {"interval": 10, "min_confidence": 0.4}})
+    assert s.should_detect() and not s.should_detect()
+    s.observe(mean_confidence([{"score": 0.5}, {"score": 0.6}]))
+    assert not s.should_detect()
+    s.observe(mean_confidence([{"score": 0.3}]))
+    assert s.should_detect()
+    s.observe(mean_confidence([]))
+    assert not s.should_detect()
+
+
+def test_accuracy_split_by_box_source() -> None:
+    box = {"x1": 0, "y1": 0, "x2": 10, "y2": 10}
+    events = [
+        {"frame_id": 0, "boxes_source": "detected", "boxes": [box]},
+        {"frame_id": 1, "boxes_source": "propagated", "boxes": [{**box, "x1": 6}]},
+        {"frame_id": 2, "boxes_source": "propagated", "boxes": [box]},
+    ]
+    gt = {0: [(0, 0, 10, 10)], 1: [(0, 0, 10, 10)]}
+    out = map50_by_box_source(events, gt)
+    assert out["detected"] == {"frames": 1, "map50": 1.0}
+    assert out["propagated"] == {"frames": 2, "map50": 0.0}
+    assert out["reused"]["frames"] == 0
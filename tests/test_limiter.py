@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.providers.limiter import AdaptiveLimiter, LimiterRejected
+
+
+def test_limiter_caps_inflight_and_queues_excess() -> None:
+    lim = AdaptiveLimiter("t-cap", initial=2, max_limit=2)
+    peak = 0
+    lock = threading.Lock()
+
+    def work() -> None:
+        nonlocal peak
+        with lim.slot() as slot:
+            with lock:
+                peak = max(peak, lim.inflight)
+            time.sleep(0.02)
+            slot.status = 200
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak == 2
+    assert lim.inflight == 0 and lim.queued == 0
+
+
+def test_limiter_aimd_backs_off_on_429_and_recovers() -> None:
+    lim = AdaptiveLimiter("t-aimd", initial=8, max_limit=8)
+    with lim.slot() as slot:
+        slot.status = 429
+    assert lim.limit == 4
+    for _ in range(40):
+        slots = [lim.acquire() for _ in range(lim.limit)]
+        for s in slots:
+            s.status = 200
+            lim.release(s)
+    assert lim.limit == 8
+
+
+def test_limiter_bounded_wait_and_queue() -> None:
+    lim = AdaptiveLimiter("t-bound", initial=1, max_queue=1, max_wait_s=0.05)
+    held = lim.acquire()
+
+    async def waiters() -> None:
+        first = asyncio.ensure_future(lim.aacquire())
+        await asyncio.sleep(0)
+        with pytest.raises(LimiterRejected):
+            await lim.aacquire()  # queue full
+        with pytest.raises(LimiterRejected):
+            await first  # wait timeout
+
+    asyncio.run(waiters())
+    lim.release(held)
+    assert lim.inflight == 0 and lim.queued == 0
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import base64
+
+import cv2
+import numpy as np
+
+from app.pipelines.preprocess import Letterbox, _restore_mask
+from app.utils import masks
+from app.utils.metrics import mask_miou
+
+
+def _disc(cx: int, cy: int, r: int, shape=(120, 160)) -> np.ndarray:
+    m = np.zeros(shape, dtype=np.uint8)
+    cv2.circle(m, (cx, cy), r, 1, -1)
+    return m
+
+
+def test_rle_roundtrip_matches_coco_layout() -> None:
+    m = np.zeros((3, 3), dtype=np.uint8)
+    m[1, 1] = 1
+    # Column-major runs, background first; string form as pycocotools writes it
+    assert masks.encode_rle(m, compress=False) == {"size": [3, 3], "counts": [4, 1, 4]}
+    assert masks.encode_rle(m)["counts"] == "414"
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        m = (rng.random((17, 23)) < rng.random()).astype(np.uint8)
+        rle = masks.encode_rle(m)
+        assert np.array_equal(masks.decode_rle(rle), m)
+        assert masks.area(rle) == int(m.sum())
+
+
+def test_iou_on_runs_matches_dense() -> None:
+    a, b, c = _disc(60, 60, 30), _disc(80, 60, 30), np.zeros((120, 160), dtype=np.uint8)
+    enc = [masks.encode_rle(x) for x in (a, b, c)]
+    iou = masks.iou_matrix(enc, enc)
+    assert np.isclose(iou[0, 1], (a & b).sum() / (a | b).sum())
+    assert iou[0, 0] == 1.0 and iou[2, 2] == 0.0 and iou[0, 2] == 0.0
+    # Only the matching gt mask scores; the empty prediction is never picked
+    assert np.isclose(mask_miou(enc[:2], [enc[0]]), 1.0)
+
+
+def test_normalize_raw_buffers_and_polygons() -> None:
+    m = _disc(50, 40, 20)
+    raw = {"label": "road", "score": 0.8, "mask": base64.b64encode(m.tobytes()).decode("utf-8")}
+    out = masks.normalize(raw, m.shape)
+    assert out["format"] == "rle" and out["label"] == "road" and "mask" not in out
+    assert np.array_equal(masks.decode(out), m)
+    # A raw buffer without any shape cannot be decoded and is left alone
+    assert masks.normalize(raw) is raw
+    poly = masks.encode(m, "polygon", epsilon=1.0)
+    assert (masks.decode(poly) != m).sum() < 0.05 * m.sum()
+
+
+def test_restore_scales_polygons_without_decoding() -> None:
+    geo = Letterbox(src_w=200, src_h=100, dst_w=100, dst_h=100, scale=0.5, pad_x=0, pad_y=25)
+    m = {"format": "polygon", "size": [100, 100], "polygons": [[10, 25, 60, 25, 60, 75]]}
+    out = _restore_mask(m, geo)
+    assert out["size"] == [100, 200]
+    assert out["polygons"] == [[20.0, 0.0, 120.0, 0.0, 120.0, 100.0]]
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.pipelines.pacing import FramePacer
+
+
+def _reader(n: int):
+    frames = iter(range(n))
+
+    def read():
+        i = next(frames, None)
+        return (i is not None), i
+
+    return read
+
+
+def test_rate_limit_reports_dropped_ids() -> None:
+    out = list(FramePacer(_reader(9), source_fps=30, max_fps=10, policy="drop_oldest"))
+    assert [p.frame_id for p in out] == [0, 3, 6]
+    assert out[1].dropped == [{"frame_id": 1, "reason": "rate"}, {"frame_id": 2, "reason": "rate"}]
+
+
+def test_stride_spreads_frames_to_reach_max_fps() -> None:
+    out = list(FramePacer(_reader(10), source_fps=25, max_fps=12, policy="stride"))
+    assert [p.frame_id for p in out] == [0, 3, 5, 7, 9]
+    assert {d["reason"] for p in out for d in p.dropped} == {"stride"}
+
+
+@pytest.mark.parametrize("policy", ["drop_oldest", "keep_latest", "stride"])
+def test_30fps_source_capped_at_24_emits_24fps(policy: str) -> None:
+    # Two seconds of 30 fps source must yield two seconds of 24 fps output
+    pacer = FramePacer(_reader(60), source_fps=30, max_fps=24, policy=policy, buffer=64)
+    out = list(pacer)
+    assert len(out) == 48
+    assert pacer.output_fps == pytest.approx(24.0)
+    gaps = {b.frame_id - a.frame_id for a, b in zip(out, out[1:])}
+    assert gaps == {1, 2}
+
+
+def test_offline_source_waits_for_slow_consumer() -> None:
+    pacer = FramePacer(_reader(6), source_fps=24, max_fps=24, policy="keep_latest")
+    ids = []
+    for p in pacer:
+        time.sleep(0.01)
+        ids.append(p.frame_id)
+        assert p.dropped == []
+    assert ids == list(range(6))
+
+
+@pytest.mark.parametrize("policy,reason", [("keep_latest", "superseded"), ("drop_oldest", "queue_full")])
+def test_live_source_sheds_frames_when_consumer_lags(policy: str, reason: str) -> None:
+    pacer = FramePacer(_reader(40), source_fps=200, max_fps=200, policy=policy, buffer=2, live=True)
+    out = []
+    for p in pacer:
+        time.sleep(0.02)
+        out.append(p)
+    ids = [p.frame_id for p in out]
+    assert ids == sorted(ids) and len(ids) < 40 and ids[-1] == 39
+    dropped = [d["frame_id"] for p in out for d in p.dropped]
+    assert sorted(dropped + ids) == list(range(40))
+    assert {d["reason"] for p in out for d in p.dropped} == {reason}
+
+
+def test_unknown_policy_rejected() -> None:
+    with pytest.raises(ValueError):
+        FramePacer(_reader(1), source_fps=30, policy="random")
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+import pytest
+
+from app.pipelines.parallel_decode import decode_parallel
+from app.pipelines.shm_ring import FrameRing
+from app.pipelines.video_pipeline import decode_frames, frames_from_video
+
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory) -> str:
+    path = str(tmp_path_factory.mktemp("video") / "clip.avi")
+    # Lossless codec so every frame round-trips exactly
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"FFV1"), 25.0, (64, 48))
+    for i in range(40):
+        img = np.zeros((48, 64, 3), dtype=np.uint8)
+        img[:, :, 0] = i * 6
+        img[i % 48, :, 1] = 255
+        out.write(img)
+    out.release()
+    return path
+
+
+def _marks(frames) -> list:
+    return [(idx, int(f.pixels[0, 0, 0])) for idx, f in frames]
+
+
+def test_parallel_matches_sequential_with_stride(clip: str) -> None:
+    seq = _marks(decode_frames(clip, stride=3))
+    par = _marks(decode_frames(clip, stride=3, workers=2))
+    assert [i for i, _ in seq] == list(range(0, 40, 3))
+    assert par == seq
+    assert all(m == i * 6 for i, m in par)
+
+
+def test_requested_indices_only(clip: str) -> None:
+    want = [37, 2, 3, 20, 99]
+    seq = _marks(decode_frames(clip, indices=want))
+    par = _marks(decode_frames(clip, indices=want, workers=2))
+    assert [i for i, _ in seq] == [2, 3, 20, 37]
+    assert par == seq
+
+
+def test_frames_from_video_limits(clip: str) -> None:
+    frames = list(frames_from_video(clip, max_frames=5, stride=2))
+    assert [int(f.pixels[0, 0, 0]) for f in frames] == [0, 12, 24, 36, 48]
+
+
+def test_ring_slots_released_when_consumer_stops_early(clip: str, monkeypatch) -> None:
+    held = []
+    close = FrameRing.close
+
+    def _close(ring: FrameRing) -> None:
+        held.append(ring.in_use())
+        close(ring)
+
+    monkeypatch.setattr(FrameRing, "close", _close)
+    frames = decode_parallel(clip, workers=2, segment_frames=4)
+    first = [next(frames) for _ in range(5)]
+    frames.close()
+    assert [i for i, _ in first] == list(range(5))
+    assert [int(f[0, 0, 0]) for _, f in first] == [0, 6, 12, 18, 24]
+    # In-flight segments were drained and every slot went back to the ring
+    assert held == [0]
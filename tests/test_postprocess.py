@@ -1,5 +1,116 @@
 from __future__ import annotations
 
+import numpy as np
+import pytest
+
+from app.pipelines.postprocess import BoxFilter, class_mask, nms, select, soft_nms
+from app.providers.detection.replicate import Detection
+
 
 def test_nop() -> None:
     assert True
+
+
+def test_nms_is_class_aware() -> None:
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10], [50, 50, 60, 60]], dtype=float)
+    scores = np.array([0.9, 0.8, 0.7, 0.6])
+    assert list(nms(boxes, scores, 0.5)) == [0, 3]
+    assert list(nms(boxes, scores, 0.5, classes=np.array([0, 0, 1, 0]))) == [0, 2, 3]
+    assert len(nms(np.zeros((0, 4)), np.zeros(0), 0.5)) == 0
+
+
+def _greedy(xyxy: np.ndarray, scores: np.ndarray, thr: float) -> list:
+    order = list(np.argsort(-scores, kind="stable"))
+    keep = []
+    while order:
+        i = order.pop(0)
+        keep.append(i)
+        rest = []
+        for j in order:
+            iw = max(0.0, min(xyxy[i, 2], xyxy[j, 2]) - max(xyxy[i, 0], xyxy[j, 0]))
+            ih = max(0.0, min(xyxy[i, 3], xyxy[j, 3]) - max(xyxy[i, 1], xyxy[j, 1]))
+            inter = iw * ih
+            a = (xyxy[i, 2] - xyxy[i, 0]) * (xyxy[i, 3] - xyxy[i, 1])
+            b = (xyxy[j, 2] - xyxy[j, 0]) * (xyxy[j, 3] - xyxy[j, 1])
+            if inter <= thr * (a + b - inter):
+                rest.append(j)
+        order = rest
+    return keep
+
+
+def test_blocked_nms_matches_plain_greedy() -> None:
+    rng = np.random.default_rng(1)
+    ctr = rng.uniform(0, 300, size=(200, 2))
+    wh = rng.uniform(10, 60, size=(200, 2))
+    xyxy = np.hstack([ctr, ctr + wh]).astype(np.float32)
+    scores = rng.random(200).astype(np.float32)
+    assert list(nms(xyxy, scores, 0.4)) == _greedy(xyxy, scores, 0.4)
+
+
+
+def _soft_greedy(xyxy: np.ndarray, scores: np.ndarray, sigma: float, score_thresh: float) -> tuple:
+    s = [float(v) for v in scores]
+    alive = [i for i in range(len(s)) if s[i] >= score_thresh]
+    keep, kept = [], []
+    while alive:
+        i = max(alive, key=lambda k: (s[k], -k))
+        alive.remove(i)
+        keep.append(i)
+        kept.append(s[i])
+        for j in alive:
+            iw = max(0.0, min(xyxy[i, 2], xyxy[j, 2]) - max(xyxy[i, 0], xyxy[j, 0]))
+            ih = max(0.0, min(xyxy[i, 3], xyxy[j, 3]) - max(xyxy[i, 1], xyxy[j, 1]))
+            inter = iw * ih
+            a = (xyxy[i, 2] - xyxy[i, 0]) * (xyxy[i, 3] - xyxy[i, 1])
+            b = (xyxy[j, 2] - xyxy[j, 0]) * (xyxy[j, 3] - xyxy[j, 1])
+            s[j] *= float(np.exp(-(inter / (a + b - inter)) ** 2 / sigma))
+        alive = [j for j in alive if s[j] >= score_thresh]
+    return keep, kept
+
+
+def test_clustered_soft_nms_matches_one_box_per_step() -> None:
+    rng = np.random.default_rng(2)
+    # Clusters of jittered boxes, with tied scores across and within clusters
+    ctr = np.repeat(rng.uniform(0, 400, size=(15, 2)), 8, axis=0) + rng.normal(0, 4, size=(120, 2))
+    xyxy = np.hstack([ctr, ctr + rng.uniform(20, 40, size=(120, 2))])
+    scores = np.round(rng.random(120), 1)
+    keep, kept = soft_nms(xyxy, scores, 0.5, score_thresh=0.05)
+    ref_keep, ref_kept = _soft_greedy(xyxy.astype(np.float32), scores, 0.5, 0.05)
+    assert list(keep) == ref_keep
+    assert kept == pytest.approx(ref_kept, rel=1e-4)
+
+def test_soft_nms_decays_instead_of_dropping() -> None:
+    boxes = np.array([[0, 0, 10, 10], [1, 0, 11, 10], [50, 50, 60, 60]], dtype=float)
+    scores = np.array([0.9, 0.8, 0.7])
+    keep, new_scores = soft_nms(boxes, scores, 0.5)
+    assert list(keep) == [0, 2, 1]
+    assert new_scores[0] == pytest.approx(0.9) and new_scores[1] == pytest.approx(0.7)
+    assert 0.0 < new_scores[2] < 0.8
+    keep, _ = soft_nms(boxes, scores, 0.5, score_thresh=0.5)
+    assert list(keep) == [0, 2]
+
+
+def test_select_thresholds_and_filters_classes() -> None:
+    boxes = np.array([[0, 0, 10, 10], [100, 0, 110, 10], [200, 0, 210, 10]], dtype=float)
+    scores = np.array([0.2, 0.9, 0.6])
+    classes = np.array([0, 1, 0])
+    idx, _ = select(boxes, scores, classes, ["car", "person"], conf_thresh=0.3, nms_iou=0.5)
+    assert list(idx) == [1, 2]
+    assert list(class_mask(classes, ["car", "person"], ["person"])) == [False, True, False]
+    idx, _ = select(boxes, scores, classes, ["car", "person"], class_include=["car"], max_det=1)
+    assert list(idx) == [2]
+
+
+def test_box_filter_uses_profile_and_overlay_overrides() -> None:
+    dets = [
+        Detection(0, 0, 10, 10, 0.9, "car"),
+        Detection(1, 1, 11, 11, 0.8, "car"),
+        Detection(0, 0, 10, 10, 0.3, "person"),
+    ]
+    profile = {"confidence_thresh": 0.35, "nms_iou": 0.5}
+    assert BoxFilter.from_profile(profile).apply(dets) == [dets[0]]
+    loose = BoxFilter.from_profile(profile, {"conf_thresh": 0.1, "class_include": ["person"]})
+    assert loose.apply(dets) == [dets[2]]
+    soft = BoxFilter.from_profile(profile, {"soft_nms": True}).apply([{"x1": 0, "y1": 0, "x2": 10, "y2": 10, "score": 0.9, "cls": "car"}])
+    assert soft[0]["score"] == pytest.approx(0.9)
+    assert BoxFilter.from_profile(profile).apply([]) == []
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import base64
+
+import numpy as np
+
+from app.pipelines.frame_executor import FrameResults
+from app.pipelines.preprocess import letterbox, prepare_frame, restore_results
+from app.providers.detection.replicate import Detection
+from app.utils import masks
+
+
+def test_letterbox_fits_long_side_and_centres() -> None:
+    img = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    canvas, geo = letterbox(img, 640)
+    assert canvas.shape == (640, 640, 3)
+    assert geo.scale == 640 / 1920
+    assert geo.pad_x == 0 and geo.pad_y == (640 - 360) // 2
+
+
+def test_small_frames_pass_through() -> None:
+    img = np.zeros((48, 64, 3), dtype=np.uint8)
+    canvas, geo = letterbox(img, 640)
+    assert canvas is img and geo.identity
+
+
+def test_restore_maps_boxes_masks_and_ocr_to_source() -> None:
+    img = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    prepared = prepare_frame(img, {"input_size": 640, "jpeg_quality": 80})
+    geo = prepared.geometry
+    # A box covering the source's right half, expressed on the canvas
+    det = Detection(x1=320, y1=geo.pad_y, x2=640, y2=geo.pad_y + 360, score=0.9, cls="car")
+    mask = np.zeros((640, 640), dtype=np.uint8)
+    mask[geo.pad_y:geo.pad_y + 360, 320:] = 1
+    results = FrameResults(
+        boxes=[det],
+        masks=[{"mask": base64.b64encode(mask.tobytes()).decode("utf-8")}],
+        ocr=[{"text": "STOP", "box": [0, geo.pad_y, 320, geo.pad_y + 180]}],
+    )
+    out = restore_results(results, geo)
+    b = out.boxes[0]
+    assert (b.x1, b.y1, b.x2, b.y2) == (960, 0, 1920, 1080)
+    assert det.x1 == 320  # cached provider objects are not mutated
+    assert out.ocr[0]["box"] == [0, 0, 960, 540]
+    assert out.masks[0]["format"] == "rle" and out.masks[0]["size"] == [1080, 1920]
+    full = masks.decode(out.masks[0])
+    assert full[:, 960:].all() and not full[:, :960].any()
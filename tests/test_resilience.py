@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.providers.resilience import (
+    CircuitBreaker,
+    ProviderError,
+    ProviderUnavailable,
+    ResiliencePolicy,
+    TokenBucket,
+    backoff_delay,
+    retry_after_s,
+)
+
+
+class _Resp:
+    def __init__(self, status: int, headers: dict | None = None) -> None:
+        self.status_code = status
+        self.headers = headers or {}
+
+
+def _policy(**kw) -> ResiliencePolicy:
+    kw.setdefault("backoff_base_s", 0.001)
+    kw.setdefault("backoff_cap_s", 0.002)
+    return ResiliencePolicy("test", **kw)
+
+
+def test_retry_after_parsing_and_backoff_floor() -> None:
+    assert retry_after_s({"Retry-After": "3"}) == 3.0
+    assert retry_after_s({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0.0
+    assert retry_after_s({}) is None
+    assert 2.0 <= backoff_delay(0, 0.1, 1.0, hint_s=2.0) <= 2.1
+    assert 0.0 <= backoff_delay(5, 0.1, 1.0) <= 1.0
+
+
+def test_policy_retries_then_succeeds_and_raises_on_4xx() -> None:
+    responses = iter([_Resp(503), _Resp(429, {"Retry-After": "0"}), _Resp(200)])
+    assert _policy().call(lambda: next(responses)).status_code == 200
+    with pytest.raises(ProviderError) as exc:
+        _policy().call(lambda: _Resp(401))
+    assert exc.value.status == 401 and not isinstance(exc.value, ProviderUnavailable)
+
+
+def test_breaker_opens_fails_fast_and_recovers_half_open() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=0.05)
+    policy = _policy(breaker=breaker, max_attempts=3)
+    calls = 0
+
+    def failing() -> _Resp:
+        nonlocal calls
+        calls += 1
+        return _Resp(500)
+
+    with pytest.raises(ProviderUnavailable):
+        policy.call(failing)
+    assert calls == 2 and breaker.state == CircuitBreaker.OPEN
+    t0 = time.perf_counter()
+    with pytest.raises(ProviderUnavailable, match="circuit open"):
+        policy.call(failing)
+    assert calls == 2 and time.perf_counter() - t0 < 0.01
+    time.sleep(0.06)
+    assert breaker.snapshot()["state"] == CircuitBreaker.HALF_OPEN
+    assert policy.call(lambda: _Resp(200)).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_token_bucket_paces_after_burst() -> None:
+    bucket = TokenBucket(rate_per_s=100, burst=2)
+    assert bucket.reserve() == 0.0 and bucket.reserve() == 0.0
+    assert 0.0 < bucket.reserve() <= 0.011
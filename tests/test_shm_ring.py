@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+
+import numpy as np
+import pytest
+
+from app.pipelines.shm_ring import FrameRing, StaleSlot
+
+
+def _consume(ring: FrameRing, refs, sums) -> None:
+    while True:
+        ref = refs.get()
+        if ref is None:
+            break
+        sums.put((ref.slot, int(ring.view(ref).sum())))
+        ring.release(ref)
+    ring.close()
+
+
+def test_put_view_release_and_stale_handles() -> None:
+    with FrameRing(2, (4, 4, 3)) as ring:
+        ref = ring.put(np.full((4, 4, 3), 7, dtype=np.uint8), refs=2)
+        assert int(ring.view(ref).sum()) == 7 * 48
+        ring.release(ref)
+        assert ring.in_use() == 1
+        ring.release(ref)
+        assert ring.in_use() == 0
+        with pytest.raises(StaleSlot):
+            ring.view(ref)
+        # The slot comes back under a new generation
+        again = [ring.put(np.zeros((4, 4, 3), dtype=np.uint8)) for _ in range(2)]
+        assert ref.slot in {r.slot for r in again} and all(r.gen >= 1 for r in again)
+        with pytest.raises(StaleSlot):
+            ring.release(ref)
+
+
+def test_slow_consumer_blocks_reuse() -> None:
+    with FrameRing(2, (8,)) as ring:
+        held = [ring.put(np.full(8, i, dtype=np.uint8)) for i in (1, 2)]
+        with pytest.raises(TimeoutError):
+            ring.put(np.zeros(8, dtype=np.uint8), timeout=0.05)
+        # Nothing the slow reader holds was overwritten
+        assert [int(ring.view(r)[0]) for r in held] == [1, 2]
+        ring.retain(held[0])
+        ring.release(held[0])
+        with pytest.raises(TimeoutError):
+            ring.put(np.zeros(8, dtype=np.uint8), timeout=0.05)
+        ring.release(held[0])
+        assert ring.view(ring.put(np.full(8, 3, dtype=np.uint8), timeout=1.0))[0] == 3
+
+
+def test_only_slot_refs_cross_processes() -> None:
+    ctx = mp.get_context("spawn")
+    frames = [np.random.default_rng(i).integers(0, 255, size=(90, 160, 3), dtype=np.uint8) for i in range(8)]
+    with FrameRing(3, (90, 160, 3), ctx=ctx) as ring:
+        refs, sums = ctx.Queue(), ctx.Queue()
+        worker = ctx.Process(target=_consume, args=(ring, refs, sums))
+        worker.start()
+        try:
+            # Eight frames through three slots: put() waits for the consumer's releases
+            for f in frames:
+                refs.put(ring.put(f, timeout=30))
+            got = [sums.get(timeout=30)[1] for _ in frames]
+        finally:
+            refs.put(None)
+            worker.join(timeout=30)
+        assert got == [int(f.sum()) for f in frames]
+        assert ring.in_use() == 0
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+
+import numpy as np
+
+from app.pipelines.tiling import detect_tiles, prepare_tiles, tile_grid
+from app.providers.detection.replicate import Detection
+from app.utils.frame import Frame
+
+
+class _BrightBlob:
+    """Detects the bounding box of bright pixels in whatever image it is sent."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def ainfer(self, image_b64: str) -> list:
+        self.calls += 1
+        pixels = Frame.from_b64(image_b64).pixels
+        ys, xs = np.nonzero(pixels[..., 0] > 200)
+        if not len(xs):
+            return []
+        return [Detection(x1=float(xs.min()), y1=float(ys.min()), x2=float(xs.max() + 1), y2=float(ys.max() + 1), score=0.9, cls="sign")]
+
+
+def test_tile_grid_covers_frame_with_overlap() -> None:
+    tiles = tile_grid(1000, 600, 400, 0.25)
+    assert {t.x for t in tiles} == {0, 300, 600}
+    assert {t.y for t in tiles} == {0, 200}
+    assert all(t.w == 400 and t.h == 400 for t in tiles)
+    assert max(t.x + t.w for t in tiles) == 1000 and max(t.y + t.h for t in tiles) == 600
+    assert tile_grid(300, 200, 400, 0.25) == tile_grid(300, 200, 400, 0.5)
+    assert len(tile_grid(300, 200, 400, 0.25)) == 1
+
+
+def test_prepare_tiles_respects_profile() -> None:
+    img = np.zeros((600, 1000, 3), dtype=np.uint8)
+    assert prepare_tiles(img, {"tiling": {"enabled": False}}) is None
+    jobs = prepare_tiles(img, {"input_size": 512, "tiling": {"enabled": True, "tile_size": 400, "overlap": 0.25}})
+    assert len(jobs) == 7 and jobs[-1].tile is None
+    assert jobs[0].prepared.frame.shape[:2] == (400, 400)
+    # A frame that fits in one tile is not tiled
+    assert prepare_tiles(img[:300, :300], {"tiling": {"enabled": True, "tile_size": 400}}) is None
+
+
+def test_detect_tiles_merges_overlapping_hits_in_frame_coordinates() -> None:
+    img = np.zeros((600, 1000, 3), dtype=np.uint8)
+    # Inside the overlap of the first two tile columns, so both tiles see it whole
+    img[100:140, 320:360] = 255
+    jobs = prepare_tiles(img, {"tiling": {"enabled": True, "tile_size": 400, "overlap": 0.25, "full_frame": False}})
+    det = _BrightBlob()
+    dets, errors, ms = asyncio.run(detect_tiles(det, jobs, 0.5))
+    assert det.calls == len(jobs) == 6
+    assert not errors and ms > 0
+    assert len(dets) == 1
+    d = dets[0]
+    assert abs(d.x1 - 320) <= 2 and abs(d.y1 - 100) <= 2 and abs(d.x2 - 360) <= 2 and abs(d.y2 - 140) <= 2
+
+
+def test_detect_tiles_reports_failed_tiles() -> None:
+    class _Flaky(_BrightBlob):
+        async def ainfer(self, image_b64: str) -> list:
+            if self.calls == 0:
+                self.calls += 1
+                raise RuntimeError("boom")
+            return await super().ainfer(image_b64)
+
+    img = np.zeros((600, 1000, 3), dtype=np.uint8)
+    jobs = prepare_tiles(img, {"tiling": {"enabled": True, "tile_size": 400, "overlap": 0.25, "full_frame": False}})
+    dets, errors, _ = asyncio.run(detect_tiles(_Flaky(), jobs, 0.5))
+    assert len(dets) == 0 and len(errors) == 1 and "boom" in errors[0]
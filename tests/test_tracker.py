@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.providers.tracking.bytetrack import ByteTracker, KalmanBoxFilter, associate, overlapping_pairs, pair_iou
+
+
+def _box(x: float, y: float, score: float = 0.9, cls: str = "car", w: float = 40, h: float = 30) -> dict:
+    return {"x1": x, "y1": y, "x2": x + w, "y2": y + h, "score": score, "cls": cls}
+
+
+def test_ids_persist_across_frames_with_motion() -> None:
+    tracker = ByteTracker()
+    ids = None
+    for t in range(10):
+        tracks = tracker.update([_box(10 + 5 * t, 10), _box(300 - 5 * t, 200)])
+        frame_ids = sorted(tr["id"] for tr in tracks)
+        ids = ids or frame_ids
+        assert frame_ids == ids
+    assert len(tracks[0]["trail"]) == 10
+
+
+def test_low_score_detection_keeps_track_alive() -> None:
+    tracker = ByteTracker()
+    first = tracker.update([_box(100, 100)])[0]["id"]
+    # Too weak to start a track, but enough to continue one
+    tracks = tracker.update([_box(102, 100, score=0.3)])
+    assert [tr["id"] for tr in tracks] == [first]
+    assert tracker.update([_box(10, 10, score=0.3)]) == []
+
+
+def test_lost_tracks_recover_then_evict() -> None:
+    tracker = ByteTracker(max_lost=3)
+    tid = tracker.update([_box(100, 100)])[0]["id"]
+    tracker.update([])
+    tracker.update([])
+    assert tracker.update([_box(100, 100)])[0]["id"] == tid
+    for _ in range(5):
+        tracker.update([])
+    assert len(tracker) == 0
+    assert tracker.update([_box(100, 100)])[0]["id"] != tid
+
+
+def test_classes_never_swap_tracks() -> None:
+    tracker = ByteTracker()
+    car = tracker.update([_box(100, 100, cls="car")])[0]["id"]
+    tracks = tracker.update([_box(100, 100, cls="person")])
+    assert tracks[0]["id"] != car and tracks[0]["cls"] == "person"
+
+
+def test_sparse_association_matches_dense_optimum() -> None:
+    rng = np.random.default_rng(1)
+    xy = rng.uniform(0, 400, size=(60, 2))
+    a = np.hstack([xy, xy + 30])
+    b = a + rng.normal(0, 6, size=a.shape)
+    ia, ib = overlapping_pairs(a, b)
+    iou = pair_iou(a[ia], b[ib])
+    ok = iou >= 0.2
+    r, c = associate(ia[ok], ib[ok], iou[ok])
+    assert len(set(r.tolist())) == len(r) and len(set(c.tolist())) == len(c)
+    # Brute force over all pairs finds exactly the same overlapping set
+    dense = [(i, j) for i in range(len(a)) for j in range(len(b)) if pair_iou(a[i:i + 1], b[j:j + 1])[0] > 0]
+    assert sorted(zip(ia.tolist(), ib.tolist())) == sorted(dense)
+
+
+def test_blocked_kalman_matches_full_covariance() -> None:
+    kf = KalmanBoxFilter()
+    z0 = np.array([[50.0, 60.0, 0.5, 40.0]])
+    mean, var = kf.initiate(z0)
+    # Reference: textbook 8x8 filter with the same noise model
+    F = np.eye(8)
+    F[:4, 4:] = np.eye(4)
+    H = np.eye(4, 8)
+    P = np.diag(np.concatenate([var[0, 0], var[0, 2]]))
+    x = mean[0].copy()
+    for z in ([53.0, 61.0, 0.5, 41.0], [57.0, 63.0, 0.52, 41.5]):
+        q_pos = kf._std(x[None, 3], kf._std_pos, kf._fixed_pos)[0] ** 2
+        q_vel = kf._std(x[None, 3], kf._std_vel, kf._fixed_vel)[0] ** 2
+        x, P = F @ x, F @ P @ F.T + np.diag(np.concatenate([q_pos, q_vel]))
+        mean, var = kf.predict(mean, var)
+        r = kf._std(x[None, 3], kf._std_pos, kf._fixed_meas)[0] ** 2
+        S = H @ P @ H.T + np.diag(r)
+        K = P @ H.T @ np.linalg.inv(S)
+        x, P = x + K @ (np.array(z) - H @ x), P - K @ S @ K.T
+        mean, var = kf.update(mean, var, np.array([z]))
+    assert np.allclose(mean[0], x)
+    assert np.allclose(np.diag(P)[:4], var[0, 0]) and np.allclose(np.diag(P)[4:], var[0, 2])
+    assert np.allclose(np.diag(P, 4), var[0, 1])
+
+
+def test_propagate_coasts_tracks_between_detections() -> None:
+    tracker = ByteTracker()
+    for t in range(5):
+        tid = tracker.update([_box(100 + 10 * t, 50)])[0]["id"]
+    coasted = [tracker.propagate(decay=0.5)[0] for _ in range(2)]
+    assert [c["id"] for c in coasted] == [tid, tid]
+    # Keeps moving ~10px/frame and loses confidence each frame
+    assert coasted[1]["x1"] > coasted[0]["x1"] > 140
+    assert coasted[0]["score"] == 0.9 * 0.5 and coasted[1]["score"] == 0.9 * 0.25
+    assert tracker.update([_box(170, 50)])[0]["id"] == tid
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.providers.transport import ProviderTransport
+
+
+class _Echo(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_transport_reuses_keepalive_connection() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Echo)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/predict"
+        transport = ProviderTransport(pool_maxsize=2, timeout_s=5)
+        assert transport.session(url) is transport.session(url)
+        before = transport.stats().get("127.0.0.1", {"hits": 0, "misses": 0})
+        for _ in range(3):
+            assert transport.post(url, json={"x": 1}).ok
+        after = transport.stats()["127.0.0.1"]
+        assert after["misses"] - before["misses"] == 1
+        assert after["hits"] - before["hits"] == 2
+        transport.close()
+    finally:
+        server.shutdown()
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.pipelines.video_pipeline import MotionGate
+
+
+def test_gate_skips_static_frames_and_catches_drift() -> None:
+    gate = MotionGate.from_profile({"motion_gate": {"threshold": 2.0}})
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 200, size=(240, 320, 3), dtype=np.uint8)
+    # Sensor noise alone never triggers a call
+    noisy = [np.clip(base + rng.integers(-3, 4, size=base.shape), 0, 255).astype(np.uint8) for _ in range(5)]
+    assert [gate.changed(f) for f in [base, *noisy]] == [True] + [False] * 5
+    # Slow brightening is compared against the last sent frame, so it adds up
+    drift = [np.clip(base.astype(np.int16) + k, 0, 255).astype(np.uint8) for k in (1, 2, 3)]
+    assert [gate.changed(f) for f in drift] == [False, False, True]
+    moved = base.copy()
+    moved[60:180, 80:240] = 255
+    assert gate.changed(moved)
+    assert (gate.sent, gate.skipped) == (3, 7)
+
+
+def test_zero_threshold_disables_gate() -> None:
+    gate = MotionGate.from_profile({})
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    assert all(gate.changed(frame) for _ in range(3))
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import threading
+
+import cv2
+import numpy as np
+
+from app.pipelines.video_sink import SinkItem, VideoSink, compose_ab
+
+
+def _frame_count(path) -> int:
+    cap = cv2.VideoCapture(str(path))
+    n = 0
+    while cap.read()[0]:
+        n += 1
+    cap.release()
+    return n
+
+
+def test_sink_writes_main_and_ab_videos(tmp_path) -> None:
+    sink = VideoSink(tmp_path / "out.mp4", fps=10, ab_path=tmp_path / "ab.mp4", queue_size=32)
+    box = {"x1": 4, "y1": 4, "x2": 30, "y2": 20}
+    for i in range(6):
+        assert sink.submit(SinkItem(np.full((48, 64, 3), 20 * i, dtype=np.uint8), [box], [], ab_boxes=[]))
+    stats = sink.close()
+    assert stats["frames_written"] == 6 and stats["frames_dropped"] == 0
+    assert stats["encode_fps"] > 0 and stats["ab_path"] == str(tmp_path / "ab.mp4")
+    assert _frame_count(tmp_path / "out.mp4") == 6
+    assert _frame_count(tmp_path / "ab.mp4") == 6
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path) -> None:
+    sink = VideoSink(tmp_path / "out.mp4", fps=10, queue_size=2)
+    gate = threading.Event()
+    write = sink._write
+    sink._write = lambda item: (gate.wait(5), write(item))
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    accepted = [sink.submit(SinkItem(frame)) for _ in range(6)]
+    gate.set()
+    stats = sink.close()
+    # One frame in the encoder, two queued, the rest dropped without waiting
+    assert accepted.count(False) >= 3 and stats["frames_dropped"] == accepted.count(False)
+    assert stats["frames_written"] == accepted.count(True)
+
+
+def test_compose_ab_splits_halves() -> None:
+    a = np.full((10, 20, 3), 10, dtype=np.uint8)
+    b = np.full((10, 20, 3), 200, dtype=np.uint8)
+    out = compose_ab(a, b)
+    assert out[5, 2, 0] == 10 and out[5, 17, 0] == 200
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.utils.viz import RenderSpec, draw_boxes, draw_ocr_labels, mask_labels, overlay_soft_masks, render
+
+
+def _img() -> np.ndarray:
+    return np.full((60, 80, 3), 100, dtype=np.uint8)
+
+
+def test_render_matches_per_layer_functions() -> None:
+    img = _img()
+    m = np.zeros((60, 80), dtype=np.uint8)
+    m[10:30, 10:30] = 1
+    boxes = [(40, 5, 70, 25)]
+    ocr = [{"text": "STOP", "box": [5, 40, 30, 55]}]
+    assert np.array_equal(render(img, RenderSpec(masks=[m])), overlay_soft_masks(img, [m]))
+    assert np.array_equal(render(img, RenderSpec(boxes=boxes, ocr=ocr)), draw_ocr_labels(draw_boxes(img, boxes), ocr))
+    assert np.array_equal(img, _img())  # the source frame is never drawn on
+
+
+def test_render_respects_profile_flags_and_reuses_buffer() -> None:
+    img = _img()
+    spec = RenderSpec.from_profile({"render": {"show_boxes": False}}, boxes=[(10, 10, 50, 50)])
+    buf = np.zeros_like(img)
+    out = render(img, spec, out=buf)
+    assert out is buf and np.array_equal(out, img)
+    assert RenderSpec.from_profile({}, {"mask_opacity": 0.6}).mask_alpha == 0.6
+
+
+def test_overlapping_masks_fold_into_one_label_map() -> None:
+    a = np.zeros((20, 20), dtype=np.uint8)
+    a[0:10, 0:10] = 1
+    b = np.zeros((20, 20), dtype=bool)
+    b[5:15, 5:15] = True
+    label, regions = mask_labels([a, b, np.zeros((20, 20), dtype=np.uint8)], (20, 20))
+    assert label[2, 2] == 1 and label[7, 7] == 2 and label[18, 18] == 0
+    assert [r[0] for r in regions] == [1, 2]
+    # A pixel under both masks is blended once, in the later mask's colour
+    img = np.full((20, 20, 3), 100, dtype=np.uint8)
+    both = render(img, RenderSpec(masks=[a, b]))
+    only_b = render(img, RenderSpec(masks=[np.zeros_like(a), b]))
+    assert np.array_equal(both[7, 7], only_b[7, 7]) and not np.array_equal(both[7, 7], img[7, 7])
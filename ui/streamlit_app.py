@@ -1311,34 +1311,44 @@ def main() -> None:
             "Agriculture Field Scan",
         ])
 
-        def _decode_b64_to_cv(img_b64: str):
-            import base64 as _b64, numpy as _np, cv2 as _cv
-            arr = _np.frombuffer(_b64.b64decode(img_b64), dtype=_np.uint8)
-            return _cv.imdecode(arr, _cv.IMREAD_COLOR)
+        def _decode_jpeg_to_cv(jpg: bytes | None):
+            import numpy as _np, cv2 as _cv
+            if not jpg:
+                return None
+            return _cv.imdecode(_np.frombuffer(jpg, dtype=_np.uint8), _cv.IMREAD_COLOR)
+
+        # Frames go up as multipart bytes and come back as binary JPEG (no base64 JSON)
+        frame_client = HttpClient(api_base)
 
         # 1) Roadway: focus on signs/lights + OCR list and compare heatmap
         with uc1:
             st.caption("Filter to traffic signs/lights, extract OCR, and compare profiles")
             up = st.file_uploader("Upload frame (jpg/png)", type=["jpg","jpeg","png"], key="uc1")
             if up and st.button("Analyze roadway frame", key="uc1btn"):
-                import base64 as _b64
-                img_b64 = _b64.b64encode(up.read()).decode("utf-8")
+                img_bytes = up.read()
                 try:
                     # Run realtime with class filters for signs/lights
-                    payload = {
-                        "image_b64": img_b64,
-                        "profile": "realtime",
-                        "overlay_opts": {"class_include": ["traffic-light","sign"], "mask_opacity": 0.35},
-                    }
-                    rt = requests.post(f"{api_base}/run_frame", json=payload, timeout=30).json()
-                    st.image(rt.get("annotated_b64"), caption="Realtime (signs/lights)", use_column_width=True)
+                    rt = frame_client.run_frame(
+                        img_bytes,
+                        profile="realtime",
+                        overlay_opts={"class_include": ["traffic-light","sign"], "mask_opacity": 0.35},
+                        filename=up.name,
+                    )
+                    if rt.get("annotated_jpeg"):
+                        st.image(rt["annotated_jpeg"], caption="Realtime (signs/lights)", use_column_width=True)
                     st.caption("OCR (if present)")
                     st.json(rt.get("ocr") or [])
                     # Compare to accuracy
-                    acc = requests.post(f"{api_base}/run_frame", json={"image_b64": img_b64, "profile": "accuracy"}, timeout=30).json()
+                    acc = frame_client.run_frame(img_bytes, profile="accuracy", filename=up.name)
                     from streamlit_image_comparison import image_comparison
-                    if rt.get("annotated_b64") and acc.get("annotated_b64"):
-                        image_comparison(img1=rt["annotated_b64"], img2=acc["annotated_b64"], label1="Realtime", label2="Accuracy", width=700)
+                    from PIL import Image as _Image
+                    import io as _io
+                    if rt.get("annotated_jpeg") and acc.get("annotated_jpeg"):
+                        image_comparison(
+                            img1=_Image.open(_io.BytesIO(rt["annotated_jpeg"])),
+                            img2=_Image.open(_io.BytesIO(acc["annotated_jpeg"])),
+                            label1="Realtime", label2="Accuracy", width=700,
+                        )
                 except Exception as e:
                     st.warning(f"Error: {e}")
 
@@ -1349,11 +1359,10 @@ def main() -> None:
             x1 = st.number_input("Zone x1", 0, 2000, 100); y1 = st.number_input("Zone y1", 0, 2000, 100)
             x2 = st.number_input("Zone x2", 0, 2000, 600); y2 = st.number_input("Zone y2", 0, 2000, 400)
             if up and st.button("Check safety zones", key="uc2btn"):
-                import base64 as _b64, cv2 as _cv
-                img_b64 = _b64.b64encode(up.read()).decode("utf-8")
+                import cv2 as _cv
                 try:
-                    rt = requests.post(f"{api_base}/run_frame", json={"image_b64": img_b64, "profile": "realtime"}, timeout=30).json()
-                    im = _decode_b64_to_cv(rt.get("annotated_b64"))
+                    rt = frame_client.run_frame(up.read(), profile="realtime", filename=up.name)
+                    im = _decode_jpeg_to_cv(rt.get("annotated_jpeg"))
                     if im is not None:
                         _cv.rectangle(im, (int(x1), int(y1)), (int(x2), int(y2)), (0,0,255), 2)
                         # Count persons in zone
@@ -1366,8 +1375,7 @@ def main() -> None:
                         st.metric("People in zone", cnt)
                         ok, buf = _cv.imencode('.jpg', im)
                         if ok:
-                            import base64 as _b64
-                            st.image(_b64.b64encode(buf.tobytes()).decode('utf-8'), use_column_width=True)
+                            st.image(buf.tobytes(), use_column_width=True)
                 except Exception as e:
                     st.warning(f"Error: {e}")
 
@@ -1376,10 +1384,9 @@ def main() -> None:
             st.caption("Extract price/label text and review as a table")
             up = st.file_uploader("Upload frame (jpg/png)", type=["jpg","jpeg","png"], key="uc3")
             if up and st.button("Extract OCR", key="uc3btn"):
-                import base64 as _b64, pandas as _pd
-                img_b64 = _b64.b64encode(up.read()).decode("utf-8")
+                import pandas as _pd
                 try:
-                    rt = requests.post(f"{api_base}/run_frame", json={"image_b64": img_b64, "profile": "accuracy"}, timeout=30).json()
+                    rt = frame_client.run_frame(up.read(), profile="accuracy", filename=up.name)
                     ocr = rt.get("ocr") or []
                     if ocr:
                         df = _pd.DataFrame(ocr)
@@ -1422,11 +1429,9 @@ def main() -> None:
             up = st.file_uploader("Upload frame (jpg/png)", type=["jpg","jpeg","png"], key="uc5")
             if up and st.button("Analyze field", key="uc5btn"):
                 import numpy as _np, cv2 as _cv
-                import base64 as _b64
-                img_b64 = _b64.b64encode(up.read()).decode("utf-8")
                 try:
-                    rt = requests.post(f"{api_base}/run_frame", json={"image_b64": img_b64, "profile": "realtime"}, timeout=30).json()
-                    im = _decode_b64_to_cv(rt.get("annotated_b64"))
+                    rt = frame_client.run_frame(up.read(), profile="realtime", filename=up.name)
+                    im = _decode_jpeg_to_cv(rt.get("annotated_jpeg"))
                     if im is not None:
                         hsv = _cv.cvtColor(im, _cv.COLOR_BGR2HSV)
                         lower = _np.array([35, 40, 40]); upper = _np.array([85, 255, 255])
@@ -1435,7 +1440,7 @@ def main() -> None:
                         overlay = _cv.addWeighted(im, 0.7, veg, 0.3, 0)
                         ok, buf = _cv.imencode('.jpg', overlay)
                         if ok:
-                            st.image(_b64.b64encode(buf.tobytes()).decode('utf-8'), use_column_width=True)
+                            st.image(buf.tobytes(), use_column_width=True)
                 except Exception as e:
                     st.warning(f"Error: {e}")
 